@@ -1,18 +1,48 @@
-from flask import Flask, request, jsonify, g, render_template, send_from_directory
+from flask import Flask, request, jsonify, g, render_template, send_from_directory, Response, has_app_context, has_request_context
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 import pymysql
 import json
 import os
+import base64
+import hashlib
+import hmac
+import bisect
+import heapq
+import math
 import datetime
 from werkzeug.security import generate_password_hash, check_password_hash
 from dotenv import load_dotenv
 import jwt
 import functools
+import click
 import re
 import smtplib
 import random
+import secrets
+import queue
+import threading
+import time
+import contextlib
+import csv
+import io
+import zipfile
+import zlib
+import mimetypes
+import concurrent.futures
+from collections import deque, OrderedDict, Counter
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from xml.sax.saxutils import escape as xml_escape
+
+try:
+    import brotli
+except ImportError:  # Optional: br is only offered when installed
+    brotli = None
+try:
+    import zstandard
+except ImportError:  # Optional: zstd is only offered when installed
+    zstandard = None
 
 # Load environment variables from .env file
 load_dotenv()
@@ -21,21 +51,152 @@ load_dotenv()
 JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'default-secret-key-change-this')
 JWT_ALGORITHM = 'HS256'
 JWT_EXPIRATION_HOURS = 720  # 30 days
+# Verified tokens are cached (keyed by digest) so each request skips the signature check
+TOKEN_CACHE_SIZE = int(os.getenv('TOKEN_CACHE_SIZE', 10000))
+# How long another worker may keep honouring a token after a role change, deletion or password reset
+TOKEN_VERSION_CACHE_TTL = float(os.getenv('TOKEN_VERSION_CACHE_TTL', 30))
+# Password Hashing Configuration (any Werkzeug method string; existing hashes are upgraded on login)
+PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', os.cpu_count() or 2))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv('PASSWORD_HASH_MAX_PENDING', 4 * PASSWORD_HASH_WORKERS))
 # Email Configuration
 SMTP_EMAIL = os.getenv('SMTP_EMAIL')
 SMTP_PASSWORD = os.getenv('SMTP_PASSWORD')
 SMTP_SERVER = os.getenv('SMTP_SERVER', 'smtp.gmail.com')
 SMTP_PORT = int(os.getenv('SMTP_PORT', 587))
+SMTP_USE_TLS = os.getenv('SMTP_USE_TLS', 'true').lower() == 'true'
+SMTP_USE_AUTH = os.getenv('SMTP_USE_AUTH', 'true').lower() == 'true'
+MAIL_TRANSPORT = os.getenv('MAIL_TRANSPORT', 'smtp')  # 'smtp' or 'console'
+MAIL_QUEUE_SIZE = int(os.getenv('MAIL_QUEUE_SIZE', 1000))
+MAIL_MAX_RETRIES = int(os.getenv('MAIL_MAX_RETRIES', 5))
+MAIL_RETRY_BACKOFF = float(os.getenv('MAIL_RETRY_BACKOFF', 2))  # seconds, doubled per attempt
+
+# Search Configuration
+SEARCH_BACKEND = os.getenv('SEARCH_BACKEND', 'fulltext')  # 'fulltext' (MySQL) or 'memory'
+SEARCH_MAX_RESULTS = int(os.getenv('SEARCH_MAX_RESULTS', 500))
+
+# Notification Stream Configuration
+SSE_HEARTBEAT_SECONDS = int(os.getenv('SSE_HEARTBEAT_SECONDS', 15))
+SSE_RESYNC_SECONDS = int(os.getenv('SSE_RESYNC_SECONDS', 60))
+SSE_MAX_SECONDS = int(os.getenv('SSE_MAX_SECONDS', 600))  # Clients reconnect transparently
+# Each open stream holds a worker thread; keep this below the threads a process has
+SSE_MAX_STREAMS = int(os.getenv('SSE_MAX_STREAMS', 10))
+SSE_TICKET_TTL_SECONDS = int(os.getenv('SSE_TICKET_TTL_SECONDS', 30))
+
+# Notification Fan-out Configuration
+NOTIFY_FANOUT_ASYNC = os.getenv('NOTIFY_FANOUT_ASYNC', 'false').lower() == 'true'
+ADMIN_ID_CACHE_TTL = int(os.getenv('ADMIN_ID_CACHE_TTL', 60))  # seconds
 
-# OTP Storage (In-memory)
-# Format: { 'email@adventz.com': { 'otp': '123456', 'expires_at': datetime_object } }
-otp_store = {}
+# Notification Retention Configuration
+NOTIFICATIONS_PAGE_MAX_LIMIT = int(os.getenv('NOTIFICATIONS_PAGE_MAX_LIMIT', 200))
+NOTIFICATION_RETENTION_DAYS = int(os.getenv('NOTIFICATION_RETENTION_DAYS', 90))  # 0 disables the purge job
+NOTIFICATION_RETENTION_BATCH = int(os.getenv('NOTIFICATION_RETENTION_BATCH', 1000))
+NOTIFICATION_RETENTION_INTERVAL = int(os.getenv('NOTIFICATION_RETENTION_INTERVAL', 21600))  # seconds
+
+# Cascading Delete Configuration
+DELETE_BATCH_SIZE = int(os.getenv('DELETE_BATCH_SIZE', 500))  # rows per delete transaction
+DELETE_BATCH_PAUSE = float(os.getenv('DELETE_BATCH_PAUSE', 0.02))  # seconds between batches
+
+# OTP Configuration
+OTP_STORE = os.getenv('OTP_STORE', 'mysql')  # 'mysql' (shared by all workers) or 'memory'
+OTP_TTL_SECONDS = int(os.getenv('OTP_TTL_SECONDS', 300))
+OTP_MAX_ENTRIES = int(os.getenv('OTP_MAX_ENTRIES', 10000))  # memory store only
+OTP_RATE_LIMIT_COUNT = int(os.getenv('OTP_RATE_LIMIT_COUNT', 3))  # sends per email per window
+OTP_RATE_LIMIT_WINDOW = int(os.getenv('OTP_RATE_LIMIT_WINDOW', 600))  # seconds
 
 # Configure the Flask app to look for templates in the 'templates' folder
 # and serve static files from a 'static' folder.
 app = Flask(__name__, template_folder='templates', static_folder='static')
 CORS(app)  # Enable Cross-Origin Resource Sharing
 
+
+class JSONProvider(DefaultJSONProvider):
+    """Serializes DATETIME columns as ISO 8601 strings, the format the frontend has always received."""
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, (datetime.datetime, datetime.date)):
+            return o.isoformat()
+        return DefaultJSONProvider.default(o)
+
+
+app.json = JSONProvider(app)
+
+
+# --- Query Instrumentation ---
+def log_event(event, **fields):
+    """Prints one structured (JSON) log line."""
+    print(json.dumps({'event': event, 'at': datetime.datetime.now().isoformat(), **fields}, default=str), flush=True)
+
+
+class QueryStats:
+    """Statements issued while handling one request: count, total time, slowest and repeats."""
+
+    SLOWEST_KEPT = 5
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.count = 0
+        self.total = 0.0
+        self.slowest = []  # (seconds, statement), slowest first
+        self.statements = Counter()
+
+    def record(self, statement, seconds):
+        self.count += 1
+        self.total += seconds
+        self.statements[statement] += 1
+        if len(self.slowest) < self.SLOWEST_KEPT or seconds > self.slowest[-1][0]:
+            self.slowest.append((seconds, statement))
+            self.slowest.sort(key=lambda entry: entry[0], reverse=True)
+            del self.slowest[self.SLOWEST_KEPT:]
+
+    def repeated(self, threshold):
+        """Statements issued at least `threshold` times, a sign of a query running per row (N+1)."""
+        return [(statement, count) for statement, count in self.statements.most_common() if count >= threshold]
+
+
+def compact_statement(statement):
+    return ' '.join(statement.split())
+
+
+def record_query(statement, seconds):
+    if seconds * 1000 >= SLOW_QUERY_MS:
+        log_event(
+            'slow_query',
+            duration_ms=round(seconds * 1000, 1),
+            endpoint=request.endpoint if has_request_context() else None,
+            statement=compact_statement(statement),
+        )
+    # Background jobs, CLI commands and streamed bodies run outside a request
+    if has_app_context():
+        stats = g.get('query_stats')
+        if stats is not None:
+            stats.record(statement, seconds)
+
+
+class QueryTimingMixin:
+    """Times every execute() (and executemany(), which goes through it).
+
+    The unformatted statement is recorded, so the same query with different
+    parameters counts as a repeat.
+    """
+
+    def execute(self, query, args=None):
+        started = time.perf_counter()
+        try:
+            return super().execute(query, args)
+        finally:
+            record_query(query, time.perf_counter() - started)
+
+
+class InstrumentedDictCursor(QueryTimingMixin, pymysql.cursors.DictCursor):
+    pass
+
+
+class InstrumentedSSDictCursor(QueryTimingMixin, pymysql.cursors.SSDictCursor):
+    pass
+
+
 # MySQL Database Configuration
 DB_CONFIG = {
     'host': os.getenv('DB_HOST', 'localhost'),
@@ -44,21 +205,275 @@ DB_CONFIG = {
     'password': os.getenv('DB_PASSWORD', ''),
     'database': os.getenv('DB_NAME', 'idea_ticketing'),
     'charset': 'utf8mb4',
-    'cursorclass': pymysql.cursors.DictCursor
+    'cursorclass': InstrumentedDictCursor
 }
 
+# Connection Pool Configuration
+DB_POOL_MIN_SIZE = int(os.getenv('DB_POOL_MIN_SIZE', 2))
+DB_POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE', 20))
+DB_POOL_IDLE_TIMEOUT = int(os.getenv('DB_POOL_IDLE_TIMEOUT', 300))  # seconds
+DB_POOL_CHECKOUT_TIMEOUT = float(os.getenv('DB_POOL_CHECKOUT_TIMEOUT', 10))  # seconds
+
+# Response Cache Configuration (rendered GET responses kept in memory, per process)
+RESPONSE_CACHE_SIZE = int(os.getenv('RESPONSE_CACHE_SIZE', 500))
+CACHE_VERSION_SHARDS = int(os.getenv('CACHE_VERSION_SHARDS', 16))  # counter rows per table, to spread write locks
+
+# Streaming Configuration (unpaginated lists longer than STREAM_THRESHOLD_ROWS stream rows instead of buffering them)
+STREAM_CHUNK_BYTES = int(os.getenv('STREAM_CHUNK_BYTES', 64 * 1024))
+STREAM_FETCH_ROWS = 500  # rows read from the server-side cursor per round trip
+# Shorter lists are sent as one ordinary (and cacheable) response
+STREAM_THRESHOLD_ROWS = int(os.getenv('STREAM_THRESHOLD_ROWS', 2000))
+# Streamed responses open at once per process; each holds a pooled connection until its client is done
+STREAM_MAX_CONCURRENT = int(os.getenv('STREAM_MAX_CONCURRENT', max(1, DB_POOL_MAX_SIZE // 4)))
+
+# Response Compression Configuration (br and zstd need the optional brotli / zstandard packages)
+COMPRESSION_ENABLED = os.getenv('COMPRESSION_ENABLED', 'true').lower() == 'true'
+COMPRESSION_ENCODINGS = [e.strip() for e in os.getenv('COMPRESSION_ENCODINGS', 'zstd,br,gzip').split(',') if e.strip()]
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', 1024))  # bytes; smaller bodies are sent as-is
+GZIP_LEVEL = int(os.getenv('GZIP_LEVEL', 6))
+BROTLI_QUALITY = int(os.getenv('BROTLI_QUALITY', 5))
+ZSTD_LEVEL = int(os.getenv('ZSTD_LEVEL', 3))
+
+# Query Instrumentation Configuration
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', 200))  # log statements slower than this
+SLOW_REQUEST_MS = float(os.getenv('SLOW_REQUEST_MS', 1000))  # log requests slower than this, with their slowest statements
+N_PLUS_ONE_THRESHOLD = int(os.getenv('N_PLUS_ONE_THRESHOLD', 5))  # identical statements per request before flagging
+# Bearer token for scrapers of /metrics and /api/health/*; admins can always use their own token
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+
+
+# --- Connection Pool ---
+class PoolExhaustedError(Exception):
+    """Raised when no connection could be checked out before the timeout."""
+
+
+class ConnectionPool:
+    """A bounded, thread-safe pool of PyMySQL connections.
+
+    Idle connections are reused most-recently-used first, pinged on checkout and
+    closed once they have been idle longer than ``idle_timeout`` (never dropping
+    below ``min_size``). Connections are rolled back before being returned so no
+    transaction or snapshot leaks into the next request.
+    """
+
+    def __init__(self, config, min_size=2, max_size=20, idle_timeout=300, checkout_timeout=10):
+        if max_size < 1:
+            raise ValueError('max_size must be at least 1')
+        self.config = config
+        self.min_size = max(0, min(min_size, max_size))
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.checkout_timeout = checkout_timeout
+        self._idle = deque()  # (connection, last_used) pairs, most recent on the right
+        self._size = 0  # open connections, idle and checked out
+        self._cond = threading.Condition()
+        self._pid = os.getpid()
+        self._stats = {
+            'created': 0,
+            'closed': 0,
+            'checkouts': 0,
+            'waits': 0,
+            'timeouts': 0,
+            'ping_failures': 0,
+            'idle_evictions': 0,
+        }
+
+    def _connect(self):
+        conn = pymysql.connect(**self.config)
+        with self._cond:
+            self._stats['created'] += 1
+        return conn
+
+    def _discard(self, conn):
+        """Closes a connection and frees its slot. Must be called with the lock held."""
+        try:
+            conn.close()
+        except Exception:
+            pass
+        self._size -= 1
+        self._stats['closed'] += 1
+        self._cond.notify()
+
+    def _reset_after_fork(self):
+        """Forgets connections inherited from a parent process (e.g. gunicorn --preload)."""
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._idle.clear()
+            self._size = 0
+
+    def _evict_idle(self, now):
+        """Closes connections idle for longer than idle_timeout. Must be called with the lock held."""
+        while self._idle and self._size > self.min_size:
+            conn, last_used = self._idle[0]
+            if now - last_used < self.idle_timeout:
+                break
+            self._idle.popleft()
+            self._stats['idle_evictions'] += 1
+            self._discard(conn)
+
+    def fill(self):
+        """Opens connections until the pool holds at least min_size."""
+        while True:
+            with self._cond:
+                self._reset_after_fork()
+                if self._size >= self.min_size:
+                    return
+                self._size += 1
+            try:
+                conn = self._connect()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                raise
+            with self._cond:
+                self._idle.append((conn, time.monotonic()))
+                self._cond.notify()
+
+    def checkout(self):
+        """Returns a healthy connection, waiting up to checkout_timeout for a free slot."""
+        deadline = time.monotonic() + self.checkout_timeout
+        waited = False
+        while True:
+            conn = None
+            with self._cond:
+                self._reset_after_fork()
+                self._evict_idle(time.monotonic())
+                if self._idle:
+                    conn, _ = self._idle.pop()
+                elif self._size < self.max_size:
+                    self._size += 1
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats['timeouts'] += 1
+                        raise PoolExhaustedError(
+                            f'No database connection available within {self.checkout_timeout}s'
+                        )
+                    if not waited:
+                        self._stats['waits'] += 1
+                        waited = True
+                    self._cond.wait(remaining)
+                    continue
+
+            if conn is None:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+            else:
+                # Health check on checkout; a dead connection just frees its slot.
+                try:
+                    conn.ping(reconnect=False)
+                except Exception:
+                    with self._cond:
+                        self._stats['ping_failures'] += 1
+                        self._discard(conn)
+                    continue
+
+            with self._cond:
+                self._stats['checkouts'] += 1
+            return conn
+
+    def release(self, conn):
+        """Returns a connection to the pool, discarding it if it is no longer usable."""
+        healthy = conn.open
+        if healthy:
+            try:
+                conn.rollback()
+            except Exception:
+                healthy = False
+        with self._cond:
+            if self._pid != os.getpid():
+                return
+            if healthy:
+                self._idle.append((conn, time.monotonic()))
+                self._cond.notify()
+            else:
+                self._discard(conn)
+            self._evict_idle(time.monotonic())
+
+    @contextlib.contextmanager
+    def connection(self):
+        """Context manager for work outside a request (CLI commands, background jobs)."""
+        conn = self.checkout()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close_all(self):
+        """Closes every idle connection. Checked-out connections are closed on release."""
+        with self._cond:
+            while self._idle:
+                conn, _ = self._idle.pop()
+                self._discard(conn)
+
+    def stats(self):
+        with self._cond:
+            idle = len(self._idle)
+            return {
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'size': self._size,
+                'idle': idle,
+                'in_use': self._size - idle,
+                **self._stats,
+            }
+
+
+db_pool = ConnectionPool(
+    DB_CONFIG,
+    min_size=DB_POOL_MIN_SIZE,
+    max_size=DB_POOL_MAX_SIZE,
+    idle_timeout=DB_POOL_IDLE_TIMEOUT,
+    checkout_timeout=DB_POOL_CHECKOUT_TIMEOUT,
+)
+
+
 def get_db():
-    """Opens a new database connection if there is none yet for the current application context."""
+    """Checks a connection out of the pool if there is none yet for the current application context."""
     if 'db' not in g:
-        g.db = pymysql.connect(**DB_CONFIG)
+        g.db = db_pool.checkout()
     return g.db
 
 @app.teardown_appcontext
 def close_db(exception):
-    """Closes the database again at the end of the request."""
+    """Returns the database connection to the pool at the end of the request."""
     db = g.pop('db', None)
     if db is not None:
-        db.close()
+        db_pool.release(db)
+
+DEADLOCK_ERROR_CODES = (1213,)  # ER_LOCK_DEADLOCK
+DEADLOCK_MAX_ATTEMPTS = 3
+
+
+def run_transaction(db, work, attempts=DEADLOCK_MAX_ATTEMPTS):
+    """Runs work(cursor) and commits, retrying the whole transaction if MySQL picks it as a deadlock victim.
+
+    work must be safe to repeat: everything it did in a failed attempt is rolled
+    back, including notifications queued for publishing.
+    """
+    for attempt in range(1, attempts + 1):
+        try:
+            result = work(db.cursor())
+            db.commit()
+            return result
+        except pymysql.err.OperationalError as e:
+            db.rollback()
+            if has_app_context():
+                g.pop('pending_notifications', None)
+                g.pop('deferred_fanout', None)
+            if e.args[0] not in DEADLOCK_ERROR_CODES or attempt == attempts:
+                raise
+            time.sleep(random.uniform(0.005, 0.02) * attempt)
+
+@app.errorhandler(PoolExhaustedError)
+def handle_pool_exhausted(error):
+    return jsonify({'error': 'The server is busy. Please try again shortly.'}), 503
 
 def create_database_if_not_exists():
     """Creates the database if it doesn't exist."""
@@ -75,197 +490,1771 @@ def create_database_if_not_exists():
     finally:
         conn.close()
 
+# --- Schema Migrations ---
+# Each migration is applied once, in order, and recorded in the schema_version table.
+# Steps are written to be idempotent so databases created before versioning was
+# introduced can be brought under it safely.
+
+def migration_create_base_tables(cursor):
+    # Create users table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            email VARCHAR(255) UNIQUE NOT NULL,
+            password VARCHAR(255) NOT NULL,
+            role VARCHAR(20) NOT NULL DEFAULT 'user',
+            full_name VARCHAR(255)
+        )
+    ''')
+    # Create ideas table (without last_edited_at initially for migration purposes)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS ideas (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            user_id INT NOT NULL,
+            employeeName VARCHAR(255),
+            company VARCHAR(255),
+            ideaTitle VARCHAR(500),
+            ideaCategory VARCHAR(255),
+            problemStatement TEXT,
+            proposedSolution TEXT,
+            expectedBenefits TEXT,
+            departmentsImpacted TEXT,
+            availabilityOfData VARCHAR(255),
+            dataSources TEXT,
+            estimatedCost VARCHAR(255),
+            implementationTimeline VARCHAR(255),
+            status VARCHAR(50),
+            submissionDate VARCHAR(50),
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    ''')
+    # Create notifications table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS notifications (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            user_id INT NOT NULL,
+            idea_id INT NOT NULL,
+            message TEXT NOT NULL,
+            is_read TINYINT NOT NULL DEFAULT 0,
+            created_at VARCHAR(50) NOT NULL,
+            FOREIGN KEY (user_id) REFERENCES users (id),
+            FOREIGN KEY (idea_id) REFERENCES ideas (id)
+        )
+    ''')
+    # Create comments table for history log
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS comments (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            idea_id INT NOT NULL,
+            user_id INT NOT NULL,
+            comment TEXT NOT NULL,
+            created_at VARCHAR(50) NOT NULL,
+            FOREIGN KEY (idea_id) REFERENCES ideas(id),
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        )
+    ''')
+    # Create idea_reactions table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS idea_reactions (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            idea_id INT NOT NULL,
+            user_id INT NOT NULL,
+            reaction_type VARCHAR(10) CHECK(reaction_type IN ('like', 'dislike')),
+            UNIQUE KEY unique_reaction (idea_id, user_id),
+            FOREIGN KEY (idea_id) REFERENCES ideas(id),
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        )
+    ''')
+
+
+def migration_add_last_edited_at(cursor):
+    cursor.execute("SHOW COLUMNS FROM ideas LIKE 'last_edited_at'")
+    if cursor.fetchone() is None:
+        cursor.execute('ALTER TABLE ideas ADD COLUMN last_edited_at VARCHAR(50)')
+
+
+def migration_add_full_name(cursor):
+    cursor.execute("SHOW COLUMNS FROM users LIKE 'full_name'")
+    if cursor.fetchone() is None:
+        cursor.execute('ALTER TABLE users ADD COLUMN full_name VARCHAR(255)')
+
+
+def migration_update_role_check(cursor):
+    # Replace any existing check constraints on users with one that includes 'hr'.
+    # MariaDB and MySQL before 8.0.16 do not support DROP CHECK (or ignore CHECK
+    # altogether), so the step is skipped there rather than blocking later migrations.
+    try:
+        cursor.execute("""
+            SELECT CONSTRAINT_NAME 
+            FROM INFORMATION_SCHEMA.TABLE_CONSTRAINTS 
+            WHERE TABLE_SCHEMA = %s 
+            AND TABLE_NAME = 'users' 
+            AND CONSTRAINT_TYPE = 'CHECK'
+        """, (DB_CONFIG['database'],))
+        for constraint in cursor.fetchall():
+            cursor.execute(f"ALTER TABLE users DROP CHECK {constraint['CONSTRAINT_NAME']}")
+        cursor.execute("""
+            ALTER TABLE users 
+            ADD CONSTRAINT users_role_check 
+            CHECK (role IN ('user', 'admin', 'ceo', 'hr', 'superadmin'))
+        """)
+    except pymysql.err.MySQLError as e:
+        print(f"Skipping role check constraint update, not supported by this server: {e}")
+
+
+def migration_add_reaction_totals(cursor):
+    # Per-idea reaction counters maintained by react_to_idea and update_user_role
+    for column in ('likes', 'dislikes', 'points'):
+        cursor.execute(f"SHOW COLUMNS FROM ideas LIKE '{column}'")
+        if cursor.fetchone() is None:
+            cursor.execute(f'ALTER TABLE ideas ADD COLUMN {column} INT NOT NULL DEFAULT 0')
+    create_index_if_missing(cursor, 'ideas', 'idx_ideas_points', 'points, submissionDate')
+    reconcile_reaction_totals(cursor)
+
+
+# Parses the ISO strings previously stored in VARCHAR timestamp columns. Values with a
+# trailing 'Z' came from the browser in UTC and are shifted to the server's time zone.
+ISO_STRING_TO_DATETIME_SQL = '''
+    CASE
+        WHEN {col} REGEXP '^[0-9]{{4}}-[0-9]{{2}}-[0-9]{{2}}[T ][0-9]{{2}}:[0-9]{{2}}:[0-9]{{2}}' THEN
+            IF({col} LIKE '%%Z',
+               CONVERT_TZ(STR_TO_DATE(LEFT(REPLACE({col}, 'T', ' '), 19), '%%Y-%%m-%%d %%H:%%i:%%s'), '+00:00', @@session.time_zone),
+               STR_TO_DATE(LEFT(REPLACE({col}, 'T', ' '), 19), '%%Y-%%m-%%d %%H:%%i:%%s'))
+        WHEN {col} REGEXP '^[0-9]{{4}}-[0-9]{{2}}-[0-9]{{2}}' THEN
+            STR_TO_DATE(LEFT({col}, 10), '%%Y-%%m-%%d')
+    END
+'''
+
+
+def convert_column_to_datetime(cursor, table, column, nullable):
+    """Rewrites an ISO-string VARCHAR column in place as a DATETIME column."""
+    cursor.execute('''
+        SELECT DATA_TYPE FROM INFORMATION_SCHEMA.COLUMNS
+        WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s AND COLUMN_NAME = %s
+    ''', (DB_CONFIG['database'], table, column))
+    if cursor.fetchone()['DATA_TYPE'] == 'datetime':
+        return
+    parsed = ISO_STRING_TO_DATETIME_SQL.format(col=column)
+    if not nullable:
+        parsed = f'COALESCE({parsed}, NOW())'
+    # Normalize every value to 'YYYY-MM-DD HH:MM:SS' so the type change cannot fail
+    cursor.execute(f"UPDATE {table} SET {column} = DATE_FORMAT({parsed}, '%%Y-%%m-%%d %%H:%%i:%%s')", ())
+    cursor.execute(f"ALTER TABLE {table} MODIFY {column} DATETIME {'NULL' if nullable else 'NOT NULL'}")
+
+
+def create_index_if_missing(cursor, table, name, columns):
+    cursor.execute(f"SHOW INDEX FROM {table} WHERE Key_name = %s", (name,))
+    if cursor.fetchone() is None:
+        cursor.execute(f'CREATE INDEX {name} ON {table} ({columns})')
+
+
+def migration_typed_timestamps_and_indexes(cursor):
+    convert_column_to_datetime(cursor, 'ideas', 'submissionDate', nullable=False)
+    convert_column_to_datetime(cursor, 'ideas', 'last_edited_at', nullable=True)
+    convert_column_to_datetime(cursor, 'notifications', 'created_at', nullable=False)
+    convert_column_to_datetime(cursor, 'comments', 'created_at', nullable=False)
+
+    create_index_if_missing(cursor, 'ideas', 'idx_ideas_status_date', 'status, submissionDate')
+    create_index_if_missing(cursor, 'ideas', 'idx_ideas_company_category', 'company, ideaCategory')
+    create_index_if_missing(cursor, 'ideas', 'idx_ideas_user_date', 'user_id, submissionDate')
+    create_index_if_missing(cursor, 'notifications', 'idx_notifications_user_created', 'user_id, created_at')
+    create_index_if_missing(cursor, 'comments', 'idx_comments_idea_created', 'idea_id, created_at')
+
+
+def migration_add_search_index(cursor):
+    cursor.execute("SHOW INDEX FROM ideas WHERE Key_name = 'ft_ideas_search'")
+    if cursor.fetchone() is None:
+        cursor.execute('''
+            ALTER TABLE ideas ADD FULLTEXT INDEX ft_ideas_search
+            (ideaTitle, employeeName, problemStatement, proposedSolution, expectedBenefits)
+        ''')
+
+
+def migration_add_notification_indexes(cursor):
+    create_index_if_missing(cursor, 'notifications', 'idx_notifications_user_id', 'user_id, id')
+    create_index_if_missing(cursor, 'notifications', 'idx_notifications_user_unread', 'user_id, is_read')
+    create_index_if_missing(cursor, 'notifications', 'idx_notifications_read_created', 'is_read, created_at')
+
+
+def migration_add_email_otps(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS email_otps (
+            email VARCHAR(255) PRIMARY KEY,
+            otp VARCHAR(10),
+            expires_at DATETIME NOT NULL,
+            window_start DATETIME NOT NULL,
+            send_count INT NOT NULL DEFAULT 0,
+            INDEX idx_email_otps_expires (expires_at)
+        )
+    ''')
+
+
+def migration_add_token_version(cursor):
+    cursor.execute("SHOW COLUMNS FROM users LIKE 'token_version'")
+    if cursor.fetchone() is None:
+        cursor.execute('ALTER TABLE users ADD COLUMN token_version INT NOT NULL DEFAULT 0')
+
+
+def migration_add_cache_versions(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS cache_versions (
+            table_name VARCHAR(64) NOT NULL,
+            shard SMALLINT NOT NULL DEFAULT 0,
+            version BIGINT NOT NULL DEFAULT 0,
+            PRIMARY KEY (table_name, shard)
+        )
+    ''')
+
+
+def migration_add_deletion_jobs(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS deletion_jobs (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            target_type VARCHAR(10) NOT NULL,
+            target_id INT NOT NULL,
+            requested_by INT,
+            status VARCHAR(10) NOT NULL,
+            step VARCHAR(30),
+            deleted_rows INT NOT NULL DEFAULT 0,
+            error TEXT,
+            created_at DATETIME NOT NULL,
+            updated_at DATETIME NOT NULL
+        )
+    ''')
+
+
+def migration_add_stream_tickets(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS stream_tickets (
+            ticket_hash CHAR(64) PRIMARY KEY,
+            user_id INT NOT NULL,
+            token_version INT NOT NULL,
+            expires_at DATETIME NOT NULL,
+            INDEX idx_stream_tickets_expires (expires_at)
+        )
+    ''')
+
+
+def migration_add_notification_batch_token(cursor):
+    cursor.execute("SHOW COLUMNS FROM notifications LIKE 'batch_token'")
+    if cursor.fetchone() is None:
+        cursor.execute('ALTER TABLE notifications ADD COLUMN batch_token CHAR(16) NULL')
+
+
+# (version, description, function) — append new steps, never reorder or renumber.
+MIGRATIONS = [
+    (1, 'Create base tables', migration_create_base_tables),
+    (2, "Add 'last_edited_at' column to 'ideas'", migration_add_last_edited_at),
+    (3, "Add 'full_name' column to 'users'", migration_add_full_name),
+    (4, "Allow the 'hr' role in the users role check", migration_update_role_check),
+    (5, 'Add maintained reaction totals to ideas', migration_add_reaction_totals),
+    (6, 'Store timestamps as DATETIME and add secondary indexes', migration_typed_timestamps_and_indexes),
+    (7, 'Add FULLTEXT search index on ideas', migration_add_search_index),
+    (8, 'Add notification delta, unread and retention indexes', migration_add_notification_indexes),
+    (9, 'Add shared OTP store table', migration_add_email_otps),
+    (10, "Add 'token_version' column to 'users' for token revocation", migration_add_token_version),
+    (11, 'Add per-table version counters for response caching', migration_add_cache_versions),
+    (12, 'Add deletion job progress table', migration_add_deletion_jobs),
+    (13, 'Add single-use notification stream tickets', migration_add_stream_tickets),
+    (14, "Add 'batch_token' column to 'notifications' for multi-row inserts", migration_add_notification_batch_token),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+# Set once this process has seen the database at SCHEMA_VERSION.
+_schema_current = False
+_schema_lock = threading.Lock()
+
+
+def get_schema_version(cursor):
+    """Returns the latest applied migration version, or 0 for an unversioned database."""
+    try:
+        cursor.execute('SELECT MAX(version) AS version FROM schema_version')
+    except pymysql.ProgrammingError:
+        return 0
+    row = cursor.fetchone()
+    return row['version'] or 0
+
+
+def run_migrations(db):
+    """Applies pending migrations in order. Returns the list of versions applied."""
+    cursor = db.cursor()
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INT PRIMARY KEY,
+            description VARCHAR(255) NOT NULL,
+            applied_at DATETIME NOT NULL
+        )
+    ''')
+    # Serialize migrations across worker processes.
+    lock_name = f"{DB_CONFIG['database']}.schema_migrations"
+    cursor.execute('SELECT GET_LOCK(%s, 60) AS acquired', (lock_name,))
+    if not cursor.fetchone()['acquired']:
+        raise RuntimeError('Timed out waiting for the schema migration lock')
+
+    applied = []
+    try:
+        current = get_schema_version(cursor)
+        for version, description, migrate in MIGRATIONS:
+            if version <= current:
+                continue
+            print(f"Applying migration {version}: {description}")
+            migrate(cursor)
+            cursor.execute(
+                'INSERT INTO schema_version (version, description, applied_at) VALUES (%s, %s, %s)',
+                (version, description, datetime.datetime.now())
+            )
+            db.commit()
+            applied.append(version)
+    finally:
+        cursor.execute('SELECT RELEASE_LOCK(%s)', (lock_name,))
+    return applied
+
+
+def seed_default_users(db):
+    """Creates the default admin and CEO accounts if they are missing."""
+    cursor = db.cursor()
+
+    # Check if the default admin exists, if not, create it
+    admin_email = os.getenv('ADMIN_EMAIL', 'admin@adventz.com')
+    admin_password = os.getenv('ADMIN_PASSWORD', '12345')
+
+    cursor.execute("SELECT * FROM users WHERE email = %s", (admin_email,))
+    if cursor.fetchone() is None:
+        hashed_password = password_hasher.hash(admin_password)
+        cursor.execute(
+            "INSERT INTO users (email, password, role) VALUES (%s, %s, %s)",
+            (admin_email, hashed_password, 'admin')
+        )
+    
+    # Check if the default CEO exists, if not, create it
+    ceo_email = os.getenv('CEO_EMAIL', 'ceo@adventz.com')
+    ceo_password = os.getenv('CEO_PASSWORD', '12345')
+
+    cursor.execute("SELECT * FROM users WHERE email = %s", (ceo_email,))
+    if cursor.fetchone() is None:
+        hashed_password_ceo = password_hasher.hash(ceo_password)
+        cursor.execute(
+            "INSERT INTO users (email, password, role, full_name) VALUES (%s, %s, %s, %s)",
+            (ceo_email, hashed_password_ceo, 'ceo', 'Chief Executive Officer')
+        )
+
+    db.commit()
+
+
 def init_db():
-    """Initializes and migrates the database to the latest schema."""
+    """Initializes and migrates the database to the latest schema. Run once at startup."""
+    global _schema_current
     create_database_if_not_exists()
-    
+
     with app.app_context():
         db = get_db()
+        applied = run_migrations(db)
+        seed_default_users(db)
+    _schema_current = True
+    return applied
+
+
+def ensure_schema_current():
+    """Cheap per-request guard: after the first successful check this is an in-memory flag test."""
+    global _schema_current
+    if _schema_current:
+        return
+    with _schema_lock:
+        if _schema_current:
+            return
+        try:
+            with app.app_context():
+                version = get_schema_version(get_db().cursor())
+        except pymysql.OperationalError:
+            version = 0  # The database itself does not exist yet
+        if version < SCHEMA_VERSION:
+            init_db()
+        _schema_current = True
+
+
+@app.before_request
+def check_schema():
+    ensure_schema_current()
+
+
+@app.cli.command('init-db')
+def init_db_command():
+    """Creates the database and applies any pending schema migrations."""
+    applied = init_db()
+    if applied:
+        print(f"Applied migrations: {', '.join(str(v) for v in applied)}")
+    print(f"Schema is at version {SCHEMA_VERSION}.")
+
+
+# Hot queries and the index each one must be able to use: (label, query, params, index).
+INDEX_CHECKS = [
+    ('notifications for a user, newest first',
+     'SELECT * FROM notifications WHERE user_id = %s ORDER BY created_at DESC, id DESC',
+     (1,), 'idx_notifications_user_created'),
+    ('comments on an idea, oldest first',
+     'SELECT * FROM comments WHERE idea_id = %s ORDER BY created_at ASC, id ASC',
+     (1,), 'idx_comments_idea_created'),
+    ('ideas by status within a date range',
+     'SELECT id FROM ideas i WHERE i.status = %s AND i.submissionDate >= %s AND i.submissionDate < %s',
+     ('Submitted', datetime.datetime(2024, 1, 1), datetime.datetime(2024, 2, 1)), 'idx_ideas_status_date'),
+    ('ideas by company and category',
+     'SELECT id FROM ideas i WHERE i.company = %s AND i.ideaCategory = %s',
+     ('Simon India Ltd', 'Optimization'), 'idx_ideas_company_category'),
+    ('ideas of one user, newest first',
+     'SELECT * FROM ideas WHERE user_id = %s ORDER BY submissionDate DESC, id DESC',
+     (1,), 'idx_ideas_user_date'),
+    ('idea list ordered by points',
+     'SELECT id FROM ideas i ORDER BY i.points DESC, i.submissionDate DESC, i.id DESC LIMIT 20',
+     (), 'idx_ideas_points'),
+]
+
+
+@app.cli.command('check-indexes')
+def check_indexes_command():
+    """Runs EXPLAIN on the hot queries and fails if any of them cannot use its index."""
+    failures = []
+    with db_pool.connection() as db:
         cursor = db.cursor()
-        
-        # --- Schema Definition ---
-        # Create users table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                email VARCHAR(255) UNIQUE NOT NULL,
-                password VARCHAR(255) NOT NULL,
-                role VARCHAR(20) NOT NULL DEFAULT 'user',
-                full_name VARCHAR(255)
-            )
-        ''')
-        # Create ideas table (without last_edited_at initially for migration purposes)
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS ideas (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                user_id INT NOT NULL,
-                employeeName VARCHAR(255),
-                company VARCHAR(255),
-                ideaTitle VARCHAR(500),
-                ideaCategory VARCHAR(255),
-                problemStatement TEXT,
-                proposedSolution TEXT,
-                expectedBenefits TEXT,
-                departmentsImpacted TEXT,
-                availabilityOfData VARCHAR(255),
-                dataSources TEXT,
-                estimatedCost VARCHAR(255),
-                implementationTimeline VARCHAR(255),
-                status VARCHAR(50),
-                submissionDate VARCHAR(50),
-                FOREIGN KEY (user_id) REFERENCES users (id)
-            )
-        ''')
-        # Create notifications table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS notifications (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                user_id INT NOT NULL,
-                idea_id INT NOT NULL,
-                message TEXT NOT NULL,
-                is_read TINYINT NOT NULL DEFAULT 0,
-                created_at VARCHAR(50) NOT NULL,
-                FOREIGN KEY (user_id) REFERENCES users (id),
-                FOREIGN KEY (idea_id) REFERENCES ideas (id)
+        for label, query, params, index in INDEX_CHECKS:
+            cursor.execute('EXPLAIN ' + query, params)
+            plan = cursor.fetchone()
+            # On small tables the optimizer may still prefer a scan, so the index only
+            # has to be a candidate; a non-sargable predicate would not list it at all.
+            candidates = (plan.get('possible_keys') or '').split(',')
+            usable = plan.get('key') == index or index in candidates
+            print(f"{'ok  ' if usable else 'FAIL'} {label}: key={plan.get('key')} possible_keys={plan.get('possible_keys')}")
+            if not usable:
+                failures.append(label)
+    if failures:
+        raise click.ClickException(f"{len(failures)} queries cannot use their index")
+
+
+# --- Reaction Totals ---
+# ideas.likes, ideas.dislikes and ideas.points are kept in sync with idea_reactions
+# inside the same transaction as every reaction or role change.
+CEO_LIKE_WEIGHT = 10
+
+
+def reaction_points(role, reaction_type):
+    """Returns the points a single reaction by a user with the given role is worth."""
+    if reaction_type == 'like':
+        return CEO_LIKE_WEIGHT if role == 'ceo' else 1
+    if reaction_type == 'dislike':
+        return -1
+    return 0
+
+
+# A click is a toggle: the same reaction again clears it (the row is deleted), a
+# different one replaces it. The current row is read and locked first, so the
+# counter deltas are known before anything is written.
+REACTION_SELECT_SQL = '''
+    SELECT reaction_type FROM idea_reactions
+    WHERE idea_id = %(idea_id)s AND user_id = %(user_id)s
+    FOR UPDATE
+'''
+REACTION_UPSERT_SQL = '''
+    INSERT INTO idea_reactions (idea_id, user_id, reaction_type)
+    VALUES (%(idea_id)s, %(user_id)s, %(reaction)s)
+    ON DUPLICATE KEY UPDATE reaction_type = %(reaction)s
+'''
+REACTION_DELETE_SQL = 'DELETE FROM idea_reactions WHERE idea_id = %(idea_id)s AND user_id = %(user_id)s'
+REACTION_COUNTERS_SQL = f'''
+    UPDATE ideas SET
+        likes = likes + %(like_delta)s,
+        dislikes = dislikes + %(dislike_delta)s,
+        points = points
+            + IF((SELECT role FROM users WHERE id = %(user_id)s) = 'ceo', {CEO_LIKE_WEIGHT}, 1) * %(like_delta)s
+            - %(dislike_delta)s
+    WHERE id = %(idea_id)s
+'''
+REACTION_RESULT_SQL = 'SELECT likes, dislikes, points, status, user_id, ideaTitle FROM ideas WHERE id = %(idea_id)s'
+
+# Takes a batch of one user's reactions (ids in {ids}) back out of their ideas' counters
+REACTION_REMOVAL_SQL = f'''
+    UPDATE ideas i
+    JOIN (
+        SELECT idea_id,
+            SUM(reaction_type <=> 'like') AS likes,
+            SUM(reaction_type <=> 'dislike') AS dislikes
+        FROM idea_reactions WHERE id IN ({{ids}})
+        GROUP BY idea_id
+    ) r ON r.idea_id = i.id
+    SET i.likes = i.likes - r.likes,
+        i.dislikes = i.dislikes - r.dislikes,
+        i.points = i.points
+            - IF((SELECT role FROM users WHERE id = %s) = 'ceo', {CEO_LIKE_WEIGHT}, 1) * r.likes
+            + r.dislikes
+'''
+
+
+def plan_reaction(params, previous_reaction):
+    """Works out a toggle from the locked previous reaction (None if there was none).
+
+    Adds the counter deltas to params and returns (new_reaction, statement that
+    stores it): the upsert, or the delete when the reaction is being cleared.
+    """
+    new_reaction = None if previous_reaction == params['reaction'] else params['reaction']
+    params['like_delta'] = (new_reaction == 'like') - (previous_reaction == 'like')
+    params['dislike_delta'] = (new_reaction == 'dislike') - (previous_reaction == 'dislike')
+    return new_reaction, REACTION_DELETE_SQL if new_reaction is None else REACTION_UPSERT_SQL
+
+
+def apply_reaction(cursor, idea_id, user_id, reaction_type):
+    """Toggles a user's reaction and adjusts the idea's counters in four statements.
+
+    Returns (previous_reaction, new_reaction, idea), where idea holds the updated
+    likes/dislikes/points plus status, user_id and ideaTitle. Raises
+    pymysql.err.IntegrityError if the idea does not exist.
+    """
+    params = {'idea_id': idea_id, 'user_id': user_id, 'reaction': reaction_type}
+    cursor.execute(REACTION_SELECT_SQL, params)
+    row = cursor.fetchone()
+    previous_reaction = row['reaction_type'] if row else None
+    new_reaction, statement = plan_reaction(params, previous_reaction)
+    cursor.execute(statement, params)
+    cursor.execute(REACTION_COUNTERS_SQL, params)
+    cursor.execute(REACTION_RESULT_SQL, params)
+    return previous_reaction, new_reaction, cursor.fetchone()
+
+
+def reconcile_reaction_totals(cursor, idea_ids=None):
+    """Recomputes the reaction counters from idea_reactions. Returns the number of ideas updated."""
+    query = f'''
+        UPDATE ideas i
+        LEFT JOIN (
+            SELECT ir.idea_id,
+                SUM(ir.reaction_type = 'like') AS likes,
+                SUM(ir.reaction_type = 'dislike') AS dislikes,
+                SUM(CASE
+                    WHEN u.role = 'ceo' AND ir.reaction_type = 'like' THEN {CEO_LIKE_WEIGHT}
+                    WHEN ir.reaction_type = 'like' THEN 1
+                    WHEN ir.reaction_type = 'dislike' THEN -1
+                    ELSE 0
+                END) AS points
+            FROM idea_reactions ir
+            JOIN users u ON ir.user_id = u.id
+            GROUP BY ir.idea_id
+        ) totals ON totals.idea_id = i.id
+        SET i.likes = COALESCE(totals.likes, 0),
+            i.dislikes = COALESCE(totals.dislikes, 0),
+            i.points = COALESCE(totals.points, 0)
+    '''
+    params = []
+    if idea_ids:
+        query += ' WHERE i.id IN (' + ','.join('%s' for _ in idea_ids) + ')'
+        params.extend(idea_ids)
+    cursor.execute(query, params)
+    return cursor.rowcount
+
+
+@app.cli.command('reconcile-reactions')
+@click.option('--idea-id', 'idea_ids', type=int, multiple=True, help='Only reconcile these ideas.')
+def reconcile_reactions_command(idea_ids):
+    """Rebuilds the per-idea likes/dislikes/points counters from idea_reactions."""
+    with db_pool.connection() as db:
+        cursor = db.cursor()
+        updated = reconcile_reaction_totals(cursor, list(idea_ids))
+        bump_cache_versions(cursor, 'ideas')
+        db.commit()
+    print(f"Reconciled reaction totals ({updated} ideas changed).")
+
+
+@app.cli.command('reaction-load-test')
+@click.option('--idea-id', type=int, required=True, help='Idea to react to.')
+@click.option('--users', type=int, default=10, show_default=True, help='Number of existing accounts clicking concurrently.')
+@click.option('--clicks', type=int, default=50, show_default=True, help='Reactions sent by each account.')
+def reaction_load_test_command(idea_id, users, clicks):
+    """Hammers one idea with concurrent like/dislike toggles and checks the counters afterwards.
+
+    This writes real reactions (and may change the idea's status if a CEO account
+    is picked), so run it against a test database.
+    """
+    with db_pool.connection() as db:
+        cursor = db.cursor()
+        cursor.execute('SELECT id, email, role, full_name, token_version FROM users ORDER BY id LIMIT %s', (users,))
+        tokens = [issue_token(user) for user in cursor.fetchall()]
+    if not tokens:
+        raise click.ClickException('No users to react with')
+
+    failures = []
+
+    def click_repeatedly(token):
+        client = app.test_client()
+        for _ in range(clicks):
+            response = client.post(
+                f'/api/ideas/{idea_id}/react',
+                json={'reactionType': random.choice(['like', 'dislike'])},
+                headers={'Authorization': f'Bearer {token}'},
             )
-        ''')
-        # Create comments table for history log
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS comments (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                idea_id INT NOT NULL,
-                user_id INT NOT NULL,
-                comment TEXT NOT NULL,
-                created_at VARCHAR(50) NOT NULL,
-                FOREIGN KEY (idea_id) REFERENCES ideas(id),
-                FOREIGN KEY (user_id) REFERENCES users(id)
+            if response.status_code != 200:
+                failures.append(response.status_code)
+
+    threads = [threading.Thread(target=click_repeatedly, args=(token,)) for token in tokens]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+    total = len(tokens) * clicks
+    print(f"{total} reactions from {len(tokens)} users in {elapsed:.2f}s ({total / elapsed:.0f}/s), {len(failures)} failed")
+
+    with db_pool.connection() as db:
+        cursor = db.cursor()
+        cursor.execute('SELECT likes, dislikes, points FROM ideas WHERE id = %s', (idea_id,))
+        stored = cursor.fetchone()
+        cursor.execute(f'''
+            SELECT COALESCE(SUM(ir.reaction_type = 'like'), 0) AS likes,
+                COALESCE(SUM(ir.reaction_type = 'dislike'), 0) AS dislikes,
+                COALESCE(SUM(CASE
+                    WHEN u.role = 'ceo' AND ir.reaction_type = 'like' THEN {CEO_LIKE_WEIGHT}
+                    WHEN ir.reaction_type = 'like' THEN 1
+                    WHEN ir.reaction_type = 'dislike' THEN -1
+                    ELSE 0
+                END), 0) AS points
+            FROM idea_reactions ir
+            JOIN users u ON ir.user_id = u.id
+            WHERE ir.idea_id = %s
+        ''', (idea_id,))
+        expected = cursor.fetchone()
+    if stored is None:
+        raise click.ClickException(f'Idea {idea_id} not found')
+    mismatched = [key for key in ('likes', 'dislikes', 'points') if int(stored[key]) != int(expected[key])]
+    for key in ('likes', 'dislikes', 'points'):
+        print(f"{'ok  ' if key not in mismatched else 'FAIL'} {key}: stored={stored[key]} recomputed={expected[key]}")
+    if mismatched or failures:
+        raise click.ClickException('Reaction counters drifted or requests failed')
+
+
+# --- Notification Events ---
+class NotificationBroker:
+    """In-process pub/sub that fans new notifications out to open event streams.
+
+    Each stream subscribes with its own queue. Delivery is best effort and local to
+    this process; streams resync from the notifications table on reconnect
+    (Last-Event-ID) and every SSE_RESYNC_SECONDS, so nothing is lost when the
+    writer runs in another worker.
+    """
+
+    def __init__(self, max_queue_size=100):
+        self._lock = threading.Lock()
+        self._subscribers = {}  # user_id -> set of queues
+        self.max_queue_size = max_queue_size
+
+    def subscribe(self, user_id, subscription=None):
+        """Registers a queue for the user's events; any object with put_nowait() will do."""
+        if subscription is None:
+            subscription = queue.Queue(maxsize=self.max_queue_size)
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, user_id, subscription):
+        with self._lock:
+            subscriptions = self._subscribers.get(user_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscribers[user_id]
+
+    def publish(self, user_id, event):
+        with self._lock:
+            subscriptions = list(self._subscribers.get(user_id, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.put_nowait(event)
+            except queue.Full:
+                pass  # A stalled stream catches up from the database on its next resync
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(s) for s in self._subscribers.values())
+
+
+notification_broker = NotificationBroker()
+
+
+NOTIFICATION_INSERT_SQL = 'INSERT INTO notifications (user_id, idea_id, message, created_at) VALUES (%s, %s, %s, %s)'
+NOTIFICATION_INSERT_CHUNK = 500  # rows per multi-row INSERT
+
+
+def insert_notifications(cursor, rows, created_at=None):
+    """Inserts (user_id, idea_id, message) rows and returns them as events.
+
+    A single row uses its exact lastrowid. Larger batches go out as chunked
+    multi-row INSERTs tagged with a random batch_token. A multi-row INSERT does not
+    promise consecutive ids (innodb_autoinc_lock_mode=2, auto_increment_increment
+    > 1), so the ids are read back with one query over the token. That query scans
+    the primary key from the batch's first id, which LAST_INSERT_ID() reports.
+    Large fan-outs can go through the background worker (NOTIFY_FANOUT_ASYNC).
+    """
+    created_at = created_at or datetime.datetime.now()
+    rows = list(rows)
+    if len(rows) <= 1:
+        events = []
+        for row in rows:
+            cursor.execute(NOTIFICATION_INSERT_SQL, (*row, created_at))
+            events.append(notification_event(cursor.lastrowid, row, created_at))
+        return events
+
+    batch_token = secrets.token_hex(8)
+    first_id = None
+    for start in range(0, len(rows), NOTIFICATION_INSERT_CHUNK):
+        chunk = rows[start:start + NOTIFICATION_INSERT_CHUNK]
+        cursor.execute(
+            'INSERT INTO notifications (user_id, idea_id, message, created_at, batch_token) VALUES '
+            + ', '.join('(%s, %s, %s, %s, %s)' for _ in chunk),
+            [value for row in chunk for value in (*row, created_at, batch_token)]
+        )
+        if first_id is None:
+            first_id = cursor.lastrowid
+    cursor.execute(
+        'SELECT id, user_id, idea_id, message FROM notifications WHERE id >= %s AND batch_token = %s ORDER BY id',
+        (first_id, batch_token)
+    )
+    return [
+        notification_event(row['id'], (row['user_id'], row['idea_id'], row['message']), created_at)
+        for row in cursor.fetchall()
+    ]
+
+
+def notification_event(notification_id, row, created_at):
+    """Builds the event dict for a (user_id, idea_id, message) row inserted with NOTIFICATION_INSERT_SQL."""
+    user_id, idea_id, message = row
+    return {
+        'id': notification_id,
+        'user_id': user_id,
+        'idea_id': idea_id,
+        'message': message,
+        'is_read': 0,
+        'created_at': created_at,
+    }
+
+
+def create_notifications(cursor, rows, created_at=None):
+    """Inserts notifications in the current transaction and queues them for publishing once it commits."""
+    events = insert_notifications(cursor, rows, created_at)
+    g.setdefault('pending_notifications', []).extend(events)
+    return events
+
+
+def create_notification(cursor, user_id, idea_id, message, created_at=None):
+    """Inserts a notification and queues it for publishing once the transaction commits."""
+    return create_notifications(cursor, [(user_id, idea_id, message)], created_at)[0]['id']
+
+
+def fan_out_notifications(cursor, rows, created_at=None):
+    """Notifies many users at once, e.g. every admin.
+
+    The rows are written in the current transaction, or, with
+    NOTIFY_FANOUT_ASYNC, handed to the background fan-out worker after commit.
+    """
+    if NOTIFY_FANOUT_ASYNC:
+        g.setdefault('deferred_fanout', []).append((rows, created_at or datetime.datetime.now()))
+    else:
+        create_notifications(cursor, rows, created_at)
+
+
+def publish_pending_notifications():
+    """Publishes the notifications created in this request. Call after db.commit()."""
+    for notification in g.pop('pending_notifications', []):
+        notification_broker.publish(notification['user_id'], notification)
+    for rows, created_at in g.pop('deferred_fanout', []):
+        notification_fanout_worker.submit(rows, created_at)
+
+
+class NotificationFanOutWorker:
+    """Background thread that writes deferred notification fan-outs (NOTIFY_FANOUT_ASYNC)."""
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker_pid = None
+
+    def submit(self, rows, created_at):
+        if self._worker_pid != os.getpid():
+            with self._lock:
+                if self._worker_pid != os.getpid():
+                    self._worker_pid = os.getpid()
+                    threading.Thread(target=self._run, name='notification-fanout', daemon=True).start()
+        self._queue.put((rows, created_at))
+
+    def _run(self):
+        while True:
+            rows, created_at = self._queue.get()
+            try:
+                with db_pool.connection() as db:
+                    events = insert_notifications(db.cursor(), rows, created_at)
+                    db.commit()
+                for event in events:
+                    notification_broker.publish(event['user_id'], event)
+            except Exception as e:
+                print(f"Notification fan-out of {len(rows)} rows failed: {e}")
+
+    def queue_depth(self):
+        return self._queue.qsize()
+
+
+notification_fanout_worker = NotificationFanOutWorker()
+
+
+class AdminIdCache:
+    """Caches the ids of admin users for notification fan-out.
+
+    Invalidated locally by role changes and deletions; the TTL bounds how long
+    another worker process can serve a stale set.
+    """
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._ids = None
+        self._loaded_at = 0.0
+
+    def get(self, cursor):
+        with self._lock:
+            if self._ids is not None and time.monotonic() - self._loaded_at < self.ttl:
+                return self._ids
+        cursor.execute("SELECT id FROM users WHERE role = 'admin'")
+        ids = frozenset(row['id'] for row in cursor.fetchall())
+        with self._lock:
+            self._ids = ids
+            self._loaded_at = time.monotonic()
+        return ids
+
+    def invalidate(self):
+        with self._lock:
+            self._ids = None
+
+
+admin_id_cache = AdminIdCache(ADMIN_ID_CACHE_TTL)
+
+
+def format_sse(notification):
+    return f"id: {notification['id']}\nevent: notification\ndata: {app.json.dumps(notification)}\n\n"
+
+
+# --- Outbound Mail ---
+class SMTPTransport:
+    """Sends mail over a single SMTP connection that is reused between messages.
+
+    The connection is opened (STARTTLS + login) on first use, reopened when the
+    server drops it, and closed by the mail queue after it has been idle. Point
+    SMTP_SERVER/SMTP_PORT at a local stand-in such as aiosmtpd with
+    SMTP_USE_TLS=false and SMTP_USE_AUTH=false for testing.
+    """
+
+    def __init__(self, host, port, username, password, use_tls=True, use_auth=True, timeout=30):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.use_auth = use_auth
+        self.timeout = timeout
+        self._server = None
+
+    def is_configured(self):
+        return bool(self.host and self.username and (self.password or not self.use_auth))
+
+    def _connect(self):
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                server.starttls()
+            if self.use_auth:
+                server.login(self.username, self.password)
+        except Exception:
+            server.close()
+            raise
+        self._server = server
+
+    def send(self, message):
+        if self._server is None:
+            self._connect()
+        try:
+            self._server.sendmail(message['From'], message['To'], message.as_string())
+        except (smtplib.SMTPServerDisconnected, OSError):
+            # The server dropped the idle connection; reconnect once and retry.
+            self.close()
+            self._connect()
+            self._server.sendmail(message['From'], message['To'], message.as_string())
+
+    def close(self):
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except Exception:
+                self._server.close()
+            self._server = None
+
+
+class ConsoleTransport:
+    """Prints messages instead of sending them, for local development."""
+
+    def is_configured(self):
+        return True
+
+    def send(self, message):
+        print(f"[mail] To: {message['To']} | Subject: {message['Subject']}")
+
+    def close(self):
+        pass
+
+
+def is_permanent_mail_failure(error):
+    """True for SMTP errors that retrying will not fix: refused recipients and 5xx replies."""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPResponseException):
+        return error.smtp_code >= 500
+    return False
+
+
+class MailQueue:
+    """Bounded outbound mail queue drained by one background sender thread.
+
+    Transient failures are retried with exponential backoff up to max_retries times.
+    A message waiting to be retried is set aside until it is due, so it does not hold
+    up the messages behind it. Permanent failures (see is_permanent_mail_failure) are
+    not retried.
+    """
+
+    def __init__(self, transport, max_size=1000, max_retries=5, backoff=2.0, idle_timeout=60):
+        self.transport = transport
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.idle_timeout = idle_timeout
+        self._queue = queue.Queue(maxsize=max_size)
+        self._retries = []  # heap of (not_before, seq, message, enqueued_at, attempt), sender thread only
+        self._retry_seq = 0
+        self._last_send = time.monotonic()
+        self._lock = threading.Lock()
+        self._worker_pid = None
+        self._stats = {
+            'enqueued': 0,
+            'sent': 0,
+            'failed': 0,
+            'retries': 0,
+            'rejected': 0,
+            'total_latency': 0.0,
+            'max_latency': 0.0,
+        }
+        self._last_error = None
+
+    def _ensure_worker(self):
+        if self._worker_pid == os.getpid():
+            return
+        with self._lock:
+            if self._worker_pid != os.getpid():
+                self._worker_pid = os.getpid()
+                threading.Thread(target=self._run, name='mail-sender', daemon=True).start()
+
+    def enqueue(self, message):
+        """Queues a message for delivery. Returns False if mail is not configured or the queue is full."""
+        if not self.transport.is_configured():
+            print("SMTP credentials not configured.")
+            return False
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait((message, time.monotonic()))
+        except queue.Full:
+            with self._lock:
+                self._stats['rejected'] += 1
+            return False
+        with self._lock:
+            self._stats['enqueued'] += 1
+        return True
+
+    def _run(self):
+        while True:
+            timeout = self.idle_timeout
+            if self._retries:
+                timeout = max(0.0, min(timeout, self._retries[0][0] - time.monotonic()))
+            try:
+                message, enqueued_at = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                pass
+            else:
+                self._deliver(message, enqueued_at, 0)
+            now = time.monotonic()
+            while self._retries and self._retries[0][0] <= now:
+                _, _, message, enqueued_at, attempt = heapq.heappop(self._retries)
+                self._deliver(message, enqueued_at, attempt)
+            if time.monotonic() - self._last_send >= self.idle_timeout:
+                self.transport.close()  # Don't hold an idle connection open
+
+    def _deliver(self, message, enqueued_at, attempt):
+        self._last_send = time.monotonic()
+        try:
+            self.transport.send(message)
+        except Exception as e:
+            self.transport.close()
+            permanent = is_permanent_mail_failure(e)
+            retry = not permanent and attempt < self.max_retries
+            with self._lock:
+                self._last_error = str(e)
+                self._stats['retries' if retry else 'failed'] += 1
+            if retry:
+                not_before = time.monotonic() + min(self.backoff * (2 ** attempt), 60)
+                self._retry_seq += 1
+                heapq.heappush(self._retries, (not_before, self._retry_seq, message, enqueued_at, attempt + 1))
+            elif permanent:
+                print(f"Failed to send email to {message['To']}, not retrying: {e}")
+            else:
+                print(f"Failed to send email to {message['To']} after {attempt + 1} attempts: {e}")
+            return
+        latency = time.monotonic() - enqueued_at
+        with self._lock:
+            self._stats['sent'] += 1
+            self._stats['total_latency'] += latency
+            self._stats['max_latency'] = max(self._stats['max_latency'], latency)
+
+    def stats(self):
+        with self._lock:
+            sent = self._stats['sent']
+            return {
+                'queue_depth': self._queue.qsize(),
+                'retry_pending': len(self._retries),
+                'enqueued': self._stats['enqueued'],
+                'sent': sent,
+                'failed': self._stats['failed'],
+                'retries': self._stats['retries'],
+                'rejected': self._stats['rejected'],
+                'avg_latency_ms': round(self._stats['total_latency'] / sent * 1000, 1) if sent else 0.0,
+                'max_latency_ms': round(self._stats['max_latency'] * 1000, 1),
+                'last_error': self._last_error,
+            }
+
+
+MAIL_TRANSPORTS = {
+    'smtp': lambda: SMTPTransport(
+        SMTP_SERVER, SMTP_PORT, SMTP_EMAIL, SMTP_PASSWORD, use_tls=SMTP_USE_TLS, use_auth=SMTP_USE_AUTH
+    ),
+    'console': ConsoleTransport,
+}
+mail_queue = MailQueue(
+    MAIL_TRANSPORTS[MAIL_TRANSPORT](),
+    max_size=MAIL_QUEUE_SIZE,
+    max_retries=MAIL_MAX_RETRIES,
+    backoff=MAIL_RETRY_BACKOFF,
+)
+
+
+# --- OTP Store ---
+class MemoryOTPStore:
+    """Process-local OTP store with TTL eviction and a bound on the number of emails tracked.
+
+    Only suitable for a single worker process; use MySQLOTPStore when running several.
+    """
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._otps = OrderedDict()  # email -> {'otp', 'expires_at'}, oldest first
+        self._sends = OrderedDict()  # email -> deque of send times, oldest first
+
+    def _evict(self, now):
+        # Entries share one TTL, so insertion order is expiry order
+        while self._otps and next(iter(self._otps.values()))['expires_at'] < now:
+            self._otps.popitem(last=False)
+        while len(self._otps) > self.max_entries:
+            self._otps.popitem(last=False)
+        window_start = now - datetime.timedelta(seconds=OTP_RATE_LIMIT_WINDOW)
+        while self._sends and next(iter(self._sends.values()))[-1] < window_start:
+            self._sends.popitem(last=False)
+        while len(self._sends) > self.max_entries:
+            self._sends.popitem(last=False)
+
+    def allow_send(self, email):
+        """Records a send attempt and returns False if the email is over its rate limit."""
+        now = datetime.datetime.now()
+        window_start = now - datetime.timedelta(seconds=OTP_RATE_LIMIT_WINDOW)
+        with self._lock:
+            self._evict(now)
+            sends = self._sends.pop(email, None) or deque()
+            while sends and sends[0] < window_start:
+                sends.popleft()
+            allowed = len(sends) < OTP_RATE_LIMIT_COUNT
+            if allowed:
+                sends.append(now)
+            self._sends[email] = sends
+            return allowed
+
+    def put(self, email, otp, expires_at):
+        with self._lock:
+            self._otps.pop(email, None)
+            self._otps[email] = {'otp': otp, 'expires_at': expires_at}
+            self._evict(datetime.datetime.now())
+
+    def get(self, email):
+        with self._lock:
+            return self._otps.get(email)
+
+    def delete(self, email):
+        with self._lock:
+            self._otps.pop(email, None)
+
+
+class MySQLOTPStore:
+    """OTP store in the email_otps table, shared by every worker process."""
+
+    def allow_send(self, email):
+        """Records a send attempt and returns False if the email is over its rate limit."""
+        now = datetime.datetime.now()
+        window_start = now - datetime.timedelta(seconds=OTP_RATE_LIMIT_WINDOW)
+        with db_pool.connection() as db:
+            cursor = db.cursor()
+            # send_count is assigned before window_start, so both see the old window
+            cursor.execute('''
+                INSERT INTO email_otps (email, expires_at, window_start, send_count) VALUES (%s, %s, %s, 1)
+                ON DUPLICATE KEY UPDATE
+                    send_count = IF(window_start < %s, 1, send_count + 1),
+                    window_start = IF(window_start < %s, %s, window_start)
+            ''', (email, now, now, window_start, window_start, now))
+            cursor.execute('SELECT send_count FROM email_otps WHERE email = %s', (email,))
+            send_count = cursor.fetchone()['send_count']
+            db.commit()
+        return send_count <= OTP_RATE_LIMIT_COUNT
+
+    def put(self, email, otp, expires_at):
+        with db_pool.connection() as db:
+            cursor = db.cursor()
+            cursor.execute('''
+                INSERT INTO email_otps (email, otp, expires_at, window_start, send_count) VALUES (%s, %s, %s, %s, 0)
+                ON DUPLICATE KEY UPDATE otp = %s, expires_at = %s
+            ''', (email, otp, expires_at, datetime.datetime.now(), otp, expires_at))
+            # Opportunistically drop rows whose OTP and rate-limit window have both lapsed
+            cursor.execute(
+                'DELETE FROM email_otps WHERE expires_at < %s LIMIT 100',
+                (datetime.datetime.now() - datetime.timedelta(seconds=max(OTP_RATE_LIMIT_WINDOW, OTP_TTL_SECONDS)),)
             )
-        ''')
+            db.commit()
 
-        # Create idea_reactions table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS idea_reactions (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                idea_id INT NOT NULL,
-                user_id INT NOT NULL,
-                reaction_type VARCHAR(10) CHECK(reaction_type IN ('like', 'dislike')),
-                UNIQUE KEY unique_reaction (idea_id, user_id),
-                FOREIGN KEY (idea_id) REFERENCES ideas(id),
-                FOREIGN KEY (user_id) REFERENCES users(id)
+    def get(self, email):
+        with db_pool.connection() as db:
+            cursor = db.cursor()
+            cursor.execute('SELECT otp, expires_at FROM email_otps WHERE email = %s AND otp IS NOT NULL', (email,))
+            return cursor.fetchone()
+
+    def delete(self, email):
+        with db_pool.connection() as db:
+            cursor = db.cursor()
+            cursor.execute('UPDATE email_otps SET otp = NULL WHERE email = %s', (email,))
+            db.commit()
+
+
+OTP_STORES = {
+    'mysql': MySQLOTPStore,
+    'memory': lambda: MemoryOTPStore(max_entries=OTP_MAX_ENTRIES),
+}
+otp_store = OTP_STORES[OTP_STORE]()
+
+
+# --- Password Hashing ---
+class PasswordHashPoolBusy(Exception):
+    """Raised when too many password hashes are already running or queued."""
+
+
+class PasswordHasher:
+    """Runs password hashing and verification on a small dedicated thread pool.
+
+    hashlib's scrypt and PBKDF2 release the GIL, so at most `workers` hashes burn
+    CPU at once while other requests keep being served. Callers beyond
+    `workers + max_pending` get PasswordHashPoolBusy (a 429) instead of piling up.
+    """
+
+    def __init__(self, method, workers, max_pending):
+        self.method = method
+        self.workers = workers
+        self._slots = threading.BoundedSemaphore(workers + max_pending)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+        self._prefix = None
+        self.rejected = 0
+
+    def _get_executor(self):
+        with self._lock:
+            # Worker threads do not survive a fork, so each process starts its own pool
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix='password-hash'
+                )
+                self._pid = os.getpid()
+            return self._executor
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise PasswordHashPoolBusy()
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future.result()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, pwhash, password):
+        return self._run(check_password_hash, pwhash, password)
+
+    def needs_rehash(self, pwhash):
+        """True if pwhash was made with a different method or cost than self.method."""
+        if self._prefix is None:
+            # Werkzeug may normalise the method string (e.g. 'scrypt' -> 'scrypt:32768:8:1')
+            self._prefix = generate_password_hash('', self.method).split('$', 1)[0]
+        return pwhash.split('$', 1)[0] != self._prefix
+
+    def stats(self):
+        return {'method': self.method, 'workers': self.workers, 'rejected': self.rejected}
+
+
+password_hasher = PasswordHasher(PASSWORD_HASH_METHOD, PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_PENDING)
+
+
+@app.errorhandler(PasswordHashPoolBusy)
+def handle_password_hash_busy(error):
+    return jsonify({'error': 'Too many sign-in attempts right now. Please try again shortly.'}), 429, {'Retry-After': '1'}
+
+
+# --- Token Verification ---
+class VerifiedTokenCache:
+    """Bounded LRU of already-verified JWT claims, keyed by the token's SHA-256 digest.
+
+    An entry is only served until the token's own exp, so caching never extends
+    a token's lifetime.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    @staticmethod
+    def _key(token):
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token):
+        key = self._key(token)
+        with self._lock:
+            claims = self._entries.get(key)
+            if claims is None:
+                return None
+            if claims['exp'] <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return claims
+
+    def put(self, token, claims):
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = claims
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'max_entries': self.max_entries}
+
+
+TOKEN_VERSION_QUERY = 'SELECT token_version FROM users WHERE id = %s'
+
+
+class TokenVersionCache:
+    """Caches each user's token_version so revocation checks rarely touch the database.
+
+    Tokens carry the version they were issued with ('ver'); bumping
+    users.token_version revokes every older token. Invalidated locally on bump;
+    the TTL bounds how long another worker process can accept a revoked token.
+    """
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._versions = {}
+
+    def get(self, cursor, user_id):
+        """Returns the user's current token version, or None if the user no longer exists."""
+        hit, version = self.lookup(user_id)
+        if hit:
+            return version
+        cursor.execute(TOKEN_VERSION_QUERY, (user_id,))
+        row = cursor.fetchone()
+        return self.store(user_id, row['token_version'] if row else None)
+
+    def lookup(self, user_id):
+        """Returns (True, version) for a fresh cache entry, else (False, None)."""
+        with self._lock:
+            cached = self._versions.get(user_id)
+            if cached is not None and time.monotonic() - cached[1] < self.ttl:
+                return True, cached[0]
+        return False, None
+
+    def store(self, user_id, version):
+        with self._lock:
+            self._versions[user_id] = (version, time.monotonic())
+            if len(self._versions) > TOKEN_CACHE_SIZE:
+                # Drop entries that have expired anyway
+                now = time.monotonic()
+                self._versions = {uid: entry for uid, entry in self._versions.items() if now - entry[1] < self.ttl}
+        return version
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._versions.pop(user_id, None)
+
+
+verified_token_cache = VerifiedTokenCache(TOKEN_CACHE_SIZE)
+token_version_cache = TokenVersionCache(TOKEN_VERSION_CACHE_TTL)
+
+
+def revoke_user_tokens(cursor, user_id):
+    """Invalidates every token issued to the user so far. Call inside the write transaction.
+
+    Call token_version_cache.invalidate(user_id) once it commits: invalidating earlier
+    lets a concurrent request cache the old version for TOKEN_VERSION_CACHE_TTL.
+    """
+    cursor.execute('UPDATE users SET token_version = token_version + 1 WHERE id = %s', (user_id,))
+
+
+def issue_token(user):
+    """Returns a signed JWT for a users row (id, email, role, full_name, token_version)."""
+    expiration = datetime.datetime.utcnow() + datetime.timedelta(hours=JWT_EXPIRATION_HOURS)
+    token_payload = {
+        'user_id': user['id'],
+        'email': user['email'],
+        'role': user['role'],
+        'fullName': user.get('full_name', ''),
+        'ver': user.get('token_version', 0),
+        'exp': expiration
+    }
+    return jwt.encode(token_payload, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
+
+
+# --- Decorators ---
+def verify_token_claims(token):
+    """Returns (claims, None) for a valid JWT, or (None, error message).
+
+    Signatures are checked once per token; revocation (token_version) is not checked here.
+    """
+    if not token:
+        return None, 'Token is missing!'
+    data = verified_token_cache.get(token)
+    if data is None:
+        try:
+            data = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
+        except jwt.ExpiredSignatureError:
+            return None, 'Token has expired!'
+        except jwt.InvalidTokenError:
+            return None, 'Invalid token!'
+        verified_token_cache.put(token, data)
+    return data, None
+
+
+def authenticate_token(token):
+    """Verifies a JWT and stores its claims on g. Returns an error response, or None if valid."""
+    data, error = verify_token_claims(token)
+    if error:
+        return jsonify({'message': error}), 401
+
+    # Tokens issued before token_version existed count as version 0
+    if token_version_cache.get(get_db().cursor(), data['user_id']) != data.get('ver', 0):
+        return jsonify({'message': 'Token has been revoked!'}), 401
+    g.current_user_id = data['user_id']
+    g.current_user_role = data['role']
+    return None
+
+
+def get_bearer_token():
+    auth_header = request.headers.get('Authorization', '')
+    if auth_header.startswith('Bearer '):
+        return auth_header.split(" ")[1]
+    return None
+
+
+def token_required(f):
+    @functools.wraps(f)
+    def decorated(*args, **kwargs):
+        error = authenticate_token(get_bearer_token())
+        if error:
+            return error
+        return f(*args, **kwargs)
+    
+    return decorated
+
+
+# --- Response Cache ---
+# Cached GET responses are validated against per-table version counters in
+# cache_versions. Every write path bumps the tables it touched in the same
+# transaction, which changes the ETag of every response built from them.
+# Each table's version is the sum of CACHE_VERSION_SHARDS rows, and a write bumps
+# the row picked by its connection id, so concurrent writers rarely wait on the
+# same row lock while all bumps within one transaction still hit the same row.
+def cache_version_bump_query(tables):
+    """Returns (sql, params) that increment the version of each table."""
+    tables = sorted(set(tables))  # a fixed lock order keeps concurrent bumps from deadlocking
+    sql = (
+        'INSERT INTO cache_versions (table_name, shard, version) VALUES '
+        + ', '.join(f'(%s, MOD(CONNECTION_ID(), {CACHE_VERSION_SHARDS}), 1)' for _ in tables)
+        + ' ON DUPLICATE KEY UPDATE version = version + 1'
+    )
+    return sql, tables
+
+
+def bump_cache_versions(cursor, *tables):
+    """Marks tables as changed. Call inside the write transaction, just before commit."""
+    cursor.execute(*cache_version_bump_query(tables))
+
+
+def cache_versions_query(tables):
+    return (
+        'SELECT table_name, CAST(SUM(version) AS SIGNED) AS version FROM cache_versions WHERE table_name IN ('
+        + ','.join('%s' for _ in tables) + ') GROUP BY table_name'
+    )
+
+
+def get_cache_versions(cursor, tables):
+    cursor.execute(cache_versions_query(tables), tables)
+    versions = {row['table_name']: row['version'] for row in cursor.fetchall()}
+    return tuple(versions.get(table, 0) for table in tables)
+
+
+def response_etag(endpoint, view_args, query_args, user_id, versions):
+    """ETag for a response built from the given inputs at the given table versions."""
+    key = (endpoint, sorted(view_args.items()), sorted(query_args), user_id, versions)
+    return hashlib.sha1(repr(key).encode()).hexdigest()
+
+
+class ResponseCache:
+    """Bounded LRU of rendered response bodies, keyed by ETag."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.not_modified = 0
+        self.misses = 0
+
+    def get(self, etag):
+        with self._lock:
+            entry = self._entries.get(etag)
+            if entry is not None:
+                self._entries.move_to_end(etag)
+            return entry
+
+    def put(self, etag, entry):
+        with self._lock:
+            self._entries[etag] = entry
+            self._entries.move_to_end(etag)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'not_modified': self.not_modified,
+                'misses': self.misses,
+            }
+
+
+response_cache = ResponseCache(RESPONSE_CACHE_SIZE)
+# Headers worth replaying from a cached response; Content-Length is recomputed
+CACHED_RESPONSE_HEADERS = ('Content-Type', 'X-Total-Count', 'X-Next-Cursor')
+
+
+def cached_response(*tables, per_user=False):
+    """Serves GET requests from the response cache, or 304 if the client's ETag is current.
+
+    tables lists every table the view reads; per_user keys the cache by the
+    caller when the body depends on who is asking. Other methods pass through.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method != 'GET':
+                return view(*args, **kwargs)
+
+            # Read in the same transaction as the view, so the versions match the data it sees
+            versions = get_cache_versions(get_db().cursor(), tables)
+            etag = response_etag(
+                request.endpoint,
+                kwargs,
+                request.args.items(multi=True),
+                g.current_user_id if per_user else None,
+                versions,
             )
-        ''')
 
-        # --- Schema Migrations ---
-        # This section ensures old databases are updated automatically.
-        cursor.execute("SHOW COLUMNS FROM ideas LIKE 'last_edited_at'")
-        result = cursor.fetchone()
-        
-        if result is None:
-            print("Applying migration: Adding 'last_edited_at' column to 'ideas' table.")
-            cursor.execute('ALTER TABLE ideas ADD COLUMN last_edited_at VARCHAR(50)')
-        
-        # Migration for full_name in users table
-        cursor.execute("SHOW COLUMNS FROM users LIKE 'full_name'")
-        result = cursor.fetchone()
-        if result is None:
-            print("Applying migration: Adding 'full_name' column to 'users' table.")
-            cursor.execute('ALTER TABLE users ADD COLUMN full_name VARCHAR(255)')
-
-        # Migration to update role column check constraint to allow 'hr'
-        # Drop existing check constraint if it exists and add a new one that includes 'hr'
+            # Weak comparison: compression turns the ETag weak (W/"...")
+            if request.if_none_match.contains_weak(etag):
+                response_cache.not_modified += 1
+                response = Response(status=304)
+            else:
+                entry = response_cache.get(etag)
+                if entry is not None:
+                    response_cache.hits += 1
+                    body, headers = entry
+                    response = Response(body, 200, headers)
+                else:
+                    response_cache.misses += 1
+                    response = app.make_response(view(*args, **kwargs))
+                    if response.status_code != 200:
+                        return response
+                    # Streamed bodies are never held in memory; they still get an ETag for 304s
+                    if not response.is_streamed:
+                        response_cache.put(etag, (
+                            response.get_data(),
+                            [(name, response.headers[name]) for name in CACHED_RESPONSE_HEADERS if name in response.headers],
+                        ))
+            response.set_etag(etag)
+            # Clients may keep the body but must revalidate it on every use
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+# --- Response Compression ---
+class GzipCompressor:
+    def __init__(self, level):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits=31: gzip container
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        """Emits everything compressed so far, so a streamed chunk can be sent at once."""
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class BrotliCompressor:
+    def __init__(self, quality):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+class ZstdCompressor:
+    def __init__(self, level):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+# Content-Encoding -> compressor factory, for the encodings available in this install
+COMPRESSORS = {'gzip': lambda: GzipCompressor(GZIP_LEVEL)}
+if brotli is not None:
+    COMPRESSORS['br'] = lambda: BrotliCompressor(BROTLI_QUALITY)
+if zstandard is not None:
+    COMPRESSORS['zstd'] = lambda: ZstdCompressor(ZSTD_LEVEL)
+SUPPORTED_ENCODINGS = [encoding for encoding in COMPRESSION_ENCODINGS if encoding in COMPRESSORS]
+COMPRESSIBLE_MIMETYPES = {
+    'application/json', 'application/x-ndjson', 'application/javascript', 'application/xml', 'image/svg+xml',
+}
+
+
+def is_compressible(mimetype):
+    # Event streams are left alone: proxies tend to buffer compressed SSE
+    return mimetype is not None and mimetype != 'text/event-stream' and (
+        mimetype.startswith('text/') or mimetype in COMPRESSIBLE_MIMETYPES
+    )
+
+
+def compress_stream(chunks, compressor):
+    """Compresses a streamed body chunk by chunk, flushing each so nothing waits on the next row."""
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+@app.after_request
+def compress_response(response):
+    """Compresses API responses and static files with the best encoding the client accepts."""
+    if (
+        not COMPRESSION_ENABLED
+        or response.status_code < 200
+        or response.status_code in (204, 206, 304)
+        or 'Content-Encoding' in response.headers
+        or not is_compressible(response.mimetype)
+    ):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = request.accept_encodings.best_match(SUPPORTED_ENCODINGS)
+    # Streamed bodies (including static files) only have a length when it is known up front
+    if encoding is None or (response.content_length is not None and response.content_length < COMPRESSION_MIN_SIZE):
+        return response
+
+    compressor = COMPRESSORS[encoding]()
+    if response.is_streamed:
+        response.response = compress_stream(response.response, compressor)
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        compressed = compressor.compress(data) + compressor.finish()
+        if len(compressed) >= len(data):
+            return response
+        response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    # Byte ranges would refer to the compressed body, which differs per request
+    response.headers.pop('Accept-Ranges', None)
+    # The compressed bytes differ from the identity representation the ETag was made for
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+# --- Streaming Responses ---
+class StreamLimitReached(Exception):
+    """Raised when STREAM_MAX_CONCURRENT streamed responses are already open in this process."""
+
+
+@app.errorhandler(StreamLimitReached)
+def handle_stream_limit(error):
+    return jsonify({'error': 'Too many downloads in progress. Please try again shortly.'}), 503, {'Retry-After': '5'}
+
+
+# An open stream holds a pooled connection until its client has read the whole
+# body, so streams get their own cap and slow clients cannot drain the pool.
+stream_slots = threading.BoundedSemaphore(STREAM_MAX_CONCURRENT)
+
+
+class RowStream:
+    """Iterates a query's rows through an unbuffered server-side cursor (SSDictCursor).
+
+    The query runs, and its first buffer_rows rows are fetched, when the stream is
+    created, before the response starts, so a failing query or an exhausted pool
+    still gets an error status. If that was every row, ``complete`` is True and the
+    connection is already back in the pool. Otherwise the stream takes one of the
+    STREAM_MAX_CONCURRENT slots, or raises StreamLimitReached if none is free.
+    The cursor uses a pooled connection of its own, since the request's connection
+    is released before a streamed body is sent. close() hands it back; it runs once
+    the rows are exhausted and, through attach(), when the response is closed, even
+    if the body was never read.
+    """
+
+    def __init__(self, query, params, buffer_rows=STREAM_FETCH_ROWS):
+        self._resources = contextlib.ExitStack()
         try:
-            # Check if the constraint exists
-            cursor.execute("""
-                SELECT CONSTRAINT_NAME 
-                FROM INFORMATION_SCHEMA.TABLE_CONSTRAINTS 
-                WHERE TABLE_SCHEMA = %s 
-                AND TABLE_NAME = 'users' 
-                AND CONSTRAINT_TYPE = 'CHECK'
-            """, (DB_CONFIG['database'],))
-            constraints = cursor.fetchall()
-            
-            # Drop all check constraints on users table
-            for constraint in constraints:
-                constraint_name = constraint['CONSTRAINT_NAME']
-                print(f"Dropping check constraint: {constraint_name}")
-                cursor.execute(f"ALTER TABLE users DROP CHECK {constraint_name}")
-            
-            # Add new check constraint that includes all valid roles including 'hr'
-            print("Adding updated check constraint for role column")
-            cursor.execute("""
-                ALTER TABLE users 
-                ADD CONSTRAINT users_role_check 
-                CHECK (role IN ('user', 'admin', 'ceo', 'hr', 'superadmin'))
-            """)
-            db.commit()
+            db = self._resources.enter_context(db_pool.connection())
+            self._cursor = db.cursor(InstrumentedSSDictCursor)
+            # Drains any unread rows so the connection can go back to the pool
+            self._resources.callback(self._cursor.close)
+            self._cursor.execute(query, params)
+            self._first = self._cursor.fetchmany(buffer_rows)
+            self.complete = len(self._first) < buffer_rows
+            if self.complete:
+                self.close()
+            elif stream_slots.acquire(blocking=False):
+                self._resources.callback(stream_slots.release)
+            else:
+                raise StreamLimitReached()
+        except BaseException:
+            self.close()
+            raise
+
+    def __iter__(self):
+        try:
+            rows, self._first = self._first, []
+            yield from rows
+            while not self.complete:
+                rows = self._cursor.fetchmany(STREAM_FETCH_ROWS)
+                self.complete = not rows
+                yield from rows
         except Exception as e:
-            print(f"Check constraint migration completed or not needed: {e}")
-            pass
+            # The status is already sent; re-raising makes the server abort the
+            # chunked body, so clients see an incomplete transfer, not a short 200
+            log_event('stream_failed', error=str(e))
+            raise
+        finally:
+            self.close()
+
+    def close(self):
+        self._resources.close()
+
+    def attach(self, response):
+        response.call_on_close(self.close)
+        return response
+
+
+def stream_chunks(pieces):
+    """Joins streamed text pieces into encoded chunks of about STREAM_CHUNK_BYTES."""
+    buffer, size = [], 0
+    for piece in pieces:
+        buffer.append(piece)
+        size += len(piece)
+        if size >= STREAM_CHUNK_BYTES:
+            yield ''.join(buffer).encode()
+            buffer, size = [], 0
+    yield ''.join(buffer).encode()
 
-        # The 'adminComments' column is now obsolete and ignored by the application.
-        # No action is needed if it exists in older database files.
 
-        # --- Default Data ---
-        # Check if the default admin exists, if not, create it
-        admin_email = os.getenv('ADMIN_EMAIL', 'admin@adventz.com')
-        admin_password = os.getenv('ADMIN_PASSWORD', '12345')
+def stream_json_rows(query, params, transform=None):
+    """Returns a response with the query's rows as a JSON array.
 
-        cursor.execute("SELECT * FROM users WHERE email = %s", (admin_email,))
-        if cursor.fetchone() is None:
-            hashed_password = generate_password_hash(admin_password)
-            cursor.execute(
-                "INSERT INTO users (email, password, role) VALUES (%s, %s, %s)",
-                (admin_email, hashed_password, 'admin')
-            )
-        
-        # Check if the default CEO exists, if not, create it
-        ceo_email = os.getenv('CEO_EMAIL', 'ceo@adventz.com')
-        ceo_password = os.getenv('CEO_PASSWORD', '12345')
+    Up to STREAM_THRESHOLD_ROWS rows are sent as an ordinary response, which
+    cached_response can keep. Longer results come from a RowStream and are
+    serialized one at a time, so memory stays flat however many rows match.
+    transform(row) may adjust each row in place before it is written.
+    Compression is left to compress_response, which handles streamed bodies.
+    """
+    rows = RowStream(query, params, STREAM_THRESHOLD_ROWS)
+    if rows.complete:
+        buffered = list(rows)
+        if transform is not None:
+            for row in buffered:
+                transform(row)
+        return jsonify(buffered)
 
-        cursor.execute("SELECT * FROM users WHERE email = %s", (ceo_email,))
-        if cursor.fetchone() is None:
-            hashed_password_ceo = generate_password_hash(ceo_password)
-            cursor.execute(
-                "INSERT INTO users (email, password, role, full_name) VALUES (%s, %s, %s, %s)",
-                (ceo_email, hashed_password_ceo, 'ceo', 'Chief Executive Officer')
-            )
-        
+    def generate_json():
+        yield '['
+        separator = ''
+        for row in rows:
+            if transform is not None:
+                transform(row)
+            yield separator + app.json.dumps(row)
+            separator = ','
+        yield ']'
 
-        db.commit()
+    return rows.attach(Response(stream_chunks(generate_json()), mimetype='application/json'))
 
-# --- Decorators ---
-def token_required(f):
-    @functools.wraps(f)
-    def decorated(*args, **kwargs):
-        token = None
-        if 'Authorization' in request.headers:
-            auth_header = request.headers['Authorization']
-            if auth_header.startswith('Bearer '):
-                token = auth_header.split(" ")[1]
-        
-        if not token:
-            return jsonify({'message': 'Token is missing!'}), 401
-        
-        try:
-            data = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
-            g.current_user_id = data['user_id']
-            g.current_user_role = data['role']
-        except jwt.ExpiredSignatureError:
-            return jsonify({'message': 'Token has expired!'}), 401
-        except jwt.InvalidTokenError:
-            return jsonify({'message': 'Invalid token!'}), 401
-            
-        return f(*args, **kwargs)
-    
-    return decorated
+
+def decode_departments_impacted(idea):
+    idea['departmentsImpacted'] = json.loads(idea['departmentsImpacted'])
 
 # --- API Endpoints ---
 def send_email_otp(to_email, otp):
-    """Sends an OTP to the specified email address using Gmail SMTP."""
-    if not SMTP_EMAIL or not SMTP_PASSWORD:
-        print("SMTP credentials not configured.")
-        return False
-    
+    """Queues an OTP email to the specified address. Returns False if it could not be queued."""
     msg = MIMEMultipart()
     msg['From'] = SMTP_EMAIL
     msg['To'] = to_email
@@ -283,18 +2272,7 @@ def send_email_otp(to_email, otp):
     </html>
     """
     msg.attach(MIMEText(body, 'html'))
-    
-    try:
-        server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT)
-        server.starttls()
-        server.login(SMTP_EMAIL, SMTP_PASSWORD)
-        text = msg.as_string()
-        server.sendmail(SMTP_EMAIL, to_email, text)
-        server.quit()
-        return True
-    except Exception as e:
-        print(f"Failed to send email: {e}")
-        return False
+    return mail_queue.enqueue(msg)
 
 @app.route('/api/send-otp', methods=['POST'])
 def send_otp():
@@ -308,15 +2286,15 @@ def send_otp():
     if not email.endswith('@adventz.com'):
         return jsonify({'error': 'Only @adventz.com email addresses are allowed'}), 400
 
+    if not otp_store.allow_send(email):
+        return jsonify({'error': 'Too many OTP requests. Please try again later.'}), 429
+
     # Generate 6-digit OTP
     otp = ''.join([str(random.randint(0, 9)) for _ in range(6)])
     
     # Store OTP with expiration (5 minutes from now)
-    expiration_time = datetime.datetime.now() + datetime.timedelta(minutes=5)
-    otp_store[email] = {
-        'otp': otp,
-        'expires_at': expiration_time
-    }
+    expiration_time = datetime.datetime.now() + datetime.timedelta(seconds=OTP_TTL_SECONDS)
+    otp_store.put(email, otp, expiration_time)
     
     if send_email_otp(email, otp):
         return jsonify({'message': 'OTP sent successfully to your email.'}), 200
@@ -351,7 +2329,7 @@ def signup():
         return jsonify({'error': 'Invalid OTP'}), 400
         
     if datetime.datetime.now() > stored_otp_data['expires_at']:
-        del otp_store[email]
+        otp_store.delete(email)
         return jsonify({'error': 'OTP has expired. Please request a new one.'}), 400
 
     # Validation: Password match
@@ -373,7 +2351,7 @@ def signup():
         return jsonify({'error': 'Phone number must be exactly 10 digits'}), 400
 
     # Hash password and create user
-    hashed_password = generate_password_hash(password)
+    hashed_password = password_hasher.hash(password)
     db = get_db()
     
     try:
@@ -385,8 +2363,7 @@ def signup():
         db.commit()
         
         # Clear OTP after successful signup
-        if email in otp_store:
-            del otp_store[email]
+        otp_store.delete(email)
             
         return jsonify({'message': 'Account created successfully! Please login to continue.'}), 201
     except pymysql.IntegrityError:
@@ -411,21 +2388,21 @@ def login():
     user = cursor.fetchone()
 
     # Check if user exists and password is correct
-    if user and check_password_hash(user['password'], password):
+    if user and password_hasher.verify(user['password'], password):
         # Determine Role logic
         role = user['role']
 
+        # Upgrade hashes made with an older method or cost while we have the plaintext
+        if password_hasher.needs_rehash(user['password']):
+            cursor.execute(
+                'UPDATE users SET password = %s WHERE id = %s AND password = %s',
+                (password_hasher.hash(password), user['id'], user['password'])
+            )
+            db.commit()
+
 
         # Generate JWT token
-        expiration = datetime.datetime.utcnow() + datetime.timedelta(hours=JWT_EXPIRATION_HOURS)
-        token_payload = {
-            'user_id': user['id'],
-            'email': user['email'],
-            'role': role,
-            'fullName': user.get('full_name', ''),
-            'exp': expiration
-        }
-        token = jwt.encode(token_payload, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
+        token = issue_token(user)
         
         return jsonify({
             'isLoggedIn': True,
@@ -476,18 +2453,41 @@ def update_user_role(user_id):
     if user_id == g.current_user_id:
          return jsonify({'error': 'Cannot change your own role'}), 400
 
+    cursor.execute('SELECT role FROM users WHERE id = %s FOR UPDATE', (user_id,))
+    user = cursor.fetchone()
+    if not user:
+        db.rollback()
+        return jsonify({'error': 'User not found'}), 404
+
+    # Re-weight this user's existing likes (CEO likes are worth more)
+    weight_delta = reaction_points(new_role, 'like') - reaction_points(user['role'], 'like')
+    if weight_delta:
+        cursor.execute('''
+            UPDATE ideas i
+            JOIN idea_reactions ir ON ir.idea_id = i.id
+            SET i.points = i.points + %s
+            WHERE ir.user_id = %s AND ir.reaction_type = 'like'
+        ''', (weight_delta, user_id))
+
     cursor.execute('UPDATE users SET role = %s WHERE id = %s', (new_role, user_id))
+    # The role is baked into the user's tokens, so make them sign in again
+    revoke_user_tokens(cursor, user_id)
+    bump_cache_versions(cursor, 'users', 'ideas')
     db.commit()
-
-    if cursor.rowcount > 0:
-        return jsonify({'message': f'User role updated to {new_role}'}), 200
-    return jsonify({'error': 'User not found'}), 404
+    admin_id_cache.invalidate()
+    token_version_cache.invalidate(user_id)
+    return jsonify({'message': f'User role updated to {new_role}'}), 200
 
 
 @app.route('/api/users/<int:user_id>', methods=['DELETE'])
 @token_required
 def delete_user(user_id):
-    """Deletes a user account."""
+    """Deletes a user account with their ideas, comments, reactions and notifications.
+
+    The purge runs in short batches. With ?background=true it continues on a
+    background thread and the response (202) carries a job id whose progress
+    GET /api/deletion-jobs/<id> reports.
+    """
     if g.current_user_role != 'admin' and g.current_user_role != 'superadmin':
         return jsonify({'error': 'Unauthorized access'}), 403
 
@@ -497,23 +2497,41 @@ def delete_user(user_id):
 
     db = get_db()
     cursor = db.cursor()
-    
-    # Delete related data first (cascade manually if not set in DB)
-    cursor.execute('DELETE FROM notifications WHERE user_id = %s', (user_id,))
-    cursor.execute('DELETE FROM comments WHERE user_id = %s', (user_id,))
-    # For ideas, we might want to keep them but set user_id to NULL or a deleted user placeholder, 
-    # but for now let's assume we delete them or if there's a FK constraint it might fail.
-    # Looking at schema: FOREIGN KEY (user_id) REFERENCES users (id)
-    # We should probably delete their ideas too to maintain integrity or the DB will error.
-    # Let's delete ideas for now.
-    cursor.execute('DELETE FROM ideas WHERE user_id = %s', (user_id,))
-    
-    cursor.execute('DELETE FROM users WHERE id = %s', (user_id,))
+    cursor.execute('SELECT id FROM users WHERE id = %s', (user_id,))
+    if cursor.fetchone() is None:
+        return jsonify({'error': 'User not found'}), 404
+
+    # Sign the user out first, so they cannot add rows while theirs are being purged
+    revoke_user_tokens(cursor, user_id)
+    job = DeletionJob.create(cursor, 'user', user_id, g.current_user_id)
     db.commit()
+    token_version_cache.invalidate(user_id)
 
-    if cursor.rowcount > 0:
-        return jsonify({'message': 'User deleted successfully'}), 200
-    return jsonify({'error': 'User not found'}), 404
+    if request.args.get('background', 'false').lower() == 'true':
+        start_user_deletion(job)
+        return jsonify({'message': 'User deletion started', 'jobId': job.id}), 202, {
+            'Location': f'/api/deletion-jobs/{job.id}'
+        }
+    run_user_deletion(db, job)
+    return jsonify({'message': 'User deleted successfully', 'jobId': job.id}), 200
+
+
+@app.route('/api/deletion-jobs/<int:job_id>', methods=['GET'])
+@token_required
+def get_deletion_job(job_id):
+    """Reports the progress of a user deletion."""
+    if g.current_user_role != 'admin' and g.current_user_role != 'superadmin':
+        return jsonify({'error': 'Unauthorized access'}), 403
+
+    cursor = get_db().cursor()
+    cursor.execute('''
+        SELECT id, target_type, target_id, requested_by, status, step, deleted_rows, error, created_at, updated_at
+        FROM deletion_jobs WHERE id = %s
+    ''', (job_id,))
+    job = cursor.fetchone()
+    if job is None:
+        return jsonify({'error': 'Deletion job not found'}), 404
+    return jsonify(job), 200
 
 
 @app.route('/api/users/<int:user_id>/password', methods=['PUT'])
@@ -529,20 +2547,409 @@ def reset_user_password(user_id):
     if not new_password or len(new_password) < 5:
          return jsonify({'error': 'Password must be at least 5 characters long'}), 400
 
-    hashed_password = generate_password_hash(new_password)
+    hashed_password = password_hasher.hash(new_password)
     
     db = get_db()
     cursor = db.cursor()
     cursor.execute('UPDATE users SET password = %s WHERE id = %s', (hashed_password, user_id))
+    updated = cursor.rowcount
+    revoke_user_tokens(cursor, user_id)
     db.commit()
+    token_version_cache.invalidate(user_id)
 
-    if cursor.rowcount > 0:
+    if updated > 0:
         return jsonify({'message': 'Password updated successfully'}), 200
     return jsonify({'error': 'User not found'}), 404
 
 
+# --- Idea Search ---
+# Searchable idea columns and their weight in the in-memory backend's scoring.
+SEARCH_FIELDS = {
+    'ideaTitle': 3.0,
+    'employeeName': 2.0,
+    'problemStatement': 1.0,
+    'proposedSolution': 1.0,
+    'expectedBenefits': 1.0,
+}
+SEARCH_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(text):
+    return [token.lower() for token in SEARCH_TOKEN_RE.findall(text or '')]
+
+
+class FullTextSearchBackend:
+    """Ranks ideas with MySQL's FULLTEXT index on the searchable columns.
+
+    Every term must match, as a prefix. Terms shorter than InnoDB's minimum token
+    size are never indexed, so a query made only of such terms falls back to the
+    old title/name substring match. The list filters go into the same statement,
+    so ``limit`` counts only ideas that pass them.
+    """
+
+    min_token_size = int(os.getenv('SEARCH_FULLTEXT_MIN_TOKEN', 3))
+    match_sql = 'MATCH(ideaTitle, employeeName, problemStatement, proposedSolution, expectedBenefits) AGAINST (%s IN BOOLEAN MODE)'
+
+    def search(self, cursor, query, limit, where_clauses=(), params=()):
+        """Returns up to ``limit`` (idea_id, score) pairs, best match first.
+
+        where_clauses and params are extra conditions on ``ideas i``, as built by
+        build_idea_filters.
+        """
+        filters = ''.join(f' AND {clause}' for clause in where_clauses)
+        terms = [t for t in tokenize(query) if len(t) >= self.min_token_size]
+        if not terms:
+            cursor.execute(
+                f'SELECT i.id, 1 AS score FROM ideas i WHERE (i.ideaTitle LIKE %s OR i.employeeName LIKE %s){filters} '
+                'ORDER BY i.id DESC LIMIT %s',
+                (f'%{query}%', f'%{query}%', *params, limit)
+            )
+        else:
+            boolean_query = ' '.join(f'+{term}*' for term in terms)
+            cursor.execute(
+                f'SELECT i.id, {self.match_sql} AS score FROM ideas i WHERE {self.match_sql}{filters} '
+                'ORDER BY score DESC, i.id DESC LIMIT %s',
+                (boolean_query, boolean_query, *params, limit)
+            )
+        return [(row['id'], float(row['score'])) for row in cursor.fetchall()]
+
+    def index_idea(self, idea_id, fields):
+        pass  # MySQL maintains the FULLTEXT index itself
+
+    def remove_idea(self, idea_id):
+        pass
+
+    def invalidate(self):
+        pass
+
+
+class InMemorySearchBackend:
+    """An in-process inverted index with prefix matching and TF-IDF scoring.
+
+    The index is loaded from the database on first use and kept current by the idea
+    write paths in this process. It is meant as a stand-in for tests and single-process
+    deployments; other worker processes will not see each other's updates.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._postings = {}  # token -> {idea_id: weighted term frequency}
+        self._doc_tokens = {}  # idea_id -> set of tokens, for removal
+        self._vocabulary = []  # sorted tokens, rebuilt lazily for prefix lookups
+        self._vocabulary_dirty = False
+        self._loaded = False
+
+    def _load(self, cursor):
+        cursor.execute(f"SELECT id, {', '.join(SEARCH_FIELDS)} FROM ideas")
+        for row in cursor.fetchall():
+            self._add(row['id'], row)
+        self._loaded = True
+
+    def _add(self, idea_id, fields):
+        self._remove(idea_id)
+        weights = {}
+        for field, weight in SEARCH_FIELDS.items():
+            for token in tokenize(fields.get(field)):
+                weights[token] = weights.get(token, 0.0) + weight
+        for token, weight in weights.items():
+            self._postings.setdefault(token, {})[idea_id] = weight
+        self._doc_tokens[idea_id] = set(weights)
+        self._vocabulary_dirty = True
+
+    def _remove(self, idea_id):
+        for token in self._doc_tokens.pop(idea_id, ()):
+            docs = self._postings.get(token)
+            if docs is not None:
+                docs.pop(idea_id, None)
+                if not docs:
+                    del self._postings[token]
+        self._vocabulary_dirty = True
+
+    def _expand(self, prefix):
+        """Returns every indexed token that starts with prefix."""
+        if self._vocabulary_dirty:
+            self._vocabulary = sorted(self._postings)
+            self._vocabulary_dirty = False
+        start = bisect.bisect_left(self._vocabulary, prefix)
+        matches = []
+        for token in self._vocabulary[start:]:
+            if not token.startswith(prefix):
+                break
+            matches.append(token)
+        return matches
+
+    def search(self, cursor, query, limit, where_clauses=(), params=()):
+        """Returns up to ``limit`` (idea_id, score) pairs, best match first.
+
+        where_clauses and params are extra conditions on ``ideas i``. The index only
+        holds text, so ranked matches are checked against them in the database a
+        batch at a time until ``limit`` of them pass.
+        """
+        terms = tokenize(query)
+        if not terms:
+            return []
+        with self._lock:
+            if not self._loaded:
+                self._load(cursor)
+            total_docs = max(len(self._doc_tokens), 1)
+            scores = None
+            for term in terms:
+                term_scores = {}
+                for token in self._expand(term):
+                    docs = self._postings[token]
+                    idf = math.log(1 + total_docs / len(docs))
+                    for idea_id, weight in docs.items():
+                        term_scores[idea_id] = term_scores.get(idea_id, 0.0) + weight * idf
+                # Every term has to match
+                if scores is None:
+                    scores = term_scores
+                else:
+                    scores = {i: scores[i] + s for i, s in term_scores.items() if i in scores}
+                if not scores:
+                    return []
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], -item[0]))
+        if not where_clauses:
+            return ranked[:limit]
+        results = []
+        filters = ''.join(f' AND {clause}' for clause in where_clauses)
+        batch_size = max(limit, 100)
+        for start in range(0, len(ranked), batch_size):
+            batch = ranked[start:start + batch_size]
+            ids = [idea_id for idea_id, _ in batch]
+            cursor.execute(
+                'SELECT i.id FROM ideas i WHERE i.id IN (' + ','.join('%s' for _ in ids) + f'){filters}',
+                (*ids, *params)
+            )
+            passed = {row['id'] for row in cursor.fetchall()}
+            results.extend(item for item in batch if item[0] in passed)
+            if len(results) >= limit:
+                break
+        return results[:limit]
+
+    def index_idea(self, idea_id, fields):
+        with self._lock:
+            if self._loaded:
+                self._add(idea_id, fields)
+
+    def remove_idea(self, idea_id):
+        with self._lock:
+            if self._loaded:
+                self._remove(idea_id)
+
+    def invalidate(self):
+        """Drops the index so it is reloaded on the next search (e.g. after bulk deletes)."""
+        with self._lock:
+            self._postings.clear()
+            self._doc_tokens.clear()
+            self._vocabulary = []
+            self._loaded = False
+
+
+SEARCH_BACKENDS = {
+    'fulltext': FullTextSearchBackend,
+    'memory': InMemorySearchBackend,
+}
+search_backend = SEARCH_BACKENDS[SEARCH_BACKEND]()
+
+
+# --- Idea Queries ---
+def parse_client_timestamp(value):
+    """Converts an ISO 8601 string from the browser into a naive local datetime for DATETIME columns."""
+    try:
+        parsed = datetime.datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return datetime.datetime.now().replace(microsecond=0)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed.replace(microsecond=0)
+
+
+IDEAS_PAGE_MAX_LIMIT = int(os.getenv('IDEAS_PAGE_MAX_LIMIT', 200))
+
+# Every column except the long free-text ones, for list views that only need a card/row.
+IDEA_SUMMARY_COLUMNS = '''
+    i.id, i.user_id, i.employeeName, i.company, i.ideaTitle, i.ideaCategory,
+    i.departmentsImpacted, i.availabilityOfData, i.estimatedCost, i.implementationTimeline,
+    i.status, i.submissionDate, i.last_edited_at, i.likes, i.dislikes, i.points
+'''
+
+# Keyset predicate for "rows after the cursor" in ORDER BY points DESC, submissionDate DESC, id DESC.
+# idx_ideas_points (points, submissionDate) carries the primary key, so this is an index range scan.
+IDEA_KEYSET_CLAUSE = '''(i.points < %s OR (i.points = %s AND (
+    i.submissionDate < %s OR (i.submissionDate = %s AND i.id < %s))))'''
+
+
+def build_idea_filters(cursor, args, user_id):
+    """Translates the idea list query-string filters into WHERE clauses and parameters.
+
+    Returns (where_clauses, params, ranked_ids). ranked_ids is None unless a search
+    term was given, in which case it lists the matching idea ids by relevance. The
+    search sees the other filters, so its SEARCH_MAX_RESULTS cap applies to ideas
+    that pass them.
+    Raises ValueError if startDate or endDate is not a YYYY-MM-DD date.
+    """
+    # Base filter: Only show Drafts if user is the owner
+    where_clauses = ["(i.status != 'Draft' OR i.user_id = %s)"]
+    params = [user_id]
+
+    # Get filter parameters from query string
+    search = args.get('search')
+    status = args.get('status')
+    category = args.get('category')
+    company = args.get('company')
+    start_date = args.get('startDate')
+    end_date = args.get('endDate')
+
+    if status:
+        where_clauses.append('i.status = %s')
+        params.append(status)
+        
+    if category:
+        where_clauses.append('i.ideaCategory = %s')
+        params.append(category)
+
+    if company:
+        where_clauses.append('i.company = %s')
+        params.append(company)
+
+    # Compare the bare column against day boundaries so idx_ideas_status_date stays usable
+    if start_date:
+        where_clauses.append('i.submissionDate >= %s')
+        params.append(datetime.datetime.combine(datetime.date.fromisoformat(start_date), datetime.time.min))
+
+    if end_date:
+        where_clauses.append('i.submissionDate < %s')
+        params.append(datetime.datetime.combine(datetime.date.fromisoformat(end_date) + datetime.timedelta(days=1), datetime.time.min))
+
+    ranked_ids = None
+    if search:
+        ranked_ids = [
+            idea_id for idea_id, _ in search_backend.search(cursor, search, SEARCH_MAX_RESULTS, where_clauses, params)
+        ]
+        if ranked_ids:
+            where_clauses.append('i.id IN (' + ','.join('%s' for _ in ranked_ids) + ')')
+            params.extend(ranked_ids)
+        else:
+            where_clauses.append('FALSE')
+
+    return where_clauses, params, ranked_ids
+
+
+def encode_idea_cursor(idea):
+    """Encodes the sort key of the last idea on a page as an opaque cursor."""
+    submission_date = idea['submissionDate']
+    if isinstance(submission_date, datetime.datetime):
+        submission_date = submission_date.isoformat()
+    raw = json.dumps([idea['points'], submission_date, idea['id']], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_idea_cursor(token):
+    """Decodes a cursor from encode_idea_cursor. Raises ValueError if it is malformed."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        points, submission_date, idea_id = json.loads(base64.urlsafe_b64decode(padded))
+    except Exception:
+        raise ValueError('Invalid cursor')
+    if not isinstance(points, int) or not isinstance(idea_id, int) or not isinstance(submission_date, str):
+        raise ValueError('Invalid cursor')
+    return points, datetime.datetime.fromisoformat(submission_date), idea_id
+
+
+def encode_offset_cursor(offset):
+    """Cursor for relevance-ranked search results, which are bounded and paged by offset."""
+    raw = json.dumps({'offset': offset}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_offset_cursor(token):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        offset = json.loads(base64.urlsafe_b64decode(padded))['offset']
+    except Exception:
+        raise ValueError('Invalid cursor')
+    if not isinstance(offset, int) or offset < 0:
+        raise ValueError('Invalid cursor')
+    return offset
+
+
+def idea_keyset_params(after):
+    points, submission_date, idea_id = after
+    return [points, points, submission_date, submission_date, idea_id]
+
+
+def plan_idea_list(args, user_id, where_clauses, filter_params, ranked_ids):
+    """Builds the idea list query from build_idea_filters' output and the paging arguments.
+
+    Returns a dict with the list 'query' and its 'params', a 'count_query' to run
+    with filter_params (or None), and the 'limit' and search 'offset' that
+    finish_idea_page needs. limit is None when the whole list was asked for.
+    Raises ValueError with a client-facing message for a bad limit or cursor.
+    """
+    columns = IDEA_SUMMARY_COLUMNS if args.get('fields') == 'summary' else 'i.*'
+    query = f'''
+        SELECT {columns}, u.email, ur.reaction_type AS user_reaction
+        FROM ideas i 
+        JOIN users u ON i.user_id = u.id
+        LEFT JOIN idea_reactions ur ON ur.idea_id = i.id AND ur.user_id = %s
+    '''
+    params = [user_id, *filter_params]
+    where_clauses = list(where_clauses)
+    plan = {'count_query': None, 'offset': None, 'ranked': ranked_ids is not None}
+
+    # Without a limit the full list is returned, as before
+    limit = args.get('limit', type=int)
+    if limit is not None:
+        if limit < 1:
+            raise ValueError('limit must be a positive integer')
+        limit = min(limit, IDEAS_PAGE_MAX_LIMIT)
+
+        if args.get('count', 'true').lower() != 'false':
+            plan['count_query'] = 'SELECT COUNT(*) AS total FROM ideas i WHERE ' + ' AND '.join(where_clauses)
+
+        cursor_token = args.get('cursor')
+        try:
+            if ranked_ids is not None:
+                plan['offset'] = decode_offset_cursor(cursor_token) if cursor_token else 0
+            elif cursor_token:
+                where_clauses.append(IDEA_KEYSET_CLAUSE)
+                params.extend(idea_keyset_params(decode_idea_cursor(cursor_token)))
+        except ValueError:
+            raise ValueError('Invalid cursor') from None
+
+    query += ' WHERE ' + ' AND '.join(where_clauses)
+    if ranked_ids:
+        # Search results keep the backend's relevance order
+        query += ' ORDER BY FIELD(i.id, ' + ','.join('%s' for _ in ranked_ids) + ')'
+        params.extend(ranked_ids)
+    else:
+        query += ' ORDER BY i.points DESC, i.submissionDate DESC, i.id DESC' # Ordered by points then date
+    if limit is not None:
+        # Fetch one extra row to learn whether another page exists
+        query += ' LIMIT %s'
+        params.append(limit + 1)
+        if ranked_ids is not None:
+            query += ' OFFSET %s'
+            params.append(plan['offset'])
+
+    plan.update(query=query, params=params, limit=limit)
+    return plan
+
+
+def finish_idea_page(plan, ideas):
+    """Trims the look-ahead row from a page. Returns (ideas, next page cursor or None)."""
+    limit = plan['limit']
+    if len(ideas) <= limit:
+        return ideas, None
+    ideas = ideas[:limit]
+    if plan['ranked']:
+        return ideas, encode_offset_cursor(plan['offset'] + limit)
+    return ideas, encode_idea_cursor(ideas[-1])
+
+
 @app.route('/api/ideas', methods=['GET', 'POST'])
 @token_required
+@cached_response('ideas', 'idea_reactions', 'users', per_user=True)
 def handle_ideas():
     """Handles creating and retrieving ideas. Notifies admins on new idea submission."""
     db = get_db()
@@ -551,7 +2958,7 @@ def handle_ideas():
     if request.method == 'POST':
         data = request.get_json()
         departments_impacted_json = json.dumps(data.get('departmentsImpacted', []))
-        current_time = datetime.datetime.now().isoformat()
+        current_time = datetime.datetime.now()
         cursor.execute('''
             INSERT INTO ideas (user_id, employeeName, company, ideaTitle, ideaCategory, problemStatement, proposedSolution, expectedBenefits, departmentsImpacted, availabilityOfData, dataSources, estimatedCost, implementationTimeline, status, submissionDate, last_edited_at)
             VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
@@ -560,101 +2967,118 @@ def handle_ideas():
             data['problemStatement'], data['proposedSolution'], data['expectedBenefits'],
             departments_impacted_json, data['availabilityOfData'], data.get('dataSources'),
             data.get('estimatedCost'), data['implementationTimeline'], data['status'],
-            data['submissionDate'], current_time
+            parse_client_timestamp(data['submissionDate']), current_time
         ))
         new_idea_id = cursor.lastrowid
         
         if data['status'] == 'Submitted':
-            cursor.execute("SELECT id FROM users WHERE role = 'admin'")
-            admins = cursor.fetchall()
             notification_message = f"New idea submitted by {data['employeeName']}: '{data['ideaTitle']}'"
-            for admin in admins:
-                cursor.execute(
-                    'INSERT INTO notifications (user_id, idea_id, message, created_at) VALUES (%s, %s, %s, %s)',
-                    (admin['id'], new_idea_id, notification_message, datetime.datetime.now().isoformat())
-                )
+            fan_out_notifications(cursor, [
+                (admin_id, new_idea_id, notification_message) for admin_id in admin_id_cache.get(cursor)
+            ])
         
+        bump_cache_versions(cursor, 'ideas')
         db.commit()
+        publish_pending_notifications()
+        search_backend.index_idea(new_idea_id, data)
         return jsonify({'message': 'Idea submitted successfully', 'id': new_idea_id}), 201
 
     elif request.method == 'GET':
-        query = '''
-            SELECT i.*, u.email,
-            (SELECT COUNT(*) FROM idea_reactions WHERE idea_id = i.id AND reaction_type = 'like') as likes,
-            (SELECT COUNT(*) FROM idea_reactions WHERE idea_id = i.id AND reaction_type = 'dislike') as dislikes,
-            (SELECT COALESCE(SUM(
-                CASE 
-                    WHEN r_u.role = 'ceo' AND ir.reaction_type = 'like' THEN 10
-                    WHEN ir.reaction_type = 'like' THEN 1
-                    WHEN ir.reaction_type = 'dislike' THEN -1
-                    ELSE 0 
-                END
-            ), 0) FROM idea_reactions ir JOIN users r_u ON ir.user_id = r_u.id WHERE ir.idea_id = i.id) as points,
-            (SELECT reaction_type FROM idea_reactions WHERE idea_id = i.id AND user_id = %s) as user_reaction
-            FROM ideas i 
-            JOIN users u ON i.user_id = u.id
-        '''
-        params = [g.current_user_id]
-        where_clauses = []
-        
-        # Base filter: Only show Drafts if user is the owner
-        where_clauses.append("(i.status != 'Draft' OR i.user_id = %s)")
-        params.append(g.current_user_id)
-
-        # Get filter parameters from query string
-        search = request.args.get('search')
-        status = request.args.get('status')
-        category = request.args.get('category')
-        company = request.args.get('company')
-        start_date = request.args.get('startDate')
-        end_date = request.args.get('endDate')
-
-        if search:
-            where_clauses.append('(i.ideaTitle LIKE %s OR i.employeeName LIKE %s)')
-            params.extend([f'%{search}%', f'%{search}%'])
-        
-        if status:
-            where_clauses.append('i.status = %s')
-            params.append(status)
-            
-        if category:
-            where_clauses.append('i.ideaCategory = %s')
-            params.append(category)
+        try:
+            where_clauses, filter_params, ranked_ids = build_idea_filters(cursor, request.args, g.current_user_id)
+        except ValueError:
+            return jsonify({'error': 'Dates must be in YYYY-MM-DD format'}), 400
+        try:
+            plan = plan_idea_list(request.args, g.current_user_id, where_clauses, filter_params, ranked_ids)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
 
-        if company:
-            where_clauses.append('i.company = %s')
-            params.append(company)
+        if plan['limit'] is None:
+            # The unpaginated list can be the whole table, so long ones are streamed
+            return stream_json_rows(plan['query'], plan['params'], decode_departments_impacted)
 
-        if start_date:
-            where_clauses.append('DATE(i.submissionDate) >= %s')
-            params.append(start_date)
+        headers = {}
+        if plan['count_query']:
+            cursor.execute(plan['count_query'], filter_params)
+            headers['X-Total-Count'] = str(cursor.fetchone()['total'])
+        cursor.execute(plan['query'], plan['params'])
+        ideas, next_cursor = finish_idea_page(plan, cursor.fetchall())
+        if next_cursor:
+            headers['X-Next-Cursor'] = next_cursor
+        for idea in ideas:
+            decode_departments_impacted(idea)
+        return jsonify(ideas), 200, headers
 
-        if end_date:
-            where_clauses.append('DATE(i.submissionDate) <= %s')
-            params.append(end_date)
 
-        if where_clauses:
-            query += ' WHERE ' + ' AND '.join(where_clauses)
-        
-        query += ' ORDER BY points DESC, i.submissionDate DESC' # Ordered by points then date
+# Columns the dashboard charts break ideas down by, keyed by their name in the stats response
+IDEA_STATS_DIMENSIONS = {
+    'byStatus': 'i.status',
+    'byCategory': 'i.ideaCategory',
+    'byCompany': 'i.company',
+    'byTimeline': 'i.implementationTimeline',
+    'byMonth': "DATE_FORMAT(i.submissionDate, '%%Y-%%m')",
+}
 
-        cursor.execute(query, params)
-        ideas = cursor.fetchall()
-        for idea in ideas:
-            idea['departmentsImpacted'] = json.loads(idea['departmentsImpacted'])
-        return jsonify(ideas)
+
+@app.route('/api/ideas/stats', methods=['GET'])
+@token_required
+@cached_response('ideas', per_user=True)
+def get_idea_stats():
+    """Aggregates the ideas matching the idea list filters for the dashboard charts.
+
+    Accepts the same query-string filters as GET /api/ideas and returns the total
+    plus counts by status, category, company, implementation timeline, submission
+    month and impacted department.
+    """
+    db = get_db()
+    cursor = db.cursor()
+    try:
+        where_clauses, params, _ = build_idea_filters(cursor, request.args, g.current_user_id)
+    except ValueError:
+        return jsonify({'error': 'Dates must be in YYYY-MM-DD format'}), 400
+    where = ' AND '.join(where_clauses)
+
+    # One pass groups by every dimension at once; the groups are folded per dimension below
+    columns = ', '.join(f'{expression} AS {name}' for name, expression in IDEA_STATS_DIMENSIONS.items())
+    cursor.execute(
+        f'SELECT {columns}, COUNT(*) AS ideas FROM ideas i WHERE {where} GROUP BY {", ".join(IDEA_STATS_DIMENSIONS)}',
+        params
+    )
+    stats = {'total': 0, **{name: {} for name in IDEA_STATS_DIMENSIONS}}
+    for group in cursor.fetchall():
+        stats['total'] += group['ideas']
+        for name in IDEA_STATS_DIMENSIONS:
+            if group[name] is not None:
+                stats[name][group[name]] = stats[name].get(group[name], 0) + group['ideas']
+
+    # departmentsImpacted holds a JSON array. Ideas share few distinct arrays, so group by
+    # the stored text and count each department here; JSON_TABLE would need MySQL 8.0 or
+    # MariaDB 10.6. Grouping by MD5 keeps long arrays apart past max_sort_length.
+    cursor.execute(
+        f'SELECT MIN(i.departmentsImpacted) AS departments, COUNT(*) AS ideas FROM ideas i WHERE {where} '
+        'GROUP BY MD5(i.departmentsImpacted)',
+        params
+    )
+    by_department = {}
+    for group in cursor.fetchall():
+        departments = json.loads(group['departments']) if group['departments'] else None
+        if not isinstance(departments, list):
+            continue
+        for department in dict.fromkeys(str(department) for department in departments if department):
+            by_department[department] = by_department.get(department, 0) + group['ideas']
+    stats['byDepartment'] = by_department
+    return jsonify(stats), 200
 
 
 @app.route('/api/ideas/user/<int:user_id>', methods=['GET'])
 @token_required
+@cached_response('ideas')
 def get_user_ideas(user_id):
-    db = get_db()
-    cursor = db.cursor()
-    cursor.execute('SELECT * FROM ideas WHERE user_id = %s ORDER BY submissionDate DESC', (user_id,))
-    ideas = cursor.fetchall()
-    for idea in ideas:
-        idea['departmentsImpacted'] = json.loads(idea['departmentsImpacted'])
-    return jsonify(ideas)
+    return stream_json_rows(
+        'SELECT * FROM ideas WHERE user_id = %s ORDER BY submissionDate DESC, id DESC',
+        (user_id,),
+        decode_departments_impacted
+    )
 
 
 @app.route('/api/ideas/<int:idea_id>', methods=['PUT', 'DELETE'])
@@ -662,7 +3086,7 @@ def get_user_ideas(user_id):
 def update_delete_idea(idea_id):
     db = get_db()
     cursor = db.cursor()
-    current_time = datetime.datetime.now().isoformat()
+    current_time = datetime.datetime.now()
 
     if request.method == 'PUT':
         data = request.get_json()
@@ -679,151 +3103,429 @@ def update_delete_idea(idea_id):
             data['problemStatement'], data['proposedSolution'], data['expectedBenefits'],
             departments_impacted_json, data['availabilityOfData'], data.get('dataSources'),
             data.get('estimatedCost'), data['implementationTimeline'], data['status'],
-            data['submissionDate'], current_time, idea_id
+            parse_client_timestamp(data['submissionDate']), current_time, idea_id
         ))
+        updated = cursor.rowcount
+        bump_cache_versions(cursor, 'ideas')
         db.commit()
-        if cursor.rowcount > 0:
+        if updated > 0:
+            search_backend.index_idea(idea_id, data)
             return jsonify({'message': 'Idea updated successfully'}), 200
         return jsonify({'error': 'Idea not found'}), 404
 
-    elif request.method == 'DELETE':
-        cursor.execute('DELETE FROM comments WHERE idea_id = %s', (idea_id,))
-        cursor.execute('DELETE FROM notifications WHERE idea_id = %s', (idea_id,))
-        cursor.execute('DELETE FROM idea_reactions WHERE idea_id = %s', (idea_id,))
-        cursor.execute('DELETE FROM ideas WHERE id = %s', (idea_id,))
-        db.commit()
-        if cursor.rowcount > 0:
-            return jsonify({'message': 'Idea withdrawn successfully'}), 200
-        return jsonify({'error': 'Idea not found'}), 404
+    elif request.method == 'DELETE':
+        deleted = purge_ideas(db, DeletionJob('idea', idea_id), [idea_id])
+        if deleted > 0:
+            return jsonify({'message': 'Idea withdrawn successfully'}), 200
+        return jsonify({'error': 'Idea not found'}), 404
+
+
+@app.route('/api/ideas/update-status', methods=['POST'])
+@token_required
+def update_idea_status():
+    """Applies a batch of status changes with a constant number of queries.
+
+    Each update is {id, status[, expectedStatus]}. The affected rows are locked while
+    the batch is diffed and written, so concurrent edits cannot interleave; an update
+    whose expectedStatus no longer matches is reported as a conflict and skipped.
+    """
+    payload = request.get_json()
+    updates = payload.get('updates', [])
+    db = get_db()
+    cursor = db.cursor()
+    current_time = datetime.datetime.now()
+
+    # Validate and de-duplicate (the last update for an id wins)
+    results = {}
+    requested = {}
+    for update_data in updates:
+        idea_id = update_data.get('id')
+        new_status = update_data.get('status')
+        try:
+            idea_id = int(idea_id)
+        except (TypeError, ValueError):
+            idea_id = None
+        if idea_id is None or not new_status:
+            results[str(update_data.get('id'))] = {'id': update_data.get('id'), 'result': 'invalid'}
+            continue
+        requested[idea_id] = update_data
+
+    changed = {}
+    if requested:
+        ids = sorted(requested)
+        placeholders = ','.join('%s' for _ in ids)
+        cursor.execute(
+            f'SELECT id, user_id, ideaTitle, status FROM ideas WHERE id IN ({placeholders}) FOR UPDATE',
+            ids
+        )
+        current = {idea['id']: idea for idea in cursor.fetchall()}
+
+        for idea_id in ids:
+            update_data = requested[idea_id]
+            idea = current.get(idea_id)
+            expected_status = update_data.get('expectedStatus')
+            if not idea:
+                result = 'not_found'
+            elif expected_status is not None and expected_status != idea['status']:
+                result = 'conflict'
+            elif update_data['status'] == idea['status']:
+                result = 'unchanged'
+            else:
+                result = 'updated'
+                changed[idea_id] = update_data['status']
+            results[str(idea_id)] = {'id': idea_id, 'result': result}
+
+    if changed:
+        ids = sorted(changed)
+        placeholders = ','.join('%s' for _ in ids)
+        case_params = []
+        for idea_id in ids:
+            case_params.extend((idea_id, changed[idea_id]))
+        cursor.execute(
+            f'''UPDATE ideas
+                SET status = CASE id {' '.join('WHEN %s THEN %s' for _ in ids)} END,
+                    last_edited_at = %s
+                WHERE id IN ({placeholders})''',
+            [*case_params, current_time, *ids]
+        )
+        create_notifications(cursor, [
+            (
+                current[idea_id]['user_id'],
+                idea_id,
+                f'The status of your idea "{current[idea_id]["ideaTitle"]}" has been updated to "{changed[idea_id]}".'
+            )
+            for idea_id in ids
+        ], current_time)
+        bump_cache_versions(cursor, 'ideas')
+
+    db.commit()
+    publish_pending_notifications()
+    return jsonify({
+        'message': 'Status changes saved and notifications sent successfully',
+        'results': list(results.values())
+    }), 200
+
+
+@app.route('/api/ideas/<int:idea_id>/react', methods=['POST'])
+@token_required
+def react_to_idea(idea_id):
+    data = request.get_json()
+    reaction_type = data.get('reactionType') # 'like' or 'dislike'
+
+    if reaction_type not in ['like', 'dislike']:
+        return jsonify({'error': 'Invalid reaction type'}), 400
+
+    db = get_db()
+
+    def work(cursor):
+        previous_reaction, new_reaction, idea = apply_reaction(cursor, idea_id, g.current_user_id, reaction_type)
+
+        # CEO Reaction Logic: Update Idea Status
+        new_status = {'like': 'Approved', 'dislike': 'Rejected'}.get(new_reaction)
+        if g.current_user_role == 'ceo' and new_status and idea['status'] != new_status:
+            current_time = datetime.datetime.now()
+            cursor.execute('UPDATE ideas SET status = %s, last_edited_at = %s WHERE id = %s', (new_status, current_time, idea_id))
+
+            # Notify the idea owner
+            notif_message = f'The status of your idea "{idea["ideaTitle"]}" has been updated to "{new_status}" by the CEO.'
+            create_notification(cursor, idea['user_id'], idea_id, notif_message, current_time)
+        bump_cache_versions(cursor, 'ideas', 'idea_reactions')
+        return previous_reaction, new_reaction, idea
+
+    try:
+        previous_reaction, new_reaction, totals = run_transaction(db, work)
+    except pymysql.err.IntegrityError:
+        db.rollback()
+        return jsonify({'error': 'Idea not found'}), 404
+    publish_pending_notifications()
+
+    if new_reaction is None:
+        message = 'Reaction removed'
+    elif previous_reaction is None:
+        message = 'Reaction added'
+    else:
+        message = 'Reaction updated'
+
+    return jsonify({
+        'message': message, 
+        'likes': totals['likes'], 
+        'dislikes': totals['dislikes'],
+        'points': totals['points'],
+        'user_reaction': new_reaction
+    }), 200
+
+# --- Idea Export ---
+# Spreadsheet columns: (header, row key). departmentsImpacted is flattened to text.
+IDEA_EXPORT_COLUMNS = [
+    ('ID', 'id'), ('Title', 'ideaTitle'), ('Employee', 'employeeName'), ('Email', 'email'),
+    ('Company', 'company'), ('Category', 'ideaCategory'), ('Status', 'status'),
+    ('Submitted', 'submissionDate'), ('Last Edited', 'last_edited_at'),
+    ('Problem Statement', 'problemStatement'), ('Proposed Solution', 'proposedSolution'),
+    ('Expected Benefits', 'expectedBenefits'), ('Departments Impacted', 'departmentsImpacted'),
+    ('Availability of Data', 'availabilityOfData'), ('Data Sources', 'dataSources'),
+    ('Estimated Cost', 'estimatedCost'), ('Implementation Timeline', 'implementationTimeline'),
+]
+IDEA_EXPORT_REACTION_COLUMNS = [('Likes', 'likes'), ('Dislikes', 'dislikes'), ('Points', 'points')]
+IDEA_EXPORT_COMMENT_COLUMNS = [('Comment Count', 'commentCount'), ('Comments', 'comments')]
+# Excel refuses longer cell text
+XLSX_MAX_CELL_CHARS = 32767
+# Characters XML 1.0 does not allow, which would make the sheet unreadable
+XML_ILLEGAL_CHARS_RE = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')
+XLSX_NAMESPACE = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+RELATIONSHIPS_NAMESPACE = 'http://schemas.openxmlformats.org/package/2006/relationships'
+OFFICE_RELATIONSHIP = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+XLSX_PARTS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml"'
+        ' ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml"'
+        ' ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        f'<Relationships xmlns="{RELATIONSHIPS_NAMESPACE}">'
+        f'<Relationship Id="rId1" Type="{OFFICE_RELATIONSHIP}/officeDocument" Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/workbook.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        f'<workbook xmlns="{XLSX_NAMESPACE}" xmlns:r="{OFFICE_RELATIONSHIP}">'
+        '<sheets><sheet name="Ideas" sheetId="1" r:id="rId1"/></sheets></workbook>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        f'<Relationships xmlns="{RELATIONSHIPS_NAMESPACE}">'
+        f'<Relationship Id="rId1" Type="{OFFICE_RELATIONSHIP}/worksheet" Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+EXPORT_MIMETYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+
+def build_idea_export_query(where_clauses, include_reactions, include_comments):
+    """SELECT for the export, ordered by idea id so each idea's comment rows arrive together."""
+    columns = [f'i.{key}' for _, key in IDEA_EXPORT_COLUMNS if key != 'email'] + ['u.email']
+    if include_reactions:
+        columns += [f'i.{key}' for _, key in IDEA_EXPORT_REACTION_COLUMNS]
+    query = 'FROM ideas i JOIN users u ON u.id = i.user_id'
+    order = 'i.id'
+    if include_comments:
+        columns += ['c.id AS comment_id', 'c.comment', 'c.created_at AS comment_created_at', 'cu.email AS comment_email']
+        query += ' LEFT JOIN comments c ON c.idea_id = i.id LEFT JOIN users cu ON cu.id = c.user_id'
+        order += ', c.created_at, c.id'
+    return f"SELECT {', '.join(columns)} {query} WHERE {' AND '.join(where_clauses)} ORDER BY {order}"
+
+
+def group_idea_comments(rows):
+    """Folds the idea-comment join back into one idea per row, with its comments as a list."""
+    idea = None
+    for row in rows:
+        comment = {
+            'id': row.pop('comment_id'),
+            'comment': row.pop('comment'),
+            'created_at': row.pop('comment_created_at'),
+            'email': row.pop('comment_email'),
+        }
+        if idea is None or row['id'] != idea['id']:
+            if idea is not None:
+                yield idea
+            idea = row
+            idea['comments'] = []
+        if comment['id'] is not None:
+            idea['comments'].append(comment)
+    if idea is not None:
+        yield idea
+
+
+def export_cell(value):
+    """Spreadsheet representation of a column value: numbers stay numbers, the rest becomes text."""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    if isinstance(value, datetime.datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    return str(value)
+
+
+def export_departments(stored):
+    # Clients may have sent any JSON here (null, a number, a bare string), not just a list of names
+    departments = json.loads(stored) if stored else None
+    if departments is None:
+        return ''
+    if isinstance(departments, list):
+        return '; '.join(str(department) for department in departments)
+    return str(departments)
+
+
+def flatten_export_row(idea, columns):
+    values = []
+    for _, key in columns:
+        if key == 'departmentsImpacted':
+            values.append(export_departments(idea[key]))
+        elif key == 'commentCount':
+            values.append(len(idea['comments']))
+        elif key == 'comments':
+            values.append('\n'.join(
+                f"[{export_cell(c['created_at'])}] {c['email']}: {c['comment']}" for c in idea['comments']
+            ))
+        else:
+            values.append(export_cell(idea[key]))
+    return values
+
+
+def neutralize_formula(value):
+    # Spreadsheet apps run CSV cells that look like formulas; keep user text as text
+    if isinstance(value, str) and value[:1] in ('=', '+', '-', '@', '\t', '\r'):
+        return "'" + value
+    return value
+
+
+def generate_export_csv(ideas, columns):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # The byte order mark makes Excel read the file as UTF-8
+    writer.writerow(['\ufeff' + columns[0][0]] + [header for header, _ in columns[1:]])
+    for idea in ideas:
+        writer.writerow([neutralize_formula(value) for value in flatten_export_row(idea, columns)])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def generate_export_ndjson(ideas):
+    for idea in ideas:
+        decode_departments_impacted(idea)
+        yield app.json.dumps(idea) + '\n'
+
+
+class StreamSink(io.RawIOBase):
+    """Unseekable, write-only file that holds what ZipFile writes until the stream collects it."""
+
+    def __init__(self):
+        self._chunks = []
+        self.size = 0
+
+    def writable(self):
+        return True
 
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self.size += len(data)
+        return len(data)
 
-@app.route('/api/ideas/update-status', methods=['POST'])
-@token_required
-def update_idea_status():
-    payload = request.get_json()
-    updates = payload.get('updates', [])
-    db = get_db()
-    cursor = db.cursor()
-    current_time = datetime.datetime.now().isoformat()
-    
-    for update_data in updates:
-        idea_id = update_data.get('id')
-        new_status = update_data.get('status')
+    def collect(self):
+        data = b''.join(self._chunks)
+        self._chunks, self.size = [], 0
+        return data
 
-        if not idea_id or not new_status:
-            continue
 
-        cursor.execute('SELECT user_id, ideaTitle, status FROM ideas WHERE id = %s', (idea_id,))
-        idea = cursor.fetchone()
-        if not idea:
+def xlsx_column(index):
+    """Column letters for a zero-based column index (0 -> A, 26 -> AA)."""
+    letters = ''
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(ord('A') + remainder) + letters
+    return letters
+
+
+def xlsx_row(number, values, column_letters):
+    cells = []
+    for letter, value in zip(column_letters, values):
+        if value is None:
             continue
-        
-        if new_status != idea['status']:
-            cursor.execute('UPDATE ideas SET status = %s, last_edited_at = %s WHERE id = %s', (new_status, current_time, idea_id))
-            message = f'The status of your idea "{idea["ideaTitle"]}" has been updated to "{new_status}".'
-            cursor.execute(
-                'INSERT INTO notifications (user_id, idea_id, message, created_at) VALUES (%s, %s, %s, %s)',
-                (idea['user_id'], idea_id, message, datetime.datetime.now().isoformat())
-            )
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            cells.append(f'<c r="{letter}{number}"><v>{value}</v></c>')
+        else:
+            text = xml_escape(XML_ILLEGAL_CHARS_RE.sub('', value)[:XLSX_MAX_CELL_CHARS])
+            cells.append(f'<c r="{letter}{number}" t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>')
+    return f'<row r="{number}">{"".join(cells)}</row>'
 
-    db.commit()
-    return jsonify({'message': 'Status changes saved and notifications sent successfully'}), 200
 
+def generate_export_xlsx(ideas, columns):
+    """Streams a single-sheet workbook.
 
-@app.route('/api/ideas/<int:idea_id>/react', methods=['POST'])
-@token_required
-def react_to_idea(idea_id):
-    data = request.get_json()
-    reaction_type = data.get('reactionType') # 'like' or 'dislike'
+    The ZIP is written straight to the response: entries carry data descriptors
+    instead of sizes up front, and cells use inline strings rather than a shared
+    string table, so nothing about the sheet has to be held until the end.
+    """
+    sink = StreamSink()
+    column_letters = [xlsx_column(index) for index in range(len(columns))]
+    with zipfile.ZipFile(sink, 'w', zipfile.ZIP_DEFLATED) as workbook:
+        for name, content in XLSX_PARTS.items():
+            workbook.writestr(name, content)
+        with workbook.open('xl/worksheets/sheet1.xml', 'w') as sheet:
+            sheet.write(
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                f'<worksheet xmlns="{XLSX_NAMESPACE}"><sheetData>'.encode()
+            )
+            sheet.write(xlsx_row(1, [header for header, _ in columns], column_letters).encode())
+            for number, idea in enumerate(ideas, 2):
+                sheet.write(xlsx_row(number, flatten_export_row(idea, columns), column_letters).encode())
+                if sink.size >= STREAM_CHUNK_BYTES:
+                    yield sink.collect()
+            sheet.write(b'</sheetData></worksheet>')
+    yield sink.collect()
 
-    if reaction_type not in ['like', 'dislike']:
-        return jsonify({'error': 'Invalid reaction type'}), 400
 
-    db = get_db()
-    cursor = db.cursor()
-    
-    # Check if a reaction already exists
-    cursor.execute('SELECT reaction_type FROM idea_reactions WHERE idea_id = %s AND user_id = %s', (idea_id, g.current_user_id))
-    existing_reaction = cursor.fetchone()
-
-    if existing_reaction:
-        if existing_reaction['reaction_type'] == reaction_type:
-            # If same reaction, remove it (toggle off)
-            cursor.execute('DELETE FROM idea_reactions WHERE idea_id = %s AND user_id = %s', (idea_id, g.current_user_id))
-            message = 'Reaction removed'
-        else:
-            # If different, update it
-            cursor.execute('UPDATE idea_reactions SET reaction_type = %s WHERE idea_id = %s AND user_id = %s', (reaction_type, idea_id, g.current_user_id))
-            message = 'Reaction updated'
-    else:
-        # Create new reaction
-        cursor.execute('INSERT INTO idea_reactions (idea_id, user_id, reaction_type) VALUES (%s, %s, %s)', (idea_id, g.current_user_id, reaction_type))
-        message = 'Reaction added'
-    
-    
-    db.commit()
+@app.route('/api/ideas/export', methods=['GET'])
+@token_required
+def export_ideas():
+    """Streams the ideas matching the idea list filters as CSV, NDJSON or XLSX (admins only).
 
-    # CEO Reaction Logic: Update Idea Status
-    if g.current_user_role == 'ceo' and message in ['Reaction added', 'Reaction updated']:
-        new_status = None
-        if reaction_type == 'like':
-            new_status = 'Approved'
-        elif reaction_type == 'dislike':
-            new_status = 'Rejected'
-        
-        if new_status:
-            # Get idea details for notification
-            cursor.execute('SELECT user_id, ideaTitle, status FROM ideas WHERE id = %s', (idea_id,))
-            idea = cursor.fetchone()
-            
-            if idea and idea['status'] != new_status:
-                current_time = datetime.datetime.now().isoformat()
-                cursor.execute('UPDATE ideas SET status = %s, last_edited_at = %s WHERE id = %s', (new_status, current_time, idea_id))
-                
-                # Notify the idea owner
-                notif_message = f'The status of your idea "{idea["ideaTitle"]}" has been updated to "{new_status}" by the CEO.'
-                cursor.execute(
-                    'INSERT INTO notifications (user_id, idea_id, message, created_at) VALUES (%s, %s, %s, %s)',
-                    (idea['user_id'], idea_id, notif_message, current_time)
-                )
-                db.commit()
+    ?format= picks csv (default), ndjson or xlsx. ?reactions=false leaves out the
+    likes/dislikes/points columns and ?comments=true adds each idea's comments.
+    Accepts the same filters as GET /api/ideas. Rows are read through a
+    server-side cursor and written as they arrive, so memory does not grow with
+    the size of the export.
+    """
+    if g.current_user_role not in ('admin', 'superadmin'):
+        return jsonify({'error': 'Unauthorized access'}), 403
+    export_format = request.args.get('format', 'csv').lower()
+    if export_format not in EXPORT_MIMETYPES:
+        return jsonify({'error': f"format must be one of {', '.join(EXPORT_MIMETYPES)}"}), 400
+    include_reactions = request.args.get('reactions', 'true').lower() != 'false'
+    include_comments = request.args.get('comments', 'false').lower() == 'true'
 
-    db.commit()
+    try:
+        where_clauses, params, _ = build_idea_filters(get_db().cursor(), request.args, g.current_user_id)
+    except ValueError:
+        return jsonify({'error': 'Dates must be in YYYY-MM-DD format'}), 400
 
-    # Return updated counts and points
-    cursor.execute("SELECT COUNT(*) as count FROM idea_reactions WHERE idea_id = %s AND reaction_type = 'like'", (idea_id,))
-    likes = cursor.fetchone()['count']
-    
-    cursor.execute("SELECT COUNT(*) as count FROM idea_reactions WHERE idea_id = %s AND reaction_type = 'dislike'", (idea_id,))
-    dislikes = cursor.fetchone()['count']
+    rows = RowStream(build_idea_export_query(where_clauses, include_reactions, include_comments), params)
+    ideas = group_idea_comments(rows) if include_comments else rows
+    columns = IDEA_EXPORT_COLUMNS
+    if include_reactions:
+        columns = columns + IDEA_EXPORT_REACTION_COLUMNS
+    if include_comments:
+        columns = columns + IDEA_EXPORT_COMMENT_COLUMNS
 
-    # Calculate points for this idea
-    cursor.execute('''
-        SELECT COALESCE(SUM(
-            CASE 
-                WHEN u.role = 'ceo' AND ir.reaction_type = 'like' THEN 10
-                WHEN ir.reaction_type = 'like' THEN 1
-                WHEN ir.reaction_type = 'dislike' THEN -1
-                ELSE 0 
-            END
-        ), 0) as points 
-        FROM idea_reactions ir 
-        JOIN users u ON ir.user_id = u.id 
-        WHERE ir.idea_id = %s
-    ''', (idea_id,))
-    points = cursor.fetchone()['points']
+    if export_format == 'xlsx':
+        body = generate_export_xlsx(ideas, columns)
+    elif export_format == 'ndjson':
+        body = stream_chunks(generate_export_ndjson(ideas))
+    else:
+        body = stream_chunks(generate_export_csv(ideas, columns))
+    filename = f'ideas-{datetime.date.today().isoformat()}.{export_format}'
+    return rows.attach(Response(
+        body, mimetype=EXPORT_MIMETYPES[export_format],
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    ))
 
-    return jsonify({
-        'message': message, 
-        'likes': likes, 
-        'dislikes': dislikes,
-        'points': points,
-        'user_reaction': reaction_type if message != 'Reaction removed' else None
-    }), 200
 
 # --- Comment Endpoints ---
 @app.route('/api/ideas/<int:idea_id>/comments', methods=['GET', 'POST'])
 @token_required
+@cached_response('comments', 'users')
 def manage_comments(idea_id):
     db = get_db()
     cursor = db.cursor()
@@ -835,7 +3537,7 @@ def manage_comments(idea_id):
             FROM comments c
             JOIN users u ON c.user_id = u.id
             WHERE c.idea_id = %s
-            ORDER BY c.created_at ASC
+            ORDER BY c.created_at ASC, c.id ASC
             ''',
             (idea_id,)
         )
@@ -846,11 +3548,23 @@ def manage_comments(idea_id):
         data = request.get_json()
         user_id = data.get('userId')
         comment_text = data.get('comment')
-        current_time = datetime.datetime.now().isoformat()
+        current_time = datetime.datetime.now()
 
         if not user_id or not comment_text:
             return jsonify({'error': 'User ID and comment text are required'}), 400
         
+        # Load the idea and the commenter in one round trip
+        cursor.execute('''
+            SELECT i.user_id, i.ideaTitle, u.email AS commenter_email, u.role AS commenter_role
+            FROM ideas i
+            JOIN users u ON u.id = %s
+            WHERE i.id = %s
+        ''', (user_id, idea_id))
+        idea = cursor.fetchone()
+        if not idea:
+            return jsonify({'error': 'Idea not found'}), 404
+        submitter_id = idea['user_id']
+
         cursor.execute(
             'INSERT INTO comments (idea_id, user_id, comment, created_at) VALUES (%s, %s, %s, %s)',
             (idea_id, user_id, comment_text, current_time)
@@ -859,83 +3573,726 @@ def manage_comments(idea_id):
         # Also update the last_edited_at timestamp on the idea
         cursor.execute('UPDATE ideas SET last_edited_at = %s WHERE id = %s', (current_time, idea_id))
 
-        # Notify the idea owner that an admin has commented
-        cursor.execute('SELECT user_id, ideaTitle FROM ideas WHERE id = %s', (idea_id,))
-        idea = cursor.fetchone()
-        submitter_id = idea['user_id']
-
-        # Also notify all admins (except the one making the comment)
-        cursor.execute('SELECT id FROM users WHERE role = "admin"')
-        admins = cursor.fetchall()
-
-        cursor.execute('SELECT email, role FROM users WHERE id = %s', (user_id,))
-        commenter = cursor.fetchone()
-        
+        notifications = []
         # Notify user if commenter is an admin
-        if commenter['role'] == 'admin' and user_id != submitter_id:
+        if idea['commenter_role'] == 'admin' and user_id != submitter_id:
             message = f'An admin commented on your idea: "{idea["ideaTitle"]}".'
-            cursor.execute(
-                'INSERT INTO notifications (user_id, idea_id, message, created_at) VALUES (%s, %s, %s, %s)',
-                (submitter_id, idea_id, message, datetime.datetime.now().isoformat())
-            )
+            notifications.append((submitter_id, idea_id, message))
 
-        # Notify admins
-        for admin in admins:
-            if admin['id'] != user_id: # Don't notify the admin who is commenting
-                message = f'{commenter["email"]} commented on the idea: "{idea["ideaTitle"]}".'
-                cursor.execute(
-                    'INSERT INTO notifications (user_id, idea_id, message, created_at) VALUES (%s, %s, %s, %s)',
-                    (admin['id'], idea_id, message, datetime.datetime.now().isoformat())
-                )
+        # Also notify all admins (except the one making the comment)
+        message = f'{idea["commenter_email"]} commented on the idea: "{idea["ideaTitle"]}".'
+        notifications.extend(
+            (admin_id, idea_id, message) for admin_id in admin_id_cache.get(cursor) if admin_id != user_id
+        )
+        fan_out_notifications(cursor, notifications, current_time)
 
+        bump_cache_versions(cursor, 'comments', 'ideas')
         db.commit()
+        publish_pending_notifications()
         return jsonify({'message': 'Comment added successfully'}), 201
 
 
 # --- Notification Endpoints ---
+def notification_page_query(user_id, since_id, limit):
+    """Returns (sql, params) for a page of get_notifications, newest first.
+
+    Ids grow with creation time, so (user_id, id) serves both the delta and the order.
+    A since_id page holds the oldest rows after since_id, so a client that advances
+    since_id to the newest id it received never skips any; the rest come next time.
+    """
+    limit = min(limit or NOTIFICATIONS_PAGE_MAX_LIMIT, NOTIFICATIONS_PAGE_MAX_LIMIT)
+    if since_id is None:
+        return 'SELECT * FROM notifications WHERE user_id = %s ORDER BY id DESC LIMIT %s', (user_id, limit)
+    return (
+        'SELECT * FROM (SELECT * FROM notifications WHERE user_id = %s AND id > %s ORDER BY id ASC LIMIT %s) page '
+        'ORDER BY id DESC',
+        (user_id, since_id, limit)
+    )
+
 
 @app.route('/api/notifications/user/<int:user_id>', methods=['GET'])
 @token_required
 def get_notifications(user_id):
+    """Lists a user's notifications, newest first.
+
+    ?since_id= returns only notifications newer than that id (the oldest page of
+    them, if more arrived) and ?limit= caps the page size; without either the
+    full history is returned, as before.
+    """
+    since_id = request.args.get('since_id', type=int)
+    limit = request.args.get('limit', type=int)
+    if limit is not None and limit < 1:
+        return jsonify({'error': 'limit must be a positive integer'}), 400
+
+    if since_id is None and limit is None:
+        return stream_json_rows(
+            'SELECT * FROM notifications WHERE user_id = %s ORDER BY created_at DESC, id DESC',
+            (user_id,)
+        )
+
+    db = get_db()
+    cursor = db.cursor()
+    cursor.execute(*notification_page_query(user_id, since_id, limit))
+    notifications = cursor.fetchall()
+    return jsonify(notifications)
+
+
+@app.route('/api/notifications/user/<int:user_id>/unread-count', methods=['GET'])
+@token_required
+def get_unread_notification_count(user_id):
+    if user_id != g.current_user_id and g.current_user_role not in ('admin', 'superadmin'):
+        return jsonify({'error': 'Unauthorized access'}), 403
+
     db = get_db()
     cursor = db.cursor()
     cursor.execute(
-        'SELECT * FROM notifications WHERE user_id = %s ORDER BY created_at DESC',
+        'SELECT COUNT(*) AS unread FROM notifications WHERE user_id = %s AND is_read = 0',
         (user_id,)
     )
-    notifications = cursor.fetchall()
-    return jsonify(notifications)
+    return jsonify({'unread': cursor.fetchone()['unread']}), 200
+
+
+# EventSource cannot send an Authorization header, and a JWT in the query string
+# ends up in access logs. Browsers instead trade their token for a ticket that
+# opens one stream within SSE_TICKET_TTL_SECONDS. Only its hash is stored.
+def hash_stream_ticket(ticket):
+    return hashlib.sha256(ticket.encode()).hexdigest()
+
+
+@app.route('/api/notifications/stream-ticket', methods=['POST'])
+@token_required
+def create_stream_ticket():
+    ticket = secrets.token_urlsafe(32)
+    now = datetime.datetime.now()
+    db = get_db()
+    cursor = db.cursor()
+    cursor.execute(
+        'INSERT INTO stream_tickets (ticket_hash, user_id, token_version, expires_at) VALUES (%s, %s, %s, %s)',
+        (hash_stream_ticket(ticket), g.current_user_id, token_version_cache.get(cursor, g.current_user_id),
+         now + datetime.timedelta(seconds=SSE_TICKET_TTL_SECONDS))
+    )
+    # Opportunistically drop tickets that were never used
+    cursor.execute('DELETE FROM stream_tickets WHERE expires_at < %s LIMIT 100', (now,))
+    db.commit()
+    return jsonify({'ticket': ticket, 'expiresIn': SSE_TICKET_TTL_SECONDS}), 201
+
+
+STREAM_TICKET_SELECT_SQL = 'SELECT user_id, token_version, expires_at FROM stream_tickets WHERE ticket_hash = %s FOR UPDATE'
+STREAM_TICKET_DELETE_SQL = 'DELETE FROM stream_tickets WHERE ticket_hash = %s'
+
+
+def redeem_stream_ticket(ticket):
+    """Consumes a stream ticket. Returns its user id, or None if it is unknown, used, expired or revoked."""
+    db = get_db()
+    cursor = db.cursor()
+    ticket_hash = hash_stream_ticket(ticket)
+    cursor.execute(STREAM_TICKET_SELECT_SQL, (ticket_hash,))
+    row = cursor.fetchone()
+    if row is not None:
+        cursor.execute(STREAM_TICKET_DELETE_SQL, (ticket_hash,))
+    db.commit()
+    if row is None or row['expires_at'] < datetime.datetime.now():
+        return None
+    if token_version_cache.get(cursor, row['user_id']) != row['token_version']:
+        return None
+    return row['user_id']
+
+
+# Streams open at once in this process; each one holds a worker thread until it ends
+sse_slots = threading.BoundedSemaphore(SSE_MAX_STREAMS)
+
+
+@app.route('/api/notifications/stream', methods=['GET'])
+def notification_stream():
+    """Server-Sent Events feed of the current user's new notifications.
+
+    Browsers authenticate with ?ticket= from POST /api/notifications/stream-ticket;
+    other clients may send the usual Authorization header. Resumes after the
+    Last-Event-ID header or ?lastEventId= (the newest id the client already has).
+
+    Here a stream keeps a worker thread busy for up to SSE_MAX_SECONDS, so at most
+    SSE_MAX_STREAMS are open per process; past that, clients get a 503 with
+    Retry-After and fall back to polling. asgi.py serves this path on its event
+    loop instead, where a stream costs no thread and ASGI_SSE_MAX_STREAMS can be
+    far higher; use it wherever notifications are streamed to many clients.
+    """
+    ticket = request.args.get('ticket')
+    if ticket:
+        user_id = redeem_stream_ticket(ticket)
+        if user_id is None:
+            return jsonify({'message': 'Invalid or expired stream ticket!'}), 401
+    else:
+        error = authenticate_token(get_bearer_token())
+        if error:
+            return error
+        user_id = g.current_user_id
+
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('lastEventId')
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        return jsonify({'error': 'Invalid Last-Event-ID'}), 400
+
+    if not sse_slots.acquire(blocking=False):
+        return jsonify({'error': 'Too many open notification streams. Please try again shortly.'}), 503, {'Retry-After': '5'}
+    resources = contextlib.ExitStack()
+    resources.callback(sse_slots.release)
+    try:
+        # Subscribe before reading the backlog so nothing published in between is missed
+        subscription = notification_broker.subscribe(user_id)
+        resources.callback(notification_broker.unsubscribe, user_id, subscription)
+        if last_event_id is None:
+            cursor = get_db().cursor()
+            cursor.execute('SELECT COALESCE(MAX(id), 0) AS last_id FROM notifications WHERE user_id = %s', (user_id,))
+            last_event_id = cursor.fetchone()['last_id']
+            missed = []
+        else:
+            missed = fetch_notifications_after(get_db().cursor(), user_id, last_event_id)
+    except Exception:
+        resources.close()
+        raise
+
+    def generate(last_sent):
+        started = time.monotonic()
+        next_resync = started + SSE_RESYNC_SECONDS
+        try:
+            yield 'retry: 5000\n\n'
+            for notification in missed:
+                last_sent = notification['id']
+                yield format_sse(notification)
+            while time.monotonic() - started < SSE_MAX_SECONDS:
+                try:
+                    notification = subscription.get(timeout=SSE_HEARTBEAT_SECONDS)
+                    pending = [notification]
+                except queue.Empty:
+                    pending = []
+                    yield ': keep-alive\n\n'
+                if time.monotonic() >= next_resync:
+                    # Pick up notifications written by other worker processes
+                    next_resync = time.monotonic() + SSE_RESYNC_SECONDS
+                    with db_pool.connection() as db:
+                        pending = fetch_notifications_after(db.cursor(), user_id, last_sent)
+                for notification in pending:
+                    if notification['id'] <= last_sent:
+                        continue
+                    last_sent = notification['id']
+                    yield format_sse(notification)
+        finally:
+            resources.close()
+
+    response = Response(generate(last_event_id), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',  # Disable proxy buffering (nginx)
+    })
+    # Also frees the slot when the client disconnects before the body starts
+    response.call_on_close(resources.close)
+    return response
+
+
+def fetch_notifications_after(cursor, user_id, last_id, limit=100):
+    cursor.execute(
+        'SELECT * FROM notifications WHERE user_id = %s AND id > %s ORDER BY id ASC LIMIT %s',
+        (user_id, last_id, limit)
+    )
+    return cursor.fetchall()
 
 
 @app.route('/api/notifications/mark-read', methods=['POST'])
+@token_required
 def mark_notifications_read():
+    """Marks the current user's notifications as read, either by id or everything up to upToId."""
     data = request.get_json()
     notification_ids = data.get('ids', [])
-    
-    if not isinstance(notification_ids, list) or not notification_ids:
-        return jsonify({'error': 'A list of notification IDs is required'}), 400
-        
+    up_to_id = data.get('upToId')
+
     db = get_db()
     cursor = db.cursor()
-    
-    placeholders = ','.join('%s' for _ in notification_ids)
-    query = f'UPDATE notifications SET is_read = 1 WHERE id IN ({placeholders})'
-    
-    cursor.execute(query, notification_ids)
+
+    if up_to_id is not None:
+        if not isinstance(up_to_id, int):
+            return jsonify({'error': 'upToId must be a notification ID'}), 400
+        cursor.execute(
+            'UPDATE notifications SET is_read = 1 WHERE user_id = %s AND is_read = 0 AND id <= %s',
+            (g.current_user_id, up_to_id)
+        )
+    else:
+        if not isinstance(notification_ids, list) or not notification_ids:
+            return jsonify({'error': 'A list of notification IDs is required'}), 400
+
+        placeholders = ','.join('%s' for _ in notification_ids)
+        query = f'UPDATE notifications SET is_read = 1 WHERE user_id = %s AND id IN ({placeholders})'
+        cursor.execute(query, [g.current_user_id, *notification_ids])
     db.commit()
     
     return jsonify({'message': f'{cursor.rowcount} notifications marked as read'}), 200
 
 
+# --- Cascading Deletes ---
+# Deleting a user or idea removes everything that references it, child tables first,
+# in DELETE_BATCH_SIZE transactions so no single transaction holds many row locks.
+# Every step is idempotent, so a purge that stopped halfway can simply be run again.
+
+# Tables whose rows reference an idea: (table, cache tables to bump)
+IDEA_CHILD_TABLES = [('comments', ('comments',)), ('notifications', ()), ('idea_reactions', ('idea_reactions',))]
+
+
+class DeletionInProgressError(Exception):
+    pass
+
+
+@app.errorhandler(DeletionInProgressError)
+def handle_deletion_in_progress(error):
+    return jsonify({'error': str(error)}), 409
+
+
+class DeletionJob:
+    """Progress of one cascading delete. Jobs created with create() report it in deletion_jobs."""
+
+    def __init__(self, target_type, target_id, job_id=None):
+        self.target_type = target_type
+        self.target_id = target_id
+        self.id = job_id
+        self.deleted_rows = 0
+
+    @classmethod
+    def create(cls, cursor, target_type, target_id, requested_by):
+        now = datetime.datetime.now()
+        cursor.execute('''
+            INSERT INTO deletion_jobs (target_type, target_id, requested_by, status, created_at, updated_at)
+            VALUES (%s, %s, %s, 'running', %s, %s)
+        ''', (target_type, target_id, requested_by, now, now))
+        return cls(target_type, target_id, cursor.lastrowid)
+
+    def record(self, cursor, step, rows):
+        """Counts the rows a batch deleted. Call inside the batch's transaction."""
+        self.deleted_rows += rows
+        if self.id is not None:
+            cursor.execute(
+                'UPDATE deletion_jobs SET step = %s, deleted_rows = deleted_rows + %s, updated_at = %s WHERE id = %s',
+                (step, rows, datetime.datetime.now(), self.id)
+            )
+
+    def finish(self, db, error=None):
+        if self.id is None:
+            return
+        db.cursor().execute(
+            'UPDATE deletion_jobs SET status = %s, error = %s, updated_at = %s WHERE id = %s',
+            ('failed' if error else 'done', error, datetime.datetime.now(), self.id)
+        )
+        db.commit()
+
+
+def delete_in_batches(db, job, step, table, where, params, cache_tables=()):
+    """Deletes the rows of table matching where, one committed batch at a time. Returns the count."""
+    total = 0
+    while True:
+        def work(cursor):
+            cursor.execute(f'DELETE FROM {table} WHERE {where} LIMIT %s', (*params, DELETE_BATCH_SIZE))
+            deleted = cursor.rowcount
+            if deleted:
+                job.record(cursor, step, deleted)
+                if cache_tables:
+                    bump_cache_versions(cursor, *cache_tables)
+            return deleted
+
+        deleted = run_transaction(db, work)
+        total += deleted
+        if deleted < DELETE_BATCH_SIZE:
+            return total
+        time.sleep(DELETE_BATCH_PAUSE)  # Let concurrent requests in between batches
+
+
+def remove_user_reactions(db, job, user_id):
+    """Deletes a user's reactions in batches, taking each out of its idea's counters. Returns the count."""
+    total = 0
+    while True:
+        def work(cursor):
+            cursor.execute(
+                'SELECT id FROM idea_reactions WHERE user_id = %s LIMIT %s FOR UPDATE', (user_id, DELETE_BATCH_SIZE)
+            )
+            reaction_ids = [row['id'] for row in cursor.fetchall()]
+            if not reaction_ids:
+                return 0
+            placeholders = ','.join('%s' for _ in reaction_ids)
+            cursor.execute(REACTION_REMOVAL_SQL.format(ids=placeholders), (*reaction_ids, user_id))
+            cursor.execute(f'DELETE FROM idea_reactions WHERE id IN ({placeholders})', reaction_ids)
+            job.record(cursor, 'reactions', len(reaction_ids))
+            bump_cache_versions(cursor, 'ideas', 'idea_reactions')
+            return len(reaction_ids)
+
+        removed = run_transaction(db, work)
+        total += removed
+        if removed < DELETE_BATCH_SIZE:
+            return total
+        time.sleep(DELETE_BATCH_PAUSE)
+
+
+def purge_ideas(db, job, idea_ids):
+    """Deletes the ideas with their comments, notifications and reactions. Returns the number of ideas deleted."""
+    placeholders = ','.join('%s' for _ in idea_ids)
+    for table, cache_tables in IDEA_CHILD_TABLES:
+        delete_in_batches(db, job, f'idea {table}', table, f'idea_id IN ({placeholders})', idea_ids, cache_tables)
+
+    def work(cursor):
+        # Catch rows added since their table was purged (e.g. a comment posted meanwhile)
+        for table, _ in IDEA_CHILD_TABLES:
+            cursor.execute(f'DELETE FROM {table} WHERE idea_id IN ({placeholders})', idea_ids)
+        cursor.execute(f'DELETE FROM ideas WHERE id IN ({placeholders})', idea_ids)
+        deleted = cursor.rowcount
+        job.record(cursor, 'ideas', deleted)
+        bump_cache_versions(cursor, 'ideas', 'comments', 'idea_reactions')
+        return deleted
+
+    deleted = run_transaction(db, work)
+    for idea_id in idea_ids:
+        search_backend.remove_idea(idea_id)
+    return deleted
+
+
+def purge_user(db, job):
+    """Deletes a user and everything that references them. Returns 1 if the users row was deleted, else 0."""
+    user_id = job.target_id
+    remove_user_reactions(db, job, user_id)
+    cursor = db.cursor()
+    while True:
+        cursor.execute('SELECT id FROM ideas WHERE user_id = %s ORDER BY id LIMIT %s', (user_id, DELETE_BATCH_SIZE))
+        idea_ids = [row['id'] for row in cursor.fetchall()]
+        if not idea_ids:
+            break
+        purge_ideas(db, job, idea_ids)
+        time.sleep(DELETE_BATCH_PAUSE)
+    delete_in_batches(db, job, 'comments', 'comments', 'user_id = %s', (user_id,), ('comments',))
+    delete_in_batches(db, job, 'notifications', 'notifications', 'user_id = %s', (user_id,))
+    # Reactions made before the user's tokens were revoked may have landed meanwhile
+    remove_user_reactions(db, job, user_id)
+
+    def work(cursor):
+        cursor.execute('DELETE FROM users WHERE id = %s', (user_id,))
+        deleted = cursor.rowcount
+        job.record(cursor, 'user', deleted)
+        bump_cache_versions(cursor, 'users', 'ideas')
+        return deleted
+
+    deleted = run_transaction(db, work)
+    admin_id_cache.invalidate()
+    token_version_cache.invalidate(user_id)
+    search_backend.invalidate()
+    return deleted
+
+
+def run_user_deletion(db, job):
+    """Runs purge_user under a per-user lock and records the outcome on the job."""
+    lock_name = f"{DB_CONFIG['database']}.delete_user.{job.target_id}"
+    cursor = db.cursor()
+    cursor.execute('SELECT GET_LOCK(%s, 0) AS acquired', (lock_name,))
+    if not cursor.fetchone()['acquired']:
+        job.finish(db, 'Another deletion of this user is in progress')
+        raise DeletionInProgressError('A deletion of this user is already in progress')
+    try:
+        deleted = purge_user(db, job)
+        job.finish(db)
+        return deleted
+    except Exception as e:
+        db.rollback()
+        job.finish(db, str(e))
+        raise
+    finally:
+        cursor.execute('SELECT RELEASE_LOCK(%s)', (lock_name,))
+
+
+def start_user_deletion(job):
+    """Runs a user deletion on a background thread. Its progress is reported in deletion_jobs."""
+    def run():
+        try:
+            with db_pool.connection() as db:
+                run_user_deletion(db, job)
+            print(f"Deletion job {job.id}: deleted user {job.target_id}, {job.deleted_rows} rows in total")
+        except Exception as e:
+            print(f"Deletion job {job.id} failed: {e}")
+
+    threading.Thread(target=run, name=f'deletion-job-{job.id}', daemon=True).start()
+
+
+# --- Notification Retention ---
+def purge_read_notifications(db, older_than, batch_size=NOTIFICATION_RETENTION_BATCH, pause=0.05):
+    """Deletes read notifications created before older_than in short batches. Returns the count."""
+    cursor = db.cursor()
+    total = 0
+    while True:
+        cursor.execute(
+            'DELETE FROM notifications WHERE is_read = 1 AND created_at < %s ORDER BY created_at LIMIT %s',
+            (older_than, batch_size)
+        )
+        deleted = cursor.rowcount
+        db.commit()
+        total += deleted
+        if deleted < batch_size:
+            return total
+        time.sleep(pause)  # Let concurrent writers in between batches
+
+
+def notification_retention_job():
+    """Periodically purges old read notifications. Only one process purges at a time."""
+    lock_name = f"{DB_CONFIG['database']}.notification_retention"
+    while True:
+        time.sleep(NOTIFICATION_RETENTION_INTERVAL)
+        try:
+            with db_pool.connection() as db:
+                cursor = db.cursor()
+                cursor.execute('SELECT GET_LOCK(%s, 0) AS acquired', (lock_name,))
+                if not cursor.fetchone()['acquired']:
+                    continue
+                try:
+                    cutoff = datetime.datetime.now() - datetime.timedelta(days=NOTIFICATION_RETENTION_DAYS)
+                    deleted = purge_read_notifications(db, cutoff)
+                    if deleted:
+                        print(f"Notification retention: deleted {deleted} read notifications older than {cutoff:%Y-%m-%d}")
+                finally:
+                    cursor.execute('SELECT RELEASE_LOCK(%s)', (lock_name,))
+        except Exception as e:
+            print(f"Notification retention job failed: {e}")
+
+
+@app.cli.command('purge-notifications')
+@click.option('--days', type=int, default=NOTIFICATION_RETENTION_DAYS, show_default=True,
+              help='Delete read notifications older than this many days.')
+def purge_notifications_command(days):
+    """Deletes old read notifications in batches."""
+    cutoff = datetime.datetime.now() - datetime.timedelta(days=days)
+    with db_pool.connection() as db:
+        deleted = purge_read_notifications(db, cutoff)
+    print(f"Deleted {deleted} read notifications older than {cutoff:%Y-%m-%d}.")
+
+
+# --- Background Jobs ---
+# Daemon threads started once per worker process (after any fork) on its first request.
+_background_jobs_pid = None
+_background_jobs_lock = threading.Lock()
+
+
+def start_background_jobs():
+    global _background_jobs_pid
+    if _background_jobs_pid == os.getpid():
+        return
+    with _background_jobs_lock:
+        if _background_jobs_pid == os.getpid():
+            return
+        _background_jobs_pid = os.getpid()
+        if NOTIFICATION_RETENTION_DAYS > 0:
+            threading.Thread(target=notification_retention_job, name='notification-retention', daemon=True).start()
+
+
+@app.before_request
+def ensure_background_jobs():
+    start_background_jobs()
+
+
+# --- Monitoring Endpoints ---
+# Upper bounds (seconds) of the request latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class RequestMetrics:
+    """Per-route request counts, latency histograms and database usage for /metrics.
+
+    Kept per process; with several workers, each reports its own series.
+    """
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._latency = {}  # (route, method) -> [bucket counts..., +Inf count, sum]
+        self._responses = Counter()  # (route, method, status)
+        self._queries = Counter()  # (route, method) -> statements issued
+        self._query_seconds = Counter()  # (route, method) -> time spent in the database
+
+    def observe(self, route, method, status, seconds, queries, query_seconds):
+        key = (route, method)
+        with self._lock:
+            series = self._latency.setdefault(key, [0] * (len(self.buckets) + 2))
+            series[bisect.bisect_left(self.buckets, seconds)] += 1
+            series[-1] += seconds
+            self._responses[(route, method, status)] += 1
+            self._queries[key] += queries
+            self._query_seconds[key] += query_seconds
+
+    def render(self):
+        """Returns the metrics in the Prometheus text exposition format."""
+        def labels(**values):
+            return '{' + ','.join(f'{name}="{value}"' for name, value in values.items()) + '}'
+
+        lines = [
+            '# HELP http_request_duration_seconds Time spent handling requests, by route.',
+            '# TYPE http_request_duration_seconds histogram',
+        ]
+        with self._lock:
+            for (route, method), series in sorted(self._latency.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, series):
+                    cumulative += count
+                    lines.append(f'http_request_duration_seconds_bucket{labels(route=route, method=method, le=bound)} {cumulative}')
+                cumulative += series[len(self.buckets)]
+                lines.append(f'http_request_duration_seconds_bucket{labels(route=route, method=method, le="+Inf")} {cumulative}')
+                lines.append(f'http_request_duration_seconds_sum{labels(route=route, method=method)} {series[-1]:.6f}')
+                lines.append(f'http_request_duration_seconds_count{labels(route=route, method=method)} {cumulative}')
+
+            lines += ['# HELP http_responses_total Responses sent, by route and status.', '# TYPE http_responses_total counter']
+            for (route, method, status), count in sorted(self._responses.items()):
+                lines.append(f'http_responses_total{labels(route=route, method=method, status=status)} {count}')
+
+            lines += ['# HELP db_queries_total Database statements issued, by route.', '# TYPE db_queries_total counter']
+            for (route, method), count in sorted(self._queries.items()):
+                lines.append(f'db_queries_total{labels(route=route, method=method)} {count}')
+
+            lines += ['# HELP db_query_seconds_total Time spent in database statements, by route.', '# TYPE db_query_seconds_total counter']
+            for (route, method), seconds in sorted(self._query_seconds.items()):
+                lines.append(f'db_query_seconds_total{labels(route=route, method=method)} {seconds:.6f}')
+
+        pool = db_pool.stats()
+        lines += [
+            '# HELP db_pool_connections Pooled database connections, by state.',
+            '# TYPE db_pool_connections gauge',
+            f'db_pool_connections{labels(state="idle")} {pool["idle"]}',
+            f'db_pool_connections{labels(state="in_use")} {pool["in_use"]}',
+        ]
+        return '\n'.join(lines) + '\n'
+
+
+request_metrics = RequestMetrics(LATENCY_BUCKETS)
+
+
+@app.before_request
+def start_query_stats():
+    g.query_stats = QueryStats()
+
+
+@app.after_request
+def report_query_stats(response):
+    """Adds Server-Timing, records route metrics and logs slow or N+1 requests."""
+    stats = g.pop('query_stats', None)
+    if stats is None:
+        return response
+    elapsed = time.perf_counter() - stats.started
+    response.headers.add('Server-Timing', f'db;dur={stats.total * 1000:.1f};desc="{stats.count} queries"')
+    response.headers.add('Server-Timing', f'app;dur={elapsed * 1000:.1f}')
+
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    request_metrics.observe(route, request.method, response.status_code, elapsed, stats.count, stats.total)
+
+    for statement, count in stats.repeated(N_PLUS_ONE_THRESHOLD):
+        log_event('n_plus_one', route=route, method=request.method, count=count, statement=compact_statement(statement))
+    if elapsed * 1000 >= SLOW_REQUEST_MS:
+        log_event(
+            'slow_request',
+            route=route,
+            method=request.method,
+            status=response.status_code,
+            duration_ms=round(elapsed * 1000, 1),
+            db_ms=round(stats.total * 1000, 1),
+            queries=stats.count,
+            slowest=[
+                {'duration_ms': round(seconds * 1000, 1), 'statement': compact_statement(statement)}
+                for seconds, statement in stats.slowest
+            ],
+        )
+    return response
+
+
+def monitoring_required(f):
+    """Restricts a monitoring view to METRICS_TOKEN holders and admins; the stats can leak hosts and errors."""
+    @functools.wraps(f)
+    def decorated(*args, **kwargs):
+        token = get_bearer_token()
+        if METRICS_TOKEN and token and hmac.compare_digest(token, METRICS_TOKEN):
+            return f(*args, **kwargs)
+        error = authenticate_token(token)
+        if error:
+            return error
+        if g.current_user_role not in ('admin', 'superadmin'):
+            return jsonify({'error': 'Unauthorized access'}), 403
+        return f(*args, **kwargs)
+
+    return decorated
+
+
+@app.route('/api/health', methods=['GET'])
+def health():
+    """Liveness check for load balancers; the details are in the views below."""
+    return jsonify({'ok': True}), 200
+
+
+@app.route('/metrics', methods=['GET'])
+@monitoring_required
+def metrics():
+    """Prometheus scrape endpoint."""
+    return Response(request_metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/api/health/db-pool', methods=['GET'])
+@monitoring_required
+def db_pool_stats():
+    """Reports connection pool usage for monitoring."""
+    return jsonify(db_pool.stats()), 200
+
+
+@app.route('/api/health/password-hashing', methods=['GET'])
+@monitoring_required
+def password_hashing_stats():
+    """Reports the password hashing method, pool size and rejected requests."""
+    return jsonify(password_hasher.stats()), 200
+
+
+@app.route('/api/health/response-cache', methods=['GET'])
+@monitoring_required
+def response_cache_stats():
+    """Reports response cache size and hit, 304 and miss counts."""
+    return jsonify(response_cache.stats()), 200
+
+
+@app.route('/api/health/mail', methods=['GET'])
+@monitoring_required
+def mail_queue_stats():
+    """Reports outbound mail queue depth, delivery counts and latency."""
+    return jsonify(mail_queue.stats()), 200
+
+
 # --- Frontend Serving Routes ---
+# build_frontend.py writes the precompiled app to static/dist. Its assets have
+# content hashes in their names, so they can be cached forever.
+FRONTEND_DIST_DIR = os.path.join(app.static_folder, 'dist')
+PRECOMPRESSED_ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+@app.route('/static/dist/<path:filename>')
+def frontend_asset(filename):
+    """Serves a built asset, preferring a precompressed variant the client accepts."""
+    for encoding, suffix in PRECOMPRESSED_ENCODINGS:
+        if encoding in request.accept_encodings and os.path.isfile(os.path.join(FRONTEND_DIST_DIR, filename + suffix)):
+            response = send_from_directory(
+                FRONTEND_DIST_DIR, filename + suffix, mimetype=mimetypes.guess_type(filename)[0]
+            )
+            response.headers['Content-Encoding'] = encoding
+            break
+    else:
+        response = send_from_directory(FRONTEND_DIST_DIR, filename)
+    response.vary.add('Accept-Encoding')
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
 
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
 def catch_all(path):
-    # Initialize and migrate DB on first request
-    init_db()
-    return send_from_directory('templates', 'index.html')
+    # Prefer the precompiled page; fall back to in-browser Babel when no build exists
+    if os.path.isfile(os.path.join(FRONTEND_DIST_DIR, 'index.html')):
+        response = send_from_directory(FRONTEND_DIST_DIR, 'index.html')
+    else:
+        response = send_from_directory('templates', 'index.html')
+    # The page names the current bundle, so it must be revalidated on every load
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
 
 if __name__ == '__main__':
     init_db()
+    db_pool.fill()
     app.run(debug=True, host='0.0.0.0', port=5130)
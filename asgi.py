@@ -0,0 +1,639 @@
+"""Async (ASGI) entry point for the Idea Ticketing API.
+
+The hot, I/O-bound endpoints are served by async handlers on an aiomysql
+connection pool, so a few event-loop workers can keep thousands of requests
+waiting on MySQL at once:
+
+- GET  /api/ideas                                (filters, paging, streamed full list)
+- POST /api/ideas/{id}/react
+- GET  /api/notifications/user/{id}              (notification feed)
+- GET  /api/notifications/user/{id}/unread-count
+
+Every other route is handed to the Flask app in app.py, which runs on a thread
+pool behind a WSGI adapter. Both halves share app.py's SQL, configuration,
+token and response caches, so responses and ETags are the same in either mode.
+
+    pip install -r requirements-async.txt
+    python asgi.py                        # ASGI_WORKERS processes on ASGI_HOST:ASGI_PORT
+    uvicorn asgi:app --workers 4 --port 5130
+"""
+import asyncio
+import contextlib
+import datetime
+import os
+import random
+
+import aiomysql
+import pymysql
+import uvicorn
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Mount, Route
+from werkzeug.datastructures import MultiDict
+from werkzeug.http import parse_accept_header, parse_etags
+
+from app import (
+    app as flask_app, db_pool, init_db, start_background_jobs, DB_CONFIG, DB_POOL_CHECKOUT_TIMEOUT,
+    DB_POOL_IDLE_TIMEOUT, PoolExhaustedError, verify_token_claims, token_version_cache, TOKEN_VERSION_QUERY,
+    build_idea_filters, plan_idea_list, finish_idea_page, decode_departments_impacted, response_cache,
+    response_etag, cache_versions_query, cache_version_bump_query, CACHED_RESPONSE_HEADERS,
+    REACTION_SELECT_SQL, REACTION_COUNTERS_SQL, REACTION_RESULT_SQL, plan_reaction, DEADLOCK_ERROR_CODES,
+    DEADLOCK_MAX_ATTEMPTS, NOTIFICATION_INSERT_SQL, notification_event, notification_broker,
+    notification_page_query, SSE_HEARTBEAT_SECONDS, SSE_RESYNC_SECONDS, SSE_MAX_SECONDS, format_sse,
+    hash_stream_ticket, STREAM_TICKET_SELECT_SQL, STREAM_TICKET_DELETE_SQL,
+    STREAM_CHUNK_BYTES, STREAM_FETCH_ROWS, STREAM_THRESHOLD_ROWS, STREAM_MAX_CONCURRENT, StreamLimitReached,
+    log_event, COMPRESSION_ENABLED, COMPRESSION_MIN_SIZE, COMPRESSORS, SUPPORTED_ENCODINGS,
+)
+
+# Async Runtime Configuration
+ASGI_HOST = os.getenv('ASGI_HOST', '0.0.0.0')
+ASGI_PORT = int(os.getenv('ASGI_PORT', 5130))
+ASGI_WORKERS = int(os.getenv('ASGI_WORKERS', 2))
+ASGI_WSGI_THREADS = int(os.getenv('ASGI_WSGI_THREADS', 20))  # threads for routes served by the Flask app
+ASYNC_DB_POOL_MIN_SIZE = int(os.getenv('ASYNC_DB_POOL_MIN_SIZE', 2))
+ASYNC_DB_POOL_MAX_SIZE = int(os.getenv('ASYNC_DB_POOL_MAX_SIZE', 50))
+# Notification streams open at once per process; they cost no thread here, unlike under Flask
+ASGI_SSE_MAX_STREAMS = int(os.getenv('ASGI_SSE_MAX_STREAMS', 1000))
+# Open streams per process, capped like the Flask side's so slow clients cannot drain the pool
+stream_slots = asyncio.Semaphore(STREAM_MAX_CONCURRENT)
+sse_slots = asyncio.Semaphore(ASGI_SSE_MAX_STREAMS)
+
+# Tables the idea list reads; must match @cached_response on handle_ideas
+IDEA_LIST_TABLES = ('ideas', 'idea_reactions', 'users')
+
+
+# --- Async Connection Pool ---
+class AsyncDatabase:
+    """Holds the aiomysql pool, created when the server starts in each worker process."""
+
+    def __init__(self):
+        self.pool = None
+
+    async def open(self):
+        self.pool = await aiomysql.create_pool(
+            host=DB_CONFIG['host'],
+            port=DB_CONFIG['port'],
+            user=DB_CONFIG['user'],
+            password=DB_CONFIG['password'],
+            db=DB_CONFIG['database'],
+            charset=DB_CONFIG['charset'],
+            cursorclass=aiomysql.DictCursor,
+            autocommit=False,
+            minsize=ASYNC_DB_POOL_MIN_SIZE,
+            maxsize=ASYNC_DB_POOL_MAX_SIZE,
+            pool_recycle=DB_POOL_IDLE_TIMEOUT,
+        )
+
+    async def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            await self.pool.wait_closed()
+
+    @contextlib.asynccontextmanager
+    async def connection(self):
+        """Checks a connection out for one unit of work and rolls back whatever was not committed."""
+        try:
+            conn = await asyncio.wait_for(self.pool.acquire(), DB_POOL_CHECKOUT_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise PoolExhaustedError(f'No database connection available within {DB_POOL_CHECKOUT_TIMEOUT}s') from None
+        try:
+            yield conn
+        finally:
+            try:
+                await conn.rollback()
+            except Exception:
+                conn.close()  # A broken connection is dropped by the pool on release
+            self.pool.release(conn)
+
+
+database = AsyncDatabase()
+
+
+async def fetch_one(conn, query, params=None):
+    async with conn.cursor() as cursor:
+        await cursor.execute(query, params)
+        return await cursor.fetchone()
+
+
+async def fetch_all(conn, query, params=None):
+    async with conn.cursor() as cursor:
+        await cursor.execute(query, params)
+        return list(await cursor.fetchall())
+
+
+# --- Responses ---
+def negotiate_encoding(request):
+    if not COMPRESSION_ENABLED:
+        return None
+    return parse_accept_header(request.headers.get('accept-encoding')).best_match(SUPPORTED_ENCODINGS)
+
+
+def json_response(request, payload, status=200, headers=None, etag=None):
+    """Serializes like the Flask app, then compresses as compress_response would."""
+    return body_response(request, flask_app.json.dumps(payload).encode(), status, headers, etag)
+
+
+def body_response(request, body, status=200, headers=None, etag=None):
+    headers = dict(headers or {})
+    headers.setdefault('Content-Type', 'application/json')
+    headers['Access-Control-Allow-Origin'] = '*'  # as CORS(app) does for the Flask routes
+    headers['Vary'] = 'Accept-Encoding'
+    if etag:
+        headers['ETag'] = f'"{etag}"'
+        headers['Cache-Control'] = 'private, no-cache'
+    encoding = negotiate_encoding(request)
+    if encoding and len(body) >= COMPRESSION_MIN_SIZE:
+        compressor = COMPRESSORS[encoding]()
+        compressed = compressor.compress(body) + compressor.finish()
+        if len(compressed) < len(body):
+            body = compressed
+            headers['Content-Encoding'] = encoding
+            if etag:
+                headers['ETag'] = f'W/"{etag}"'
+    return Response(body, status_code=status, headers=headers)
+
+
+def error_response(request, message, status, key='error'):
+    return json_response(request, {key: message}, status)
+
+
+def stream_response(request, chunks, etag=None, background=None):
+    headers = {'Access-Control-Allow-Origin': '*', 'Vary': 'Accept-Encoding'}
+    if etag:
+        headers['ETag'] = f'"{etag}"'
+        headers['Cache-Control'] = 'private, no-cache'
+    encoding = negotiate_encoding(request)
+    if encoding:
+        chunks = compress_chunks(chunks, COMPRESSORS[encoding]())
+        headers['Content-Encoding'] = encoding
+        if etag:
+            headers['ETag'] = f'W/"{etag}"'
+    return StreamingResponse(chunks, media_type='application/json', headers=headers, background=background)
+
+
+async def compress_chunks(chunks, compressor):
+    async for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+class AsyncRowStream:
+    """Async counterpart of app.RowStream: a server-side cursor on a connection of its own.
+
+    open() runs the query and fetches the first buffer_rows rows before the response
+    starts, so failures still get an error status. When that was every row,
+    ``complete`` is True and the connection is already released; otherwise the
+    stream takes one of the STREAM_MAX_CONCURRENT slots or raises StreamLimitReached.
+    """
+
+    @classmethod
+    async def open(cls, query, params, buffer_rows=STREAM_FETCH_ROWS):
+        stream = cls()
+        stream._resources = contextlib.AsyncExitStack()
+        try:
+            conn = await stream._resources.enter_async_context(database.connection())
+            stream._cursor = await stream._resources.enter_async_context(conn.cursor(aiomysql.SSDictCursor))
+            await stream._cursor.execute(query, params)
+            stream._first = await stream._cursor.fetchmany(buffer_rows)
+            stream.complete = len(stream._first) < buffer_rows
+            if stream.complete:
+                await stream.close()
+            elif stream_slots.locked():
+                raise StreamLimitReached()
+            else:
+                await stream_slots.acquire()
+                stream._resources.callback(stream_slots.release)
+        except BaseException:
+            await stream.close()
+            raise
+        return stream
+
+    def buffered(self):
+        """The rows of a complete stream."""
+        rows, self._first = self._first, []
+        return rows
+
+    async def __aiter__(self):
+        try:
+            rows, self._first = self._first, []
+            while rows:
+                for row in rows:
+                    yield row
+                if self.complete:
+                    break
+                rows = await self._cursor.fetchmany(STREAM_FETCH_ROWS)
+                self.complete = not rows
+        except Exception as e:
+            # Headers are already sent; re-raising aborts the chunked body so clients see a truncated download
+            log_event('stream_failed', error=str(e))
+            raise
+        finally:
+            await self.close()
+
+    async def close(self):
+        await self._resources.aclose()
+
+
+async def json_array_chunks(rows, transform=None):
+    """Serializes a row stream as a JSON array in chunks of about STREAM_CHUNK_BYTES."""
+    buffer, size, separator = ['['], 1, ''
+    async for row in rows:
+        if transform is not None:
+            transform(row)
+        piece = separator + flask_app.json.dumps(row)
+        separator = ','
+        buffer.append(piece)
+        size += len(piece)
+        if size >= STREAM_CHUNK_BYTES:
+            yield ''.join(buffer).encode()
+            buffer, size = [], 0
+    buffer.append(']')
+    yield ''.join(buffer).encode()
+
+
+async def stream_json_rows(request, query, params, transform=None, etag=None):
+    """Like app.stream_json_rows: up to STREAM_THRESHOLD_ROWS rows go out as one response."""
+    rows = await AsyncRowStream.open(query, params, STREAM_THRESHOLD_ROWS)
+    if rows.complete:
+        buffered = rows.buffered()
+        if transform is not None:
+            for row in buffered:
+                transform(row)
+        return json_response(request, buffered, etag=etag)
+    # Also closes the stream if the client goes away before the body is read
+    return stream_response(request, json_array_chunks(rows, transform), etag, BackgroundTask(rows.close))
+
+
+# --- Authentication ---
+async def authenticate(request, conn):
+    """Returns (claims, None) for a valid, unrevoked bearer token, or (None, error response)."""
+    auth_header = request.headers.get('authorization', '')
+    token = auth_header.split(' ')[1] if auth_header.startswith('Bearer ') else None
+    claims, error = verify_token_claims(token)
+    if error:
+        return None, error_response(request, error, 401, key='message')
+
+    # Tokens issued before token_version existed count as version 0
+    if await current_token_version(conn, claims['user_id']) != claims.get('ver', 0):
+        return None, error_response(request, 'Token has been revoked!', 401, key='message')
+    return claims, None
+
+
+async def current_token_version(conn, user_id):
+    """token_version_cache.get for the async connection."""
+    hit, version = token_version_cache.lookup(user_id)
+    if not hit:
+        row = await fetch_one(conn, TOKEN_VERSION_QUERY, (user_id,))
+        version = token_version_cache.store(user_id, row['token_version'] if row else None)
+    return version
+
+
+async def redeem_stream_ticket(conn, ticket):
+    """app.redeem_stream_ticket on the async connection."""
+    ticket_hash = hash_stream_ticket(ticket)
+    async with conn.cursor() as cursor:
+        await cursor.execute(STREAM_TICKET_SELECT_SQL, (ticket_hash,))
+        row = await cursor.fetchone()
+        if row is not None:
+            await cursor.execute(STREAM_TICKET_DELETE_SQL, (ticket_hash,))
+    await conn.commit()
+    if row is None or row['expires_at'] < datetime.datetime.now():
+        return None
+    if await current_token_version(conn, row['user_id']) != row['token_version']:
+        return None
+    return row['user_id']
+
+
+# --- Idea Endpoints ---
+async def idea_filters(args, user_id):
+    """build_idea_filters, which only touches the database to run a search."""
+    if args.get('search'):
+        # The search backends are synchronous; run them on a thread with a pooled connection
+        def build_with_search():
+            with db_pool.connection() as db:
+                return build_idea_filters(db.cursor(), args, user_id)
+        return await run_in_threadpool(build_with_search)
+    return build_idea_filters(None, args, user_id)
+
+
+async def list_ideas(request):
+    """GET /api/ideas, as handle_ideas serves it (same filters, paging, headers and ETags)."""
+    args = MultiDict(request.query_params.multi_items())
+    async with database.connection() as conn:
+        claims, error = await authenticate(request, conn)
+        if error:
+            return error
+        user_id = claims['user_id']
+
+        # Read in the same transaction as the list, so the versions match the data
+        rows = await fetch_all(conn, cache_versions_query(IDEA_LIST_TABLES), IDEA_LIST_TABLES)
+        versions = {row['table_name']: row['version'] for row in rows}
+        etag = response_etag(
+            'handle_ideas', {}, args.items(multi=True), user_id,
+            tuple(versions.get(table, 0) for table in IDEA_LIST_TABLES)
+        )
+        if parse_etags(request.headers.get('if-none-match')).contains_weak(etag):
+            response_cache.not_modified += 1
+            return Response(status_code=304, headers={'ETag': f'"{etag}"', 'Cache-Control': 'private, no-cache'})
+        entry = response_cache.get(etag)
+        if entry is not None:
+            response_cache.hits += 1
+            body, headers = entry
+            return body_response(request, body, 200, dict(headers), etag)
+        response_cache.misses += 1
+
+        try:
+            where_clauses, filter_params, ranked_ids = await idea_filters(args, user_id)
+        except ValueError:
+            return error_response(request, 'Dates must be in YYYY-MM-DD format', 400)
+        try:
+            plan = plan_idea_list(args, user_id, where_clauses, filter_params, ranked_ids)
+        except ValueError as e:
+            return error_response(request, str(e), 400)
+
+        headers = {'Content-Type': 'application/json'}
+        if plan['limit'] is None:
+            # The unpaginated list can be the whole table, so long ones are streamed
+            rows = await AsyncRowStream.open(plan['query'], plan['params'], STREAM_THRESHOLD_ROWS)
+            if not rows.complete:
+                chunks = json_array_chunks(rows, decode_departments_impacted)
+                return stream_response(request, chunks, etag, BackgroundTask(rows.close))
+            ideas = rows.buffered()
+        else:
+            if plan['count_query']:
+                headers['X-Total-Count'] = str((await fetch_one(conn, plan['count_query'], filter_params))['total'])
+            ideas, next_cursor = finish_idea_page(plan, await fetch_all(conn, plan['query'], plan['params']))
+            if next_cursor:
+                headers['X-Next-Cursor'] = next_cursor
+    for idea in ideas:
+        decode_departments_impacted(idea)
+
+    body = flask_app.json.dumps(ideas).encode()
+    response_cache.put(etag, (body, [(name, headers[name]) for name in CACHED_RESPONSE_HEADERS if name in headers]))
+    return body_response(request, body, 200, headers, etag)
+
+
+async def apply_reaction(conn, idea_id, claims, reaction_type):
+    """One attempt at react_to_idea's transaction. Returns (previous, new, totals, notifications)."""
+    params = {'idea_id': idea_id, 'user_id': claims['user_id'], 'reaction': reaction_type}
+    async with conn.cursor() as cursor:
+        await cursor.execute(REACTION_SELECT_SQL, params)
+        row = await cursor.fetchone()
+        previous_reaction = row['reaction_type'] if row else None
+        new_reaction, statement = plan_reaction(params, previous_reaction)
+        await cursor.execute(statement, params)
+        await cursor.execute(REACTION_COUNTERS_SQL, params)
+        await cursor.execute(REACTION_RESULT_SQL, params)
+        idea = await cursor.fetchone()
+
+        # CEO Reaction Logic: Update Idea Status
+        notifications = []
+        new_status = {'like': 'Approved', 'dislike': 'Rejected'}.get(new_reaction)
+        if claims['role'] == 'ceo' and new_status and idea['status'] != new_status:
+            current_time = datetime.datetime.now()
+            await cursor.execute(
+                'UPDATE ideas SET status = %s, last_edited_at = %s WHERE id = %s', (new_status, current_time, idea_id)
+            )
+            row = (
+                idea['user_id'], idea_id,
+                f'The status of your idea "{idea["ideaTitle"]}" has been updated to "{new_status}" by the CEO.'
+            )
+            await cursor.execute(NOTIFICATION_INSERT_SQL, (*row, current_time))
+            notifications = [notification_event(cursor.lastrowid, row, current_time)]
+        await cursor.execute(*cache_version_bump_query(('ideas', 'idea_reactions')))
+    return previous_reaction, new_reaction, idea, notifications
+
+
+async def react_to_idea(request):
+    """POST /api/ideas/{id}/react, the same upsert-and-delta transaction as the Flask view."""
+    idea_id = request.path_params['idea_id']
+    try:
+        data = await request.json()
+    except ValueError:
+        data = {}
+    reaction_type = data.get('reactionType') if isinstance(data, dict) else None
+    if reaction_type not in ['like', 'dislike']:
+        return error_response(request, 'Invalid reaction type', 400)
+
+    async with database.connection() as conn:
+        claims, error = await authenticate(request, conn)
+        if error:
+            return error
+        for attempt in range(1, DEADLOCK_MAX_ATTEMPTS + 1):
+            try:
+                previous_reaction, new_reaction, totals, notifications = await apply_reaction(
+                    conn, idea_id, claims, reaction_type
+                )
+                await conn.commit()
+                break
+            except pymysql.err.IntegrityError:
+                await conn.rollback()
+                return error_response(request, 'Idea not found', 404)
+            except pymysql.err.OperationalError as e:
+                await conn.rollback()
+                if e.args[0] not in DEADLOCK_ERROR_CODES or attempt == DEADLOCK_MAX_ATTEMPTS:
+                    raise
+                await asyncio.sleep(random.uniform(0.005, 0.02) * attempt)
+    for notification in notifications:
+        notification_broker.publish(notification['user_id'], notification)
+
+    if new_reaction is None:
+        message = 'Reaction removed'
+    elif previous_reaction is None:
+        message = 'Reaction added'
+    else:
+        message = 'Reaction updated'
+    return json_response(request, {
+        'message': message,
+        'likes': totals['likes'],
+        'dislikes': totals['dislikes'],
+        'points': totals['points'],
+        'user_reaction': new_reaction,
+    })
+
+
+# --- Notification Endpoints ---
+async def notifications_feed(request):
+    """GET /api/notifications/user/{id}, with the same since_id/limit handling as get_notifications."""
+    user_id = request.path_params['user_id']
+    args = MultiDict(request.query_params.multi_items())
+    since_id = args.get('since_id', type=int)
+    limit = args.get('limit', type=int)
+    if limit is not None and limit < 1:
+        return error_response(request, 'limit must be a positive integer', 400)
+
+    async with database.connection() as conn:
+        claims, error = await authenticate(request, conn)
+        if error:
+            return error
+        if since_id is None and limit is None:
+            return await stream_json_rows(
+                request, 'SELECT * FROM notifications WHERE user_id = %s ORDER BY created_at DESC, id DESC', (user_id,)
+            )
+        notifications = await fetch_all(conn, *notification_page_query(user_id, since_id, limit))
+    return json_response(request, notifications)
+
+
+class AsyncSubscription:
+    """A notification_broker subscription feeding an asyncio queue; publish() may run on any thread."""
+
+    def __init__(self, loop, max_size):
+        self._loop = loop
+        self.events = asyncio.Queue(maxsize=max_size)
+
+    def put_nowait(self, event):
+        self._loop.call_soon_threadsafe(self._offer, event)
+
+    def _offer(self, event):
+        if not self.events.full():  # A stalled stream catches up from the database on its next resync
+            self.events.put_nowait(event)
+
+
+async def fetch_notifications_after(conn, user_id, last_id, limit=100):
+    return await fetch_all(
+        conn,
+        'SELECT * FROM notifications WHERE user_id = %s AND id > %s ORDER BY id ASC LIMIT %s',
+        (user_id, last_id, limit)
+    )
+
+
+async def notification_stream(request):
+    """GET /api/notifications/stream, as the Flask view serves it, without holding a thread per stream."""
+    last_event_id = request.headers.get('last-event-id') or request.query_params.get('lastEventId')
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        return error_response(request, 'Invalid Last-Event-ID', 400)
+
+    ticket = request.query_params.get('ticket')
+    async with database.connection() as conn:
+        if ticket:
+            user_id = await redeem_stream_ticket(conn, ticket)
+            if user_id is None:
+                return error_response(request, 'Invalid or expired stream ticket!', 401, key='message')
+        else:
+            claims, error = await authenticate(request, conn)
+            if error:
+                return error
+            user_id = claims['user_id']
+
+        if sse_slots.locked():
+            response = error_response(request, 'Too many open notification streams. Please try again shortly.', 503)
+            response.headers['Retry-After'] = '5'
+            return response
+        await sse_slots.acquire()
+        resources = contextlib.AsyncExitStack()
+        resources.callback(sse_slots.release)
+        try:
+            # Subscribe before reading the backlog so nothing published in between is missed
+            subscription = AsyncSubscription(asyncio.get_running_loop(), notification_broker.max_queue_size)
+            notification_broker.subscribe(user_id, subscription)
+            resources.callback(notification_broker.unsubscribe, user_id, subscription)
+            if last_event_id is None:
+                row = await fetch_one(
+                    conn, 'SELECT COALESCE(MAX(id), 0) AS last_id FROM notifications WHERE user_id = %s', (user_id,)
+                )
+                last_event_id = row['last_id']
+                missed = []
+            else:
+                missed = await fetch_notifications_after(conn, user_id, last_event_id)
+        except BaseException:
+            await resources.aclose()
+            raise
+
+    async def generate(last_sent):
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        next_resync = started + SSE_RESYNC_SECONDS
+        try:
+            yield 'retry: 5000\n\n'
+            for notification in missed:
+                last_sent = notification['id']
+                yield format_sse(notification)
+            while loop.time() - started < SSE_MAX_SECONDS:
+                try:
+                    pending = [await asyncio.wait_for(subscription.events.get(), SSE_HEARTBEAT_SECONDS)]
+                except asyncio.TimeoutError:
+                    pending = []
+                    yield ': keep-alive\n\n'
+                if loop.time() >= next_resync:
+                    # Pick up notifications written by other worker processes
+                    next_resync = loop.time() + SSE_RESYNC_SECONDS
+                    async with database.connection() as resync_conn:
+                        pending = await fetch_notifications_after(resync_conn, user_id, last_sent)
+                for notification in pending:
+                    if notification['id'] <= last_sent:
+                        continue
+                    last_sent = notification['id']
+                    yield format_sse(notification)
+        finally:
+            await resources.aclose()
+
+    # The background task also frees the slot if the client leaves before the body starts
+    return StreamingResponse(generate(last_event_id), media_type='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',  # Disable proxy buffering (nginx)
+        'Access-Control-Allow-Origin': '*',
+    }, background=BackgroundTask(resources.aclose))
+
+
+async def unread_notification_count(request):
+    async with database.connection() as conn:
+        claims, error = await authenticate(request, conn)
+        if error:
+            return error
+        user_id = request.path_params['user_id']
+        if user_id != claims['user_id'] and claims['role'] not in ('admin', 'superadmin'):
+            return error_response(request, 'Unauthorized access', 403)
+        row = await fetch_one(
+            conn,
+            'SELECT COUNT(*) AS unread FROM notifications WHERE user_id = %s AND is_read = 0',
+            (user_id,)
+        )
+    return json_response(request, {'unread': row['unread']})
+
+
+async def handle_pool_exhausted(request, exc):
+    return error_response(request, 'The server is busy. Please try again shortly.', 503)
+
+
+async def handle_stream_limit(request, exc):
+    response = error_response(request, 'Too many downloads in progress. Please try again shortly.', 503)
+    response.headers['Retry-After'] = '5'
+    return response
+
+
+@contextlib.asynccontextmanager
+async def lifespan(_):
+    # Migrations and the default accounts, exactly as the Flask entry point does
+    await run_in_threadpool(init_db)
+    start_background_jobs()
+    await database.open()
+    try:
+        yield
+    finally:
+        await database.close()
+
+
+app = Starlette(
+    routes=[
+        Route('/api/ideas', list_ideas, methods=['GET']),
+        Route('/api/ideas/{idea_id:int}/react', react_to_idea, methods=['POST']),
+        Route('/api/notifications/user/{user_id:int}', notifications_feed, methods=['GET']),
+        Route('/api/notifications/user/{user_id:int}/unread-count', unread_notification_count, methods=['GET']),
+        Route('/api/notifications/stream', notification_stream, methods=['GET']),
+        # Everything else (including other methods on the paths above) is served by Flask
+        Mount('/', app=WSGIMiddleware(flask_app, workers=ASGI_WSGI_THREADS)),
+    ],
+    exception_handlers={PoolExhaustedError: handle_pool_exhausted, StreamLimitReached: handle_stream_limit},
+    lifespan=lifespan,
+)
+
+
+if __name__ == '__main__':
+    uvicorn.run('asgi:app', host=ASGI_HOST, port=ASGI_PORT, workers=ASGI_WORKERS, proxy_headers=True)
@@ -0,0 +1,504 @@
+"""Benchmark and load suite for the Idea Ticketing API.
+
+`seed` fills a dedicated database with synthetic users, ideas, reactions,
+comments and notifications through the normal schema (init_db). `run` drives
+the hot endpoints and reports throughput, p50/p95/p99 latency and database
+queries per request for each scenario, optionally failing on a regression
+against a stored baseline. `compression` weighs response encodings and levels
+by bytes on the wire against time spent compressing. `compare-servers` runs
+the same scenarios against the threaded (app.py) and async (asgi.py) servers
+at several concurrency levels.
+
+Requests go through Flask's test client in this process by default, so no web
+server is involved; pass --url to load a running server over HTTP instead.
+Either way the app needs a real MySQL/MariaDB, e.g. a throwaway container:
+
+    docker run -d --name idea-bench-db -e MYSQL_ROOT_PASSWORD=bench -p 3307:3306 mysql:8.0
+    export DB_PORT=3307 DB_PASSWORD=bench DB_NAME=idea_bench
+    python bench.py seed --users 200 --ideas 5000
+    python bench.py run --save-baseline bench_baseline.json
+    python bench.py run --baseline bench_baseline.json --max-regression 0.2
+    python bench.py compression --url http://branch-office-host:5130 --mbps 4
+    python bench.py compare-servers --threaded-url http://localhost:5130 --async-url http://localhost:5131
+
+Queries per request come from the server's global 'Questions' counter, so the
+database should not be serving anything else during a run.
+"""
+import datetime
+import gzip
+import statistics
+import http.client
+import json
+import math
+import random
+import threading
+import time
+import urllib.parse
+
+import click
+
+from app import (
+    app, db_pool, init_db, issue_token, password_hasher, reconcile_reaction_totals, bump_cache_versions,
+    brotli, zstandard, GzipCompressor, BrotliCompressor, ZstdCompressor,
+)
+
+BENCH_EMAIL_DOMAIN = 'bench.local'
+BENCH_PASSWORD = 'bench-password'
+COMPANIES = ['Simon India Ltd', 'Zuari Management Services Ltd', 'Zuari Agro Chemicals Ltd', 'Paradeep Phosphates Ltd']
+CATEGORIES = ['AI Leadership / Thought Leadership', 'Productivity Enhancement Tools', 'Optimization']
+DEPARTMENTS = ['Finance', 'HR', 'Operations', 'Sales', 'IT', 'Supply Chain']
+TIMELINES = ['0–3 months', '3–6 months', '6–12 months', '12+ months']
+STATUSES = ['Submitted', 'Submitted', 'Under Review', 'Shortlisted', 'Approved', 'Rejected', 'Draft']
+WORDS = ('process automation cost vendor report dashboard invoice safety energy plant inventory '
+         'forecast training audit workflow procurement quality maintenance data portal').split()
+INSERT_BATCH = 1000
+
+
+def sentence(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def insert_rows(cursor, table, columns, rows):
+    """Inserts rows in multi-row batches."""
+    row_placeholders = '(' + ', '.join('%s' for _ in columns) + ')'
+    for start in range(0, len(rows), INSERT_BATCH):
+        batch = rows[start:start + INSERT_BATCH]
+        cursor.execute(
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES " + ', '.join(row_placeholders for _ in batch),
+            [value for row in batch for value in row]
+        )
+
+
+@click.group()
+def cli():
+    """Seeds benchmark data and runs the API load suite."""
+
+
+@cli.command()
+@click.option('--users', type=int, default=200, show_default=True)
+@click.option('--admins', type=int, default=5, show_default=True)
+@click.option('--ideas', type=int, default=5000, show_default=True)
+@click.option('--reactions', type=int, default=20000, show_default=True)
+@click.option('--comments', type=int, default=10000, show_default=True)
+@click.option('--notifications', type=int, default=20000, show_default=True)
+@click.option('--seed', 'random_seed', type=int, default=42, show_default=True, help='Random seed, for reproducible data.')
+def seed(users, admins, ideas, reactions, comments, notifications, random_seed):
+    """Creates the schema and fills it with synthetic data. Use an empty, dedicated database."""
+    rng = random.Random(random_seed)
+    init_db()
+    now = datetime.datetime.now()
+    with db_pool.connection() as db:
+        cursor = db.cursor()
+        cursor.execute('SELECT COUNT(*) AS existing FROM users WHERE email LIKE %s', (f'%@{BENCH_EMAIL_DOMAIN}',))
+        if cursor.fetchone()['existing']:
+            raise click.ClickException('Benchmark data already present; drop the database to reseed')
+
+        started = time.monotonic()
+        password = password_hasher.hash(BENCH_PASSWORD)
+        insert_rows(cursor, 'users', ('email', 'password', 'role', 'full_name'), [
+            (f'user{n}@{BENCH_EMAIL_DOMAIN}', password, 'admin' if n < admins else 'user', f'Bench User {n}')
+            for n in range(users)
+        ])
+        cursor.execute('SELECT id FROM users')
+        user_ids = [row['id'] for row in cursor.fetchall()]
+
+        idea_rows = []
+        for _ in range(ideas):
+            submitted = now - datetime.timedelta(minutes=rng.randrange(2 * 365 * 24 * 60))
+            idea_rows.append((
+                rng.choice(user_ids), f'Bench User {rng.randrange(users)}', rng.choice(COMPANIES),
+                sentence(rng, 6), rng.choice(CATEGORIES), sentence(rng, 40), sentence(rng, 40), sentence(rng, 20),
+                json.dumps(rng.sample(DEPARTMENTS, rng.randint(1, 3))), rng.choice(['Yes', 'No']), sentence(rng, 5),
+                str(rng.randrange(1000, 500000)), rng.choice(TIMELINES), rng.choice(STATUSES), submitted, submitted,
+            ))
+        insert_rows(cursor, 'ideas', (
+            'user_id', 'employeeName', 'company', 'ideaTitle', 'ideaCategory', 'problemStatement', 'proposedSolution',
+            'expectedBenefits', 'departmentsImpacted', 'availabilityOfData', 'dataSources', 'estimatedCost',
+            'implementationTimeline', 'status', 'submissionDate', 'last_edited_at',
+        ), idea_rows)
+        cursor.execute('SELECT id FROM ideas')
+        idea_ids = [row['id'] for row in cursor.fetchall()]
+
+        # One reaction per (idea, user) pair at most
+        pairs = {(rng.choice(idea_ids), rng.choice(user_ids)) for _ in range(reactions)}
+        insert_rows(cursor, 'idea_reactions', ('idea_id', 'user_id', 'reaction_type'), [
+            (idea_id, user_id, rng.choice(['like', 'like', 'dislike'])) for idea_id, user_id in sorted(pairs)
+        ])
+        reconcile_reaction_totals(cursor)
+
+        insert_rows(cursor, 'comments', ('idea_id', 'user_id', 'comment', 'created_at'), [
+            (rng.choice(idea_ids), rng.choice(user_ids), sentence(rng, 12),
+             now - datetime.timedelta(minutes=rng.randrange(365 * 24 * 60)))
+            for _ in range(comments)
+        ])
+        insert_rows(cursor, 'notifications', ('user_id', 'idea_id', 'message', 'is_read', 'created_at'), [
+            (rng.choice(user_ids), rng.choice(idea_ids), sentence(rng, 10), rng.random() < 0.7,
+             now - datetime.timedelta(minutes=rng.randrange(90 * 24 * 60)))
+            for _ in range(notifications)
+        ])
+        bump_cache_versions(cursor, 'users', 'ideas', 'idea_reactions', 'comments')
+        db.commit()
+    print(f"Seeded {users} users, {ideas} ideas, {len(pairs)} reactions, {comments} comments and "
+          f"{notifications} notifications in {time.monotonic() - started:.1f}s")
+
+
+# --- Load driver ---
+class InProcessClient:
+    """Sends requests straight into the app through Flask's test client."""
+
+    def __init__(self):
+        self._client = app.test_client()
+
+    def request(self, method, path, body=None, headers=None):
+        """Returns (status, body as sent on the wire, i.e. still compressed)."""
+        response = self._client.open(path, method=method, json=body, headers=headers)
+        # Reading drains streamed bodies, so the whole response is timed
+        return response.status_code, response.get_data()
+
+
+class HTTPClient:
+    """Sends requests to a running server over one keep-alive connection per worker."""
+
+    def __init__(self, url):
+        parts = urllib.parse.urlsplit(url)
+        connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        self._connect = lambda: connection_class(parts.netloc, timeout=30)
+        self._connection = self._connect()
+
+    def request(self, method, path, body=None, headers=None):
+        """Returns (status, body as sent on the wire, i.e. still compressed)."""
+        headers = dict(headers or {})
+        payload = None
+        if body is not None:
+            payload = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        try:
+            self._connection.request(method, path, payload, headers)
+            response = self._connection.getresponse()
+        except (http.client.HTTPException, OSError):
+            # The server may close idle keep-alive connections; retry once on a fresh one
+            self._connection.close()
+            self._connection = self._connect()
+            self._connection.request(method, path, payload, headers)
+            response = self._connection.getresponse()
+        return response.status, response.read()
+
+
+class Workload:
+    """Benchmark accounts and ideas, plus the request each scenario sends."""
+
+    def __init__(self, rng):
+        with db_pool.connection() as db:
+            cursor = db.cursor()
+            cursor.execute(
+                'SELECT id, email, role, full_name, token_version FROM users WHERE email LIKE %s',
+                (f'%@{BENCH_EMAIL_DOMAIN}',)
+            )
+            self.users = cursor.fetchall()
+            cursor.execute("SELECT id FROM ideas WHERE status != 'Draft' ORDER BY id")
+            self.idea_ids = [row['id'] for row in cursor.fetchall()]
+        if not self.users or not self.idea_ids:
+            raise click.ClickException('No benchmark data found; run `python bench.py seed` first')
+        self.tokens = {user['id']: issue_token(user) for user in self.users}
+        self.rng = rng
+
+    def auth(self, user):
+        return {'Authorization': f"Bearer {self.tokens[user['id']]}"}
+
+    def login(self, user):
+        return 'POST', '/api/login', {'email': user['email'], 'password': BENCH_PASSWORD}, None
+
+    def ideas_list(self, user):
+        filters = {'limit': 50}
+        if self.rng.random() < 0.5:
+            filters['status'] = self.rng.choice(STATUSES[:-1])
+        if self.rng.random() < 0.3:
+            filters['company'] = self.rng.choice(COMPANIES)
+        if self.rng.random() < 0.3:
+            filters['category'] = self.rng.choice(CATEGORIES)
+        return 'GET', '/api/ideas?' + urllib.parse.urlencode(filters), None, self.auth(user)
+
+    def ideas_search(self, user):
+        query = urllib.parse.urlencode({'search': self.rng.choice(WORDS), 'limit': 50})
+        return 'GET', f'/api/ideas?{query}', None, self.auth(user)
+
+    def ideas_stats(self, user):
+        return 'GET', '/api/ideas/stats', None, self.auth(user)
+
+    def react(self, user):
+        idea_id = self.rng.choice(self.idea_ids)
+        body = {'reactionType': self.rng.choice(['like', 'dislike'])}
+        return 'POST', f'/api/ideas/{idea_id}/react', body, self.auth(user)
+
+    def comment_list(self, user):
+        return 'GET', f'/api/ideas/{self.rng.choice(self.idea_ids)}/comments', None, self.auth(user)
+
+    def comment_post(self, user):
+        idea_id = self.rng.choice(self.idea_ids)
+        body = {'userId': user['id'], 'comment': sentence(self.rng, 12)}
+        return 'POST', f'/api/ideas/{idea_id}/comments', body, self.auth(user)
+
+    def notifications_poll(self, user):
+        return 'GET', f"/api/notifications/user/{user['id']}?since_id=0&limit=50", None, self.auth(user)
+
+    def unread_count(self, user):
+        return 'GET', f"/api/notifications/user/{user['id']}/unread-count", None, self.auth(user)
+
+
+SCENARIOS = [
+    'login', 'ideas_list', 'ideas_search', 'ideas_stats', 'react',
+    'comment_list', 'comment_post', 'notifications_poll', 'unread_count',
+]
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def count_questions():
+    """Returns the server's global count of client statements."""
+    with db_pool.connection() as db:
+        cursor = db.cursor()
+        cursor.execute("SHOW GLOBAL STATUS LIKE 'Questions'")
+        return int(cursor.fetchone()['Value'])
+
+
+def run_scenario(workload, name, make_client, concurrency, requests):
+    """Sends `requests` requests of one scenario from `concurrency` threads. Returns its metrics."""
+    build_request = getattr(workload, name)
+    latencies, errors = [], []
+    lock = threading.Lock()
+    per_worker = [requests // concurrency + (1 if n < requests % concurrency else 0) for n in range(concurrency)]
+
+    def worker(count):
+        client = make_client()
+        local_latencies, local_errors = [], []
+        for _ in range(count):
+            with lock:
+                method, path, body, headers = build_request(workload.rng.choice(workload.users))
+            started = time.perf_counter()
+            status, _ = client.request(method, path, body, headers)
+            local_latencies.append((time.perf_counter() - started) * 1000)
+            if status >= 400:
+                local_errors.append(status)
+        with lock:
+            latencies.extend(local_latencies)
+            errors.extend(local_errors)
+
+    threads = [threading.Thread(target=worker, args=(count,)) for count in per_worker if count]
+    questions_before = count_questions()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    # Discount our own bookkeeping: the ROLLBACK when the first reading's connection
+    # went back to the pool, and the second SHOW GLOBAL STATUS itself
+    queries = count_questions() - questions_before - 2
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'throughput': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(percentile(latencies, 0.50), 2),
+        'p95_ms': round(percentile(latencies, 0.95), 2),
+        'p99_ms': round(percentile(latencies, 0.99), 2),
+        'queries_per_request': round(queries / len(latencies), 2) if latencies else 0.0,
+    }
+
+
+def compare_to_baseline(results, baseline, max_regression):
+    """Returns a description of every metric that regressed beyond the allowed fraction."""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        for metric in ('p50_ms', 'p95_ms', 'p99_ms'):
+            if previous[metric] and current[metric] > previous[metric] * (1 + max_regression):
+                regressions.append(f'{name}: {metric} {previous[metric]} -> {current[metric]}')
+        if previous['throughput'] and current['throughput'] < previous['throughput'] * (1 - max_regression):
+            regressions.append(f"{name}: throughput {previous['throughput']} -> {current['throughput']}")
+        # Query counts are deterministic enough that any increase of half a query is a real change
+        if current['queries_per_request'] > previous['queries_per_request'] + 0.5:
+            regressions.append(
+                f"{name}: queries_per_request {previous['queries_per_request']} -> {current['queries_per_request']}"
+            )
+        if current['errors'] > previous['errors']:
+            regressions.append(f"{name}: errors {previous['errors']} -> {current['errors']}")
+    return regressions
+
+
+@cli.command()
+@click.option('--url', help='Base URL of a running server; omit to run the app in this process.')
+@click.option('--scenario', 'scenarios', multiple=True, type=click.Choice(SCENARIOS), help='Only run these scenarios.')
+@click.option('--concurrency', type=int, default=8, show_default=True)
+@click.option('--requests', type=int, default=500, show_default=True, help='Requests per scenario.')
+@click.option('--warmup', type=int, default=50, show_default=True, help='Untimed requests per scenario before measuring.')
+@click.option('--seed', 'random_seed', type=int, default=42, show_default=True)
+@click.option('--output', type=click.Path(dir_okay=False), help='Write the results as JSON.')
+@click.option('--baseline', type=click.Path(exists=True, dir_okay=False), help='Fail if results regress against this file.')
+@click.option('--max-regression', type=float, default=0.2, show_default=True, help='Allowed slowdown, as a fraction.')
+@click.option('--save-baseline', type=click.Path(dir_okay=False), help='Store the results as the new baseline.')
+def run(url, scenarios, concurrency, requests, warmup, random_seed, output, baseline, max_regression, save_baseline):
+    """Runs each scenario in turn and prints throughput, latency percentiles and queries per request."""
+    workload = Workload(random.Random(random_seed))
+    if url:
+        make_client = lambda: HTTPClient(url)  # noqa: E731
+    else:
+        init_db()
+        make_client = InProcessClient
+
+    results = {}
+    print(f"{'scenario':<20}{'reqs':>7}{'errors':>8}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'q/req':>7}")
+    for name in scenarios or SCENARIOS:
+        if warmup:
+            run_scenario(workload, name, make_client, concurrency, warmup)
+        result = results[name] = run_scenario(workload, name, make_client, concurrency, requests)
+        print(f"{name:<20}{result['requests']:>7}{result['errors']:>8}{result['throughput']:>9}"
+              f"{result['p50_ms']:>9}{result['p95_ms']:>9}{result['p99_ms']:>9}{result['queries_per_request']:>7}")
+
+    if output:
+        with open(output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if save_baseline:
+        with open(save_baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f'Saved baseline to {save_baseline}')
+    if baseline:
+        with open(baseline) as f:
+            regressions = compare_to_baseline(results, json.load(f), max_regression)
+        for regression in regressions:
+            print(f'REGRESSION {regression}')
+        if regressions:
+            raise click.ClickException(f'{len(regressions)} metrics regressed beyond {max_regression:.0%}')
+        print('No regressions against the baseline.')
+
+
+# (Content-Encoding, level) pairs compared offline; br and zstd only when their packages are installed
+COMPRESSION_LEVELS = [('gzip', level) for level in (1, 6, 9)]
+if brotli is not None:
+    COMPRESSION_LEVELS += [('br', level) for level in (1, 5, 9, 11)]
+if zstandard is not None:
+    COMPRESSION_LEVELS += [('zstd', level) for level in (1, 3, 9, 19)]
+COMPRESSOR_CLASSES = {'gzip': GzipCompressor, 'br': BrotliCompressor, 'zstd': ZstdCompressor}
+
+
+def decompress(encoding, data):
+    if encoding == 'gzip':
+        return gzip.decompress(data)
+    if encoding == 'br':
+        return brotli.decompress(data)
+    return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+
+
+def transfer_ms(size, mbps, rtt_ms):
+    """Time to move `size` bytes over a link of the given bandwidth, plus one round trip."""
+    return size * 8 / (mbps * 1000) + rtt_ms
+
+
+@cli.command()
+@click.option('--url', help='Base URL of a running server (e.g. across the VPN); omit to run the app in this process.')
+@click.option('--path', default='/api/ideas', show_default=True, help='Endpoint to measure.')
+@click.option('--repeat', type=int, default=10, show_default=True, help='Requests per encoding.')
+@click.option('--mbps', 'link_mbps', type=float, multiple=True, default=(2.0, 10.0, 100.0), show_default=True,
+              help='Link bandwidths to estimate transfer time for.')
+@click.option('--rtt-ms', type=float, default=40.0, show_default=True, help='Round-trip time of the estimated links.')
+def compression(url, path, repeat, link_mbps, rtt_ms):
+    """Compares response encodings: bytes on the wire, server time and transfer time per link speed.
+
+    The first table requests PATH with each encoding the server offers, measuring
+    the wire size and median response time (over the real network with --url).
+    The second compresses the identity body locally at several levels to show
+    the cost of each level. Estimated times add compression and decompression to
+    the transfer time over each --mbps link with --rtt-ms latency.
+    """
+    workload = Workload(random.Random(0))
+    if not url:
+        init_db()
+    client = HTTPClient(url) if url else InProcessClient()
+    admin = next((user for user in workload.users if user['role'] == 'admin'), workload.users[0])
+    auth = workload.auth(admin)
+    link_headers = ''.join(f"{f'@{mbps:g} Mbps':>13}" for mbps in link_mbps)
+
+    print(f'Measured, {path}:')
+    print(f"{'encoding':<10}{'bytes':>11}{'ratio':>8}{'median ms':>11}" + (link_headers if not url else ''))
+    identity_body = None
+    for encoding in ['identity'] + [e for e in ('gzip', 'br', 'zstd') if e in COMPRESSOR_CLASSES]:
+        timings, body = [], b''
+        for _ in range(repeat):
+            started = time.perf_counter()
+            status, body = client.request('GET', path, None, {**auth, 'Accept-Encoding': encoding})
+            timings.append((time.perf_counter() - started) * 1000)
+            if status != 200:
+                raise click.ClickException(f'{path} answered {status}')
+        if encoding == 'identity':
+            identity_body = body
+        median = statistics.median(timings)
+        line = f'{encoding:<10}{len(body):>11}{len(identity_body) / max(len(body), 1):>8.1f}{median:>11.1f}'
+        if not url:
+            # In-process timings have no network in them, so add the estimated transfer
+            line += ''.join(f'{median + transfer_ms(len(body), mbps, rtt_ms):>13.1f}' for mbps in link_mbps)
+        print(line)
+
+    print(f'\nOffline, {len(identity_body)} byte identity body:')
+    print(f"{'encoding':<10}{'level':>6}{'bytes':>11}{'ratio':>8}{'comp ms':>9}{'decomp ms':>11}" + link_headers)
+    for encoding, level in COMPRESSION_LEVELS:
+        compress_times, decompress_times = [], []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            compressor = COMPRESSOR_CLASSES[encoding](level)
+            compressed = compressor.compress(identity_body) + compressor.finish()
+            compress_times.append((time.perf_counter() - started) * 1000)
+            started = time.perf_counter()
+            decompress(encoding, compressed)
+            decompress_times.append((time.perf_counter() - started) * 1000)
+        codec_ms = min(compress_times) + min(decompress_times)
+        print(f'{encoding:<10}{level:>6}{len(compressed):>11}{len(identity_body) / len(compressed):>8.1f}'
+              f'{min(compress_times):>9.2f}{min(decompress_times):>11.2f}'
+              + ''.join(f'{codec_ms + transfer_ms(len(compressed), mbps, rtt_ms):>13.1f}' for mbps in link_mbps))
+    print(f"{'identity':<10}{'-':>6}{len(identity_body):>11}{1:>8.1f}{0:>9.2f}{0:>11.2f}"
+          + ''.join(f'{transfer_ms(len(identity_body), mbps, rtt_ms):>13.1f}' for mbps in link_mbps))
+
+
+
+@cli.command('compare-servers')
+@click.option('--threaded-url', required=True, help='Base URL of the Flask server (python app.py or gunicorn).')
+@click.option('--async-url', required=True, help='Base URL of the ASGI server (python asgi.py).')
+@click.option('--scenario', 'scenarios', multiple=True, type=click.Choice(SCENARIOS),
+              default=('ideas_list', 'react', 'notifications_poll'), show_default=True)
+@click.option('--concurrency', 'levels', multiple=True, type=int, default=(8, 64, 256), show_default=True,
+              help='Concurrent clients; repeat to sweep several levels.')
+@click.option('--requests', type=int, default=2000, show_default=True, help='Requests per scenario and level.')
+@click.option('--seed', 'random_seed', type=int, default=42, show_default=True)
+def compare_servers(threaded_url, async_url, scenarios, levels, requests, random_seed):
+    """Runs the same load against the threaded and the async server and prints them side by side.
+
+    Start both against the same database first. Each level uses one keep-alive
+    connection per client, so it also shows how each server copes with many
+    open connections that are mostly waiting on MySQL.
+    """
+    workload = Workload(random.Random(random_seed))
+    servers = [('threaded', threaded_url), ('async', async_url)]
+    print(f"{'scenario':<20}{'clients':>8}" + ''.join(
+        f"{f'{label} req/s':>16}{f'{label} p95':>14}{f'{label} err':>14}" for label, _ in servers
+    ))
+    for name in scenarios:
+        for concurrency in levels:
+            line = f'{name:<20}{concurrency:>8}'
+            for _, url in servers:
+                make_client = lambda url=url: HTTPClient(url)  # noqa: E731
+                run_scenario(workload, name, make_client, concurrency, concurrency)  # warm the connections
+                result = run_scenario(workload, name, make_client, concurrency, requests)
+                line += f"{result['throughput']:>16}{result['p95_ms']:>14}{result['errors']:>14}"
+            print(line)
+
+
+if __name__ == '__main__':
+    cli()
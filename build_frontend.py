@@ -0,0 +1,100 @@
+"""Precompiles the frontend into a minified, content-hashed, precompressed bundle.
+
+templates/index.html carries the whole React app in an inline
+<script type="text/babel"> block, which @babel/standalone compiles in the
+browser on every page load. This script compiles that block once with esbuild
+and writes, under static/dist/:
+
+- app.<hash>.js, plus .gz and .br variants, served with immutable caching;
+- manifest.json, mapping app.js to the hashed file name;
+- index.html, the page with the Babel loader removed and the inline block
+  replaced by a <script> tag for the bundle. catch_all serves this page
+  instead of the template whenever it exists.
+
+Needs Node.js; esbuild is fetched with npx unless ESBUILD points at a binary.
+Brotli variants need the optional `brotli` package.
+
+    python build_frontend.py
+"""
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+
+try:
+    import brotli
+except ImportError:  # Optional: without it only gzip variants are written
+    brotli = None
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+TEMPLATE = os.path.join(ROOT, 'templates', 'index.html')
+DIST_DIR = os.path.join(ROOT, 'static', 'dist')
+DIST_URL = '/static/dist'
+ESBUILD_VERSION = '0.20.2'
+
+APP_SCRIPT_RE = re.compile(r'<script type="text/babel">(.*?)</script>', re.S)
+BABEL_LOADER_RE = re.compile(r'[ \t]*<!-- Babel for JSX transformation -->\n|[ \t]*<script src="[^"]*@babel/standalone[^"]*"></script>\n')
+
+
+def compile_jsx(source):
+    """Returns the JSX source compiled to minified ES2018 with esbuild."""
+    esbuild = os.getenv('ESBUILD')
+    command = [esbuild] if esbuild else ['npx', '--yes', f'esbuild@{ESBUILD_VERSION}']
+    command += [
+        '--loader=jsx',
+        '--minify',
+        # The app declares top-level consts such as React; keep them out of the global scope
+        '--format=iife',
+        '--target=es2018',
+        '--legal-comments=none',
+    ]
+    result = subprocess.run(command, input=source.encode(), capture_output=True, check=False)
+    if result.returncode != 0:
+        sys.exit(f'esbuild failed:\n{result.stderr.decode()}')
+    return result.stdout
+
+
+def write_asset(name, data):
+    """Writes the asset and its precompressed variants into DIST_DIR."""
+    path = os.path.join(DIST_DIR, name)
+    with open(path, 'wb') as f:
+        f.write(data)
+    with open(path + '.gz', 'wb') as f:
+        f.write(gzip.compress(data, compresslevel=9, mtime=0))
+    if brotli is not None:
+        with open(path + '.br', 'wb') as f:
+            f.write(brotli.compress(data, quality=11))
+
+
+def build():
+    with open(TEMPLATE, encoding='utf-8') as f:
+        page = f.read()
+    match = APP_SCRIPT_RE.search(page)
+    if match is None:
+        sys.exit(f'No <script type="text/babel"> block found in {TEMPLATE}')
+
+    bundle = compile_jsx(match.group(1))
+    bundle_name = f'app.{hashlib.sha256(bundle).hexdigest()[:12]}.js'
+
+    # Start from an empty directory so superseded bundles do not pile up
+    shutil.rmtree(DIST_DIR, ignore_errors=True)
+    os.makedirs(DIST_DIR)
+    write_asset(bundle_name, bundle)
+    with open(os.path.join(DIST_DIR, 'manifest.json'), 'w') as f:
+        json.dump({'app.js': bundle_name}, f, indent=2)
+
+    page = page[:match.start()] + f'<script src="{DIST_URL}/{bundle_name}"></script>' + page[match.end():]
+    page = BABEL_LOADER_RE.sub('', page)
+    with open(os.path.join(DIST_DIR, 'index.html'), 'w', encoding='utf-8') as f:
+        f.write(page)
+
+    print(f'Wrote {DIST_URL}/{bundle_name} ({len(bundle) / 1024:.0f} KiB, '
+          f'{"gzip + brotli" if brotli is not None else "gzip"} variants) and {DIST_URL}/index.html')
+
+
+if __name__ == '__main__':
+    build()
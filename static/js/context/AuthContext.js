@@ -9,13 +9,22 @@ export const AuthProvider = ({ children }) => {
     const [loading, setLoading] = useState(true);
     const [notifications, setNotifications] = useState([]);
     const notificationIntervalRef = useRef(null);
+    const notificationSourceRef = useRef(null);
 
-    const logout = useCallback(() => {
-        // Clear notification polling interval
+    const stopNotificationUpdates = useCallback(() => {
+        // Close the notification event stream (or polling fallback)
+        if (notificationSourceRef.current) {
+            notificationSourceRef.current.close();
+            notificationSourceRef.current = null;
+        }
         if (notificationIntervalRef.current) {
             clearInterval(notificationIntervalRef.current);
             notificationIntervalRef.current = null;
         }
+    }, []);
+
+    const logout = useCallback(() => {
+        stopNotificationUpdates();
 
         // Clear notifications
         setNotifications([]);
@@ -25,7 +34,7 @@ export const AuthProvider = ({ children }) => {
         sessionStorage.removeItem('token');
         setUser(null);
         setIsLoggedIn(false);
-    }, []);
+    }, [stopNotificationUpdates]);
 
     const fetchWithAuth = useCallback(async (url, options = {}) => {
         const token = sessionStorage.getItem('token');
@@ -46,23 +55,26 @@ export const AuthProvider = ({ children }) => {
         return response;
     }, [logout]);
 
+    const formatNotification = (n) => ({
+        id: n.id,
+        message: n.message,
+        read: n.is_read === 1,
+        createdAt: n.created_at,
+        type: n.message.includes('updated to') ? 'Status Update' : (n.message.includes('commented on') ? 'New Comment' : 'New Idea'),
+        severity: 'info'
+    });
+
+    // Returns the newest notification id, so the event stream can resume after it
     const fetchNotifications = useCallback(async (userId) => {
-        if (!userId) return;
+        if (!userId) return null;
         try {
-            const response = await fetchWithAuth(`${API_BASE_URL}/notifications/user/${userId}`);
+            const response = await fetchWithAuth(`${API_BASE_URL}/notifications/user/${userId}?limit=100`);
 
             // Only process if response is OK
             if (response.ok) {
                 const data = await response.json();
-                const formattedNotifications = data.map(n => ({
-                    id: n.id,
-                    message: n.message,
-                    read: n.is_read === 1,
-                    createdAt: n.created_at,
-                    type: n.message.includes('updated to') ? 'Status Update' : (n.message.includes('commented on') ? 'New Comment' : 'New Idea'),
-                    severity: 'info'
-                }));
-                setNotifications(formattedNotifications);
+                setNotifications(data.map(formatNotification));
+                return data.reduce((max, n) => Math.max(max, n.id), 0);
             } else if (response.status === 401) {
                 // 401 handled by fetchWithAuth, clear notifications
                 setNotifications([]);
@@ -70,18 +82,104 @@ export const AuthProvider = ({ children }) => {
         } catch (error) {
             console.error("Failed to fetch notifications:", error);
         }
+        return null;
     }, [fetchWithAuth]);
 
+    const startNotificationUpdates = useCallback(async (userId) => {
+        stopNotificationUpdates();
+        const lastId = await fetchNotifications(userId);
+        if (lastId === null) return;
+
+        if (window.EventSource) {
+            // Server pushes new notifications. EventSource cannot send the token, so each
+            // connection uses a single-use ticket, and reconnects fetch a fresh one.
+            // While the stream is unavailable, poll for new notifications and back off.
+            let latestId = lastId;
+            let source = null;
+            let retryTimer = null;
+            let pollTimer = null;
+            let failures = 0;
+            let stopped = false;
+            const addNotifications = (items) => {
+                const fresh = items.map(formatNotification);
+                if (fresh.length === 0) return;
+                latestId = Math.max(latestId, ...fresh.map(n => n.id));
+                setNotifications(prev => {
+                    const known = new Set(prev.map(n => n.id));
+                    return [...fresh.filter(n => !known.has(n.id)).sort((a, b) => b.id - a.id), ...prev];
+                });
+            };
+            const poll = async () => {
+                try {
+                    const response = await fetchWithAuth(`${API_BASE_URL}/notifications/user/${userId}?since_id=${latestId}`);
+                    if (response.ok) addNotifications(await response.json());
+                } catch (error) {
+                    console.error("Failed to fetch notifications:", error);
+                }
+            };
+            const stopPolling = () => {
+                clearInterval(pollTimer);
+                pollTimer = null;
+            };
+            const retryLater = (retryAfterSeconds = 0) => {
+                if (stopped) return;
+                failures += 1;
+                if (!pollTimer) {
+                    poll();
+                    pollTimer = setInterval(poll, 30000);
+                }
+                const backoff = Math.min(5000 * 2 ** (failures - 1), 300000);
+                retryTimer = setTimeout(connect, Math.max(backoff, retryAfterSeconds * 1000));
+            };
+            const connect = async () => {
+                try {
+                    const response = await fetchWithAuth(`${API_BASE_URL}/notifications/stream-ticket`, { method: 'POST' });
+                    if (stopped || response.status === 401) return;
+                    if (!response.ok) return retryLater(Number(response.headers.get('Retry-After')) || 0);
+                    const { ticket } = await response.json();
+                    if (stopped) return;
+                    let opened = false;
+                    source = new EventSource(`${API_BASE_URL}/notifications/stream?ticket=${encodeURIComponent(ticket)}&lastEventId=${latestId}`);
+                    source.onopen = () => {
+                        opened = true;
+                        failures = 0;
+                        stopPolling();
+                    };
+                    source.addEventListener('notification', (event) => addNotifications([JSON.parse(event.data)]));
+                    source.onerror = () => {
+                        // The ticket is spent, so EventSource's own retry would be refused
+                        source.close();
+                        if (stopped) return;
+                        // A stream that ran and ended is renewed; one that never opened
+                        // (e.g. 503, too many streams) counts as a failure
+                        if (opened) retryTimer = setTimeout(connect, 5000);
+                        else retryLater();
+                    };
+                } catch (error) {
+                    console.error("Failed to open notification stream:", error);
+                    retryLater();
+                }
+            };
+            notificationSourceRef.current = {
+                close: () => {
+                    stopped = true;
+                    clearTimeout(retryTimer);
+                    stopPolling();
+                    if (source) source.close();
+                }
+            };
+            connect();
+        } else {
+            notificationIntervalRef.current = setInterval(() => {
+                fetchNotifications(userId);
+            }, 30000); // Poll every 30s
+        }
+    }, [fetchNotifications, stopNotificationUpdates]);
+
     useEffect(() => {
         const storedUser = sessionStorage.getItem('user');
         const storedToken = sessionStorage.getItem('token');
 
-        // Clear any existing interval
-        if (notificationIntervalRef.current) {
-            clearInterval(notificationIntervalRef.current);
-            notificationIntervalRef.current = null;
-        }
-
         if (storedUser && storedToken) {
             const parsedUser = JSON.parse(storedUser);
             if (parsedUser.email === SUPERADMIN_EMAIL) {
@@ -93,23 +191,15 @@ export const AuthProvider = ({ children }) => {
             setIsLoggedIn(true);
             setLoading(false);
 
-            // Fetch immediately and start polling
-            fetchNotifications(parsedUser.id);
-            notificationIntervalRef.current = setInterval(() => {
-                fetchNotifications(parsedUser.id);
-            }, 30000); // Poll every 30s
+            // Fetch immediately, then listen for new notifications
+            startNotificationUpdates(parsedUser.id);
         } else {
             setLoading(false);
         }
 
         // Cleanup on unmount or when dependencies change
-        return () => {
-            if (notificationIntervalRef.current) {
-                clearInterval(notificationIntervalRef.current);
-                notificationIntervalRef.current = null;
-            }
-        };
-    }, [fetchNotifications]);
+        return stopNotificationUpdates;
+    }, [startNotificationUpdates, stopNotificationUpdates]);
 
     const login = async (email, password) => {
         const response = await fetchWithAuth(`${API_BASE_URL}/login`, {
@@ -129,7 +219,7 @@ export const AuthProvider = ({ children }) => {
             sessionStorage.setItem('token', token);
             setUser(loggedInUser);
             setIsLoggedIn(true);
-            fetchNotifications(loggedInUser.id);
+            startNotificationUpdates(loggedInUser.id);
             return { success: true, user: loggedInUser };
         } else {
             return { success: false, error: data.error };
@@ -150,16 +240,17 @@ export const AuthProvider = ({ children }) => {
     };
 
     const markNotificationsAsRead = async () => {
-        const unreadIds = notifications.filter(n => !n.read).map(n => n.id);
-        if (unreadIds.length === 0) return;
+        const unread = notifications.filter(n => !n.read);
+        if (unread.length === 0) return;
+        const upToId = Math.max(...unread.map(n => n.id));
 
         const response = await fetchWithAuth(`${API_BASE_URL}/notifications/mark-read`, {
             method: 'POST',
-            body: JSON.stringify({ ids: unreadIds }),
+            body: JSON.stringify({ upToId }),
         });
 
         if (response.ok) {
-            setNotifications(prev => prev.map(n => unreadIds.includes(n.id) ? { ...n, read: true } : n));
+            setNotifications(prev => prev.map(n => n.id <= upToId ? { ...n, read: true } : n));
         }
     };
 